@@ -62,6 +62,13 @@ man_pages = [
         "Carmen Bianca BAKKER",
         1,
     ),
+    (
+        "man/protokolo-batch",
+        "protokolo-batch",
+        "Compile many change log directories at once.",
+        "Carmen Bianca BAKKER",
+        1,
+    ),
     (
         "man/protokolo-compile",
         "protokolo-compile",
@@ -76,6 +83,27 @@ man_pages = [
         "Carmen Bianca BAKKER",
         1,
     ),
+    (
+        "man/protokolo-daemon",
+        "protokolo-daemon",
+        "Keep change log directories in memory for faster dry runs.",
+        "Carmen Bianca BAKKER",
+        1,
+    ),
+    (
+        "man/protokolo-render",
+        "protokolo-render",
+        "Render the change log directory into several markup languages.",
+        "Carmen Bianca BAKKER",
+        1,
+    ),
+    (
+        "man/protokolo-watch",
+        "protokolo-watch",
+        "Preview the change log while the change log directory changes.",
+        "Carmen Bianca BAKKER",
+        1,
+    ),
 ]
 
 
@@ -10,7 +10,7 @@ if [ -z "${VIRTUAL_ENV}" ]; then
 fi
 
 # Get all the translation strings from the source.
-xgettext --add-comments --from-code=utf-8 --output=po/protokolo.pot src/**/*.py
+xgettext --add-comments --keyword=N_ --from-code=utf-8 --output=po/protokolo.pot src/**/*.py
 xgettext --add-comments --output=po/click.pot "${VIRTUAL_ENV}"/lib/python*/*-packages/click/**.py
 
 # Put everything in protokolo.pot.
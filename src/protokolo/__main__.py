@@ -6,8 +6,7 @@
 
 """Main entry into the program."""
 
-from .cli import main
+from .client import main
 
 if __name__ == "__main__":
-    # pylint: disable=no-value-for-parameter
     main()
@@ -5,23 +5,34 @@
 """Code to combine the files in protokolo/ into a single text block."""
 
 from abc import ABC, abstractmethod
+from collections.abc import Collection, Iterator, Mapping
 from datetime import date
-from inspect import cleandoc
+from functools import lru_cache
+from itertools import chain
 from string import Template
-from typing import cast
+from typing import TYPE_CHECKING, ClassVar
 
 from .config import SectionAttributes
-from .exceptions import HeadingFormatError
+from .exceptions import FormatterError, HeadingFormatError
 from .i18n import _
 
-# pylint: disable=too-few-public-methods
+if TYPE_CHECKING:
+    from importlib.metadata import EntryPoint
+
+#: The group of the entry points under which plugins register formatters.
+ENTRY_POINT_GROUP = "protokolo.formatters"
 
 
 class MarkupFormatter(ABC):
     """A simple formatter class."""
 
+    #: The suffixes of the fragments that are written in this markup language.
+    extensions: ClassVar[Collection[str]] = frozenset()
+
     @classmethod
-    def format_section(cls, attrs: SectionAttributes) -> str:
+    def format_section(
+        cls, attrs: SectionAttributes, today: date | None = None
+    ) -> str:
         """Format a title as a section heading. For instance, a level-2 Markdown
         section might look like this::
 
@@ -29,15 +40,36 @@ class MarkupFormatter(ABC):
 
         You can use ``$key`` (or ``${key}``) placeholders in the title to
         replace them with the values of the corresponding keys in *attrs*.
-        ``$date`` is special in that it is replaced with today's date. ``$$`` is
-        replaced by a single ``$``.
+        ``$date`` is special in that it is replaced with *today*, which defaults
+        to today's date. ``$$`` is replaced by a single ``$``.
+
+        Headings are cached by their title, substitution values, and level, so
+        formatting the same heading again is cheap.
 
         Raises:
             HeadingFormatError: could not format the heading as given.
         """
         cls._validate(attrs)
-        title = cls._format_output(attrs)
-        return cls._format_section(title, attrs)
+        title = attrs.title
+        values = _substitutions(title, attrs, today)
+        return _render_heading(cls, title, values, attrs.level)
+
+    @classmethod
+    def format_title(
+        cls, attrs: SectionAttributes, today: date | None = None
+    ) -> str:
+        """Like :meth:`format_section`, but return only the title with its
+        placeholders replaced, without any markup.
+
+        Raises:
+            HeadingFormatError: could not format the heading as given.
+        """
+        cls._validate(attrs)
+        title = attrs.title
+        template, _keys = _compile_template(title)
+        return template.safe_substitute(
+            dict(_substitutions(title, attrs, today))
+        )
 
     @classmethod
     def _validate(cls, attrs: SectionAttributes) -> None:
@@ -57,29 +89,65 @@ class MarkupFormatter(ABC):
 
     @classmethod
     @abstractmethod
-    def _format_section(cls, title: str, attrs: SectionAttributes) -> str: ...
+    def _format_section(cls, title: str, level: int) -> str: ...
 
-    @classmethod
-    def _format_output(cls, attrs: SectionAttributes) -> str:
-        values = attrs.as_dict()
-        # No recursive funny stuff.
-        title = cast(str, values.pop("title"))
+
+@lru_cache(maxsize=256)
+def _compile_template(title: str) -> tuple[Template, tuple[str, ...]]:
+    """Compile *title* into a template, and return it together with the names
+    of its placeholders.
+    """
+    template = Template(title)
+    # No recursive funny stuff.
+    return template, tuple(
+        key for key in template.get_identifiers() if key != "title"
+    )
+
+
+def _substitutions(
+    title: str, attrs: SectionAttributes, today: date | None
+) -> tuple[tuple[str, str], ...]:
+    """Return the placeholders in *title* that have a value in *attrs* as
+    ``(key, value)`` pairs, with the values converted to the strings that
+    replace them.
+    """
+    _template, keys = _compile_template(title)
+    if not keys:
+        return ()
+    values = attrs.as_dict()
+    result = []
+    for key in keys:
+        value = values.get(key)
+        if value is None and key == "date":
+            value = today if today is not None else date.today()
         # Don't render None.
-        values = {
-            key: value for key, value in values.items() if value is not None
-        }
-        values.setdefault("date", date.today())
-        template = Template(title)
-        return template.safe_substitute(**values)
+        if value is not None:
+            result.append((key, str(value)))
+    return tuple(result)
+
+
+@lru_cache(maxsize=1024)
+def _render_heading(
+    formatter: type[MarkupFormatter],
+    title: str,
+    values: tuple[tuple[str, str], ...],
+    level: int,
+) -> str:
+    template, _keys = _compile_template(title)
+    # pylint: disable=protected-access
+    return formatter._format_section(
+        template.safe_substitute(dict(values)), level
+    )
 
 
 class MarkdownFormatter(MarkupFormatter):
     """A Markdown formatter."""
 
+    extensions = frozenset({".md", ".markdown"})
+
     @classmethod
-    def _format_section(cls, title: str, attrs: SectionAttributes) -> str:
-        pound_signs = f"{'#' * attrs.level}"
-        return f"{pound_signs} {title}"
+    def _format_section(cls, title: str, level: int) -> str:
+        return f"{'#' * level} {title}"
 
 
 class ReStructuredTextFormatter(MarkupFormatter):
@@ -91,6 +159,7 @@ class ReStructuredTextFormatter(MarkupFormatter):
     # heading hierarchy?
     #
     # These are borrowed from Pandoc.
+    extensions = frozenset({".rst"})
     _levels = {
         1: "=",
         2: "-",
@@ -110,23 +179,140 @@ class ReStructuredTextFormatter(MarkupFormatter):
             )
 
     @classmethod
-    def _format_section(cls, title: str, attrs: SectionAttributes) -> str:
-        sign = cls._levels[attrs.level]
-        length = len(title)
-        return cleandoc(
-            f"""
-            {title}
-            {sign * length}
-            """
-        )
+    def _format_section(cls, title: str, level: int) -> str:
+        return f"{title}\n{cls._levels[level] * len(title)}"
+
+
+class FormatterRegistry(Mapping[str, type[MarkupFormatter]]):
+    """The formatters by the name of their markup language.
+
+    Besides the *builtins*, plugins can register formatters as entry points in
+    the group *group*. For example, a plugin would register an HTML formatter
+    in its ``pyproject.toml`` like this:
+
+    .. code:: toml
+
+        [project.entry-points."protokolo.formatters"]
+        html = "protokolo_html:HTMLFormatter"
+
+    The entry points are only discovered when a name that is not built in is
+    looked up, or when all names are listed, and a plugin is only imported when
+    its formatter is looked up. Plugins cannot replace the built-in formatters.
+    """
+
+    def __init__(
+        self,
+        builtins: Mapping[str, type[MarkupFormatter]],
+        group: str = ENTRY_POINT_GROUP,
+    ):
+        self._formatters = dict(builtins)
+        self._builtins = frozenset(builtins)
+        self._group = group
+        self._entry_points: dict[str, "EntryPoint"] | None = None
 
+    def __getitem__(self, name: str) -> type[MarkupFormatter]:
+        """Return the formatter of the markup language *name*, loading it if
+        it is a plugin.
 
-MARKUP_FORMATTER_MAPPING = {
-    "markdown": MarkdownFormatter,
-    "restructuredtext": ReStructuredTextFormatter,
-}
+        Raises:
+            KeyError: there is no such markup language.
+            FormatterError: the plugin could not be loaded.
+        """
+        formatter = self._formatters.get(name)
+        if formatter is None:
+            formatter = self._load(self._discover()[name])
+            self._formatters[name] = formatter
+        return formatter
+
+    def __contains__(self, name: object) -> bool:
+        # Don't load the plugin only to test whether it exists.
+        return name in self._formatters or name in self._discover()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(dict.fromkeys(chain(self._formatters, self._discover())))
+
+    def __len__(self) -> int:
+        return len(self._formatters.keys() | self._discover().keys())
+
+    def register(self, name: str, formatter: type[MarkupFormatter]) -> None:
+        """Register *formatter* under *name* without an entry point, for
+        example in an application that embeds Protokolo.
+        """
+        self._formatters[name] = formatter
+
+    def _discover(self) -> dict[str, "EntryPoint"]:
+        if self._entry_points is None:
+            # This module is slow to import.
+            # pylint: disable=import-outside-toplevel
+            from importlib.metadata import entry_points
+
+            self._entry_points = {
+                entry_point.name: entry_point
+                for entry_point in entry_points(group=self._group)
+                if entry_point.name not in self._builtins
+            }
+        return self._entry_points
+
+    @staticmethod
+    def _load(entry_point: "EntryPoint") -> type[MarkupFormatter]:
+        """
+        Raises:
+            FormatterError: the plugin could not be loaded.
+        """
+        try:
+            formatter = entry_point.load()
+        # The plugin may raise anything while it is imported.
+        except Exception as error:
+            raise FormatterError(
+                _(
+                    "Could not load the formatter {name} ({value}): {error}"
+                ).format(
+                    name=repr(entry_point.name),
+                    value=entry_point.value,
+                    error=error,
+                )
+            ) from error
+        if not (
+            isinstance(formatter, type)
+            and issubclass(formatter, MarkupFormatter)
+        ):
+            raise FormatterError(
+                _(
+                    "The formatter {name} ({value}) is not a subclass of"
+                    " MarkupFormatter."
+                ).format(name=repr(entry_point.name), value=entry_point.value)
+            )
+        return formatter
+
+
+class _ExtensionMapping(Mapping[str, Collection[str]]):
+    """The fragment suffixes of the formatters in *formatters*, by the name of
+    their markup language.
+    """
+
+    def __init__(self, formatters: Mapping[str, type[MarkupFormatter]]):
+        self._formatters = formatters
+
+    def __getitem__(self, name: str) -> Collection[str]:
+        return self._formatters[name].extensions
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._formatters
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._formatters)
+
+    def __len__(self) -> int:
+        return len(self._formatters)
+
+
+#: The formatters of all markup languages, including those of plugins.
+MARKUP_FORMATTER_MAPPING = FormatterRegistry(
+    {
+        "markdown": MarkdownFormatter,
+        "restructuredtext": ReStructuredTextFormatter,
+    }
+)
 
-MARKUP_EXTENSION_MAPPING = {
-    "markdown": {".md", ".markdown"},
-    "restructuredtext": {".rst"},
-}
+#: The fragment suffixes of all markup languages, including those of plugins.
+MARKUP_EXTENSION_MAPPING = _ExtensionMapping(MARKUP_FORMATTER_MAPPING)
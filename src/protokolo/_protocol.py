@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""The parts of the protocol between :mod:`protokolo.client` and
+:mod:`protokolo.daemon` that both need. This module only imports the standard
+library.
+"""
+
+import os
+import stat
+
+#: The environment variable that enables forwarding. Its value is the path to
+#: the socket of the daemon.
+SOCKET_ENV_VAR = "PROTOKOLO_DAEMON_SOCKET"
+
+#: The version of the protocol spoken between client and daemon.
+PROTOCOL_VERSION = 1
+
+#: Environment variables that must be identical in the client and the daemon,
+#: because they influence the result of a command.
+SIGNIFICANT_ENV_VARS = (
+    "LANGUAGE",
+    "LC_ALL",
+    "LC_MESSAGES",
+    "LANG",
+    "TZ",
+    "XDG_CACHE_HOME",
+)
+
+
+def default_socket_path() -> str:
+    """Return the default path of the daemon's socket, which is inside of
+    ``$XDG_RUNTIME_DIR``, or inside of a per-user directory in the temporary
+    directory if that variable is not set.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "protokolo", "daemon.sock")
+    # The client imports this module on every run, and tempfile is slow to
+    # import.
+    import tempfile  # pylint: disable=import-outside-toplevel
+
+    return os.path.join(
+        tempfile.gettempdir(), f"protokolo-{os.getuid()}", "daemon.sock"
+    )
+
+
+def is_private_directory(path: str) -> bool:
+    """Return whether *path* is a directory, and not a symbolic link to one,
+    that is owned by the current user and that no other user can access. Only
+    then can no other user replace the socket inside of it.
+    """
+    try:
+        result = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(result.st_mode)
+        and result.st_uid == os.getuid()
+        and not result.st_mode & 0o077
+    )
+
+
+def significant_env() -> dict[str, str | None]:
+    """Return the values of :data:`SIGNIFICANT_ENV_VARS`."""
+    return {name: os.environ.get(name) for name in SIGNIFICANT_ENV_VARS}
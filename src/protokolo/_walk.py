@@ -0,0 +1,341 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Walk a change log directory with :func:`os.scandir`, making as few metadata
+calls as possible.
+"""
+
+import asyncio
+import errno
+import os
+from collections.abc import Callable, Collection, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from os import strerror
+from typing import Any, cast
+
+import attrs
+
+from .cache import LoadCache
+from .exceptions import (
+    ProtokoloTOMLIsADirectoryError,
+    ProtokoloTOMLNotFoundError,
+)
+from .types import StrPath
+
+
+@attrs.define
+class SyscallCounter:
+    """Count the file system calls made while walking and loading a change log
+    directory.
+
+    :attr:`stat` only counts the calls that :class:`os.DirEntry` cannot answer
+    from the cached directory entry type, which are those for symbolic links.
+    """
+
+    scandir: int = 0
+    stat: int = 0
+    open: int = 0
+
+    @property
+    def metadata(self) -> int:
+        """The total amount of metadata calls (:attr:`scandir` and
+        :attr:`stat`).
+        """
+        return self.scandir + self.stat
+
+
+@attrs.define
+class DirectoryListing:
+    """The relevant contents of a section directory."""
+
+    path: str
+    protokolo_toml: str
+    fragments: list[str] = attrs.field(factory=list)
+    subdirectories: list["DirectoryListing"] = attrs.field(factory=list)
+
+    def iter_files(self, fragments: bool = True) -> Iterator[tuple[str, bool]]:
+        """Recursively yield all ``.protokolo.toml`` files and, if *fragments*
+        is :const:`True`, fragments, depth-first, in the order in which they are
+        loaded. The second item of each tuple is :const:`True` for
+        ``.protokolo.toml`` files, which are read as bytes.
+        """
+        yield self.protokolo_toml, True
+        if fragments:
+            for fragment in self.fragments:
+                yield fragment, False
+        for subdirectory in self.subdirectories:
+            yield from subdirectory.iter_files(fragments=fragments)
+
+
+@attrs.define
+class FileReader:
+    """Read the files of a :class:`DirectoryListing`. The files can be
+    prefetched concurrently with :meth:`prefetch`, after which they are served
+    from memory.
+
+    If a *cache* is given, :meth:`load_text` and :meth:`load_parsed` take their
+    values from the cache if the file has not changed, and files that are in
+    the cache are not prefetched.
+    """
+
+    counter: SyscallCounter | None = None
+    cache: LoadCache | None = None
+    _prefetched: dict[str, str | bytes | OSError] = attrs.field(
+        factory=dict, init=False
+    )
+    _stats: dict[str, os.stat_result] = attrs.field(factory=dict, init=False)
+    _cached: dict[str, Any] = attrs.field(factory=dict, init=False)
+
+    def prefetch(
+        self,
+        listing: DirectoryListing,
+        max_workers: int,
+        fragments: bool = True,
+    ) -> None:
+        """Read all files in *listing* in a pool of *max_workers* threads. If
+        *fragments* is :const:`False`, only the ``.protokolo.toml`` files are
+        read.
+
+        Errors are not raised here. Instead, they are raised when the file is
+        read with :meth:`read_text` or :meth:`read_bytes`, such that they are
+        raised in the same order as they would be without prefetching.
+        """
+        files = self._uncached(listing.iter_files(fragments=fragments))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda item: _read(*item), files)
+            for (path, _), result in zip(files, results):
+                self._prefetched[path] = result
+        if self.counter is not None:
+            self.counter.open += len(files)
+
+    async def aprefetch(
+        self,
+        listing: DirectoryListing,
+        max_concurrency: int,
+        fragments: bool = True,
+    ) -> None:
+        """Like :meth:`prefetch`, but without blocking the event loop. At most
+        *max_concurrency* files are read at the same time.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def read(path: str, binary: bool) -> str | bytes | OSError:
+            async with semaphore:
+                return await asyncio.to_thread(_read, path, binary)
+
+        files = self._uncached(listing.iter_files(fragments=fragments))
+        results = await asyncio.gather(
+            *(read(path, binary) for path, binary in files)
+        )
+        for (path, _), result in zip(files, results):
+            self._prefetched[path] = result
+        if self.counter is not None:
+            self.counter.open += len(files)
+
+    def stat(self, path: str) -> os.stat_result:
+        """Get the status of *path*.
+
+        Raises:
+            OSError: input/output error.
+        """
+        if self.counter is not None:
+            self.counter.stat += 1
+        return os.stat(path)
+
+    def load_text(self, path: str) -> str:
+        """Like :meth:`read_text`, but use the cache if possible.
+
+        Raises:
+            OSError: input/output error.
+        """
+        text = self._get_cached(path)
+        if text is None:
+            text = self.read_text(path)
+            self._put_cached(path, text)
+        return cast(str, text)
+
+    def load_parsed(self, path: str, parse: Callable[[bytes], Any]) -> Any:
+        """Read a binary file and *parse* its contents, or use the cached result
+        of *parse* if possible. Errors raised by *parse* are not cached.
+
+        Raises:
+            OSError: input/output error.
+        """
+        value = self._get_cached(path)
+        if value is None:
+            value = parse(self.read_bytes(path))
+            self._put_cached(path, value)
+        return value
+
+    def read_text(self, path: str) -> str:
+        """Read a UTF-8 text file.
+
+        Raises:
+            OSError: input/output error.
+        """
+        return cast(str, self._read(path, False))
+
+    def read_bytes(self, path: str) -> bytes:
+        """Read a binary file.
+
+        Raises:
+            OSError: input/output error.
+        """
+        return cast(bytes, self._read(path, True))
+
+    def _uncached(
+        self, files: Iterable[tuple[str, bool]]
+    ) -> list[tuple[str, bool]]:
+        return [item for item in files if self._get_cached(item[0]) is None]
+
+    def _get_cached(self, path: str) -> Any | None:
+        if self.cache is None:
+            return None
+        if path in self._cached:
+            return self._cached[path]
+        try:
+            stat = self.stat(path)
+        except OSError:
+            # The error is raised when the file is read.
+            return None
+        self._stats[path] = stat
+        value = self.cache.get(os.path.abspath(path), stat)
+        self._cached[path] = value
+        return value
+
+    def _put_cached(self, path: str, value: Any) -> None:
+        stat = self._stats.get(path)
+        if self.cache is not None and stat is not None:
+            self.cache.put(os.path.abspath(path), stat, value)
+
+    def _read(self, path: str, binary: bool) -> str | bytes:
+        result = self._prefetched.pop(path, None)
+        if result is None:
+            if self.counter is not None:
+                self.counter.open += 1
+            result = _read(path, binary)
+        if isinstance(result, OSError):
+            raise result
+        return result
+
+
+def scan_directory(
+    directory: StrPath,
+    extensions: Collection[str],
+    counter: SyscallCounter | None = None,
+) -> DirectoryListing:
+    """Recursively scan *directory* for ``.protokolo.toml`` files, fragments
+    that have a suffix in *extensions*, and subdirectories that are sections.
+
+    Every directory is scanned exactly once, and the entry types are taken from
+    the scan, such that there is at most one metadata call per entry.
+
+    Raises:
+        OSError: input/output error.
+        ProtokoloTOMLNotFoundError: ``.protokolo.toml`` doesn't exist in
+            *directory*, or *directory* is not a directory.
+        ProtokoloTOMLIsADirectoryError: ``.protokolo.toml`` in *directory* is
+            not a file.
+    """
+    if counter is None:
+        counter = SyscallCounter()
+    path = os.fspath(directory)
+    protokolo_toml = os.path.join(path, ".protokolo.toml")
+    try:
+        listing = _scan(path, extensions, counter)
+    except (FileNotFoundError, NotADirectoryError) as error:
+        # Errors in subdirectories are raised as-is.
+        if error.filename != path:
+            raise
+        raise ProtokoloTOMLNotFoundError(
+            errno.ENOENT, strerror(errno.ENOENT), protokolo_toml
+        ) from error
+    if listing is None:
+        raise ProtokoloTOMLNotFoundError(
+            errno.ENOENT, strerror(errno.ENOENT), protokolo_toml
+        )
+    if not listing.protokolo_toml:
+        raise ProtokoloTOMLIsADirectoryError(
+            errno.EISDIR, strerror(errno.EISDIR), protokolo_toml
+        )
+    return listing
+
+
+def _scan(
+    path: str, extensions: Collection[str], counter: SyscallCounter
+) -> DirectoryListing | None:
+    """Scan *path*. Return :const:`None` if there is no ``.protokolo.toml`` in
+    *path*. If ``.protokolo.toml`` is not a file, the returned listing has an
+    empty :attr:`DirectoryListing.protokolo_toml` and no contents.
+    """
+    has_toml: bool | None = None
+    fragments = []
+    directories = []
+    counter.scandir += 1
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_symlink():
+                # Following the link requires a stat call, which DirEntry
+                # caches for subsequent is_dir and is_file calls.
+                counter.stat += 1
+            if entry.name == ".protokolo.toml":
+                has_toml = entry.is_file()
+            elif entry.is_dir():
+                directories.append(entry.path)
+            elif entry.is_file() and _suffix(entry.name) in extensions:
+                fragments.append(entry.path)
+    if has_toml is None:
+        return None
+    if not has_toml:
+        return DirectoryListing(path=path, protokolo_toml="")
+
+    listing = DirectoryListing(
+        path=path,
+        protokolo_toml=os.path.join(path, ".protokolo.toml"),
+        fragments=fragments,
+    )
+    for directory in directories:
+        sublisting = _scan(directory, extensions, counter)
+        if sublisting is not None and sublisting.protokolo_toml:
+            listing.subdirectories.append(sublisting)
+    return listing
+
+
+def _read(path: str, binary: bool) -> str | bytes | OSError:
+    """Read *path*, returning instead of raising :class:`OSError`."""
+    try:
+        if binary:
+            with open(path, "rb") as fp:
+                return fp.read()
+        with open(path, encoding="utf-8") as fp_:
+            return fp_.read()
+    except OSError as error:
+        return error
+
+
+def _suffix(name: str) -> str:
+    """Like :attr:`pathlib.PurePath.suffix`, but without creating a path
+    object.
+
+    >>> _suffix("foo.tar.md")
+    '.md'
+    >>> _suffix(".md")
+    ''
+    """
+    index = name.rfind(".")
+    if 0 < index < len(name) - 1:
+        return name[index:]
+    return ""
+
+
+def _stem(path: str) -> str:
+    """Like :attr:`pathlib.PurePath.stem`, but without creating a path object.
+
+    >>> _stem("feature/foo.tar.md")
+    'foo.tar'
+    >>> _stem(".md")
+    '.md'
+    """
+    name = os.path.basename(path)
+    return name[: len(name) - len(_suffix(name))]
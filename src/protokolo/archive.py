@@ -0,0 +1,204 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Move compiled fragments into an archive instead of deleting them.
+
+Every compilation gets its own release directory in the archive, which mirrors
+the layout of the change log directory. The fragments are renamed into it, so
+the archive must be on the same file system as the change log directory, which
+can be checked with :func:`check_archive` before anything is changed. The
+release directory also contains :data:`INDEX_NAME`, a JSON file that lists the
+path, the SHA-256 hash of the compiled text, and the formatted section title of
+every fragment.
+"""
+
+import errno
+import hashlib
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+import attrs
+
+from ._formatter import MarkupFormatter
+from .compile import Section
+from .i18n import _
+from .types import StrPath
+
+#: The name of the index file in a release directory.
+INDEX_NAME = "index.json"
+
+#: The version of the index format.
+INDEX_VERSION = 1
+
+
+@attrs.define
+class ArchivedFragment:
+    """A fragment in the index of a release."""
+
+    #: The path of the fragment relative to the change log directory, with
+    #: forward slashes.
+    path: str
+    #: The SHA-256 hash of the text of the fragment, encoded as UTF-8.
+    sha256: str
+    #: The title of the section that the fragment was compiled into, with its
+    #: placeholders replaced, but without markup.
+    section: str
+
+
+def release_name(section_format_pairs: dict[str, str] | None = None) -> str:
+    """Return the name of the release directory for a compilation with
+    *section_format_pairs*. This is the ``version`` key if it is defined, and
+    today's date otherwise.
+    """
+    version = (section_format_pairs or {}).get("version")
+    if version:
+        return version.replace(os.sep, "_")
+    return date.today().isoformat()
+
+
+def check_archive(directory: StrPath, archive: StrPath) -> None:
+    """Check that fragments can be moved from the change log *directory* into
+    *archive*, which need not exist yet.
+
+    Raises:
+        OSError: *archive* is on a different file system than *directory*, or
+            the file systems could not be determined.
+    """
+    existing = os.path.abspath(archive)
+    while not os.path.exists(existing):
+        parent = os.path.dirname(existing)
+        if parent == existing:
+            break
+        existing = parent
+    if _device(existing) != _device(directory):
+        raise OSError(
+            errno.EXDEV,
+            _(
+                "The archive must be on the same file system as the change log"
+                " directory"
+            ),
+            os.fspath(archive),
+        )
+
+
+def archive_fragments(
+    section: Section,
+    directory: StrPath,
+    archive: StrPath,
+    release: str,
+    today: date | None = None,
+) -> Path:
+    """Move the source files of the fragments of *section*, which was loaded
+    from the change log *directory*, into a new release directory named
+    *release* in *archive*, and write an index. If the release directory
+    already exists, a number is appended to its name. Return the release
+    directory. ``$date`` in the section titles is replaced with *today*, or
+    today's date.
+
+    Nothing is moved if *archive* is on a different file system than
+    *directory*. If a fragment cannot be moved, the index of the fragments
+    that were moved is still written.
+
+    Raises:
+        OSError: a fragment could not be moved, for example because *archive*
+            is on a different file system than *directory*.
+        HeadingFormatError: could not format the title of a section.
+    """
+    check_archive(directory, archive)
+    release_dir = _create_release_dir(Path(archive), release)
+    entries: list[ArchivedFragment] = []
+    try:
+        _move_fragments(
+            section, directory, release_dir, entries, today or date.today()
+        )
+    finally:
+        _write_index(release_dir, release, entries)
+    return release_dir
+
+
+def read_index(release_dir: StrPath) -> list[ArchivedFragment]:
+    """Read the index of the release directory *release_dir*.
+
+    Raises:
+        OSError: the index could not be read.
+        ValueError: the index is invalid.
+    """
+    with open(Path(release_dir) / INDEX_NAME, "rb") as fp:
+        values = json.load(fp)
+    try:
+        return [ArchivedFragment(**entry) for entry in values["fragments"]]
+    except (KeyError, TypeError) as error:
+        raise ValueError(str(error)) from error
+
+
+def _move_fragments(
+    section: Section,
+    directory: StrPath,
+    release_dir: Path,
+    entries: list[ArchivedFragment],
+    today: date,
+) -> None:
+    """Move the fragments of *section* into *release_dir*, and append them to
+    *entries* as they are moved. The fragments are hashed by the text that
+    *section* holds, rather than by reading them again.
+
+    Raises:
+        OSError: a fragment could not be moved.
+        HeadingFormatError: could not format the title of a section.
+    """
+    sections = [section]
+    while sections:
+        current = sections.pop()
+        title: str | None = None
+        for fragment in current.sorted_fragments():
+            if fragment.source is None:
+                continue
+            if title is None:
+                title = MarkupFormatter.format_title(current.attrs, today)
+            source = os.fspath(fragment.source)
+            relative = os.path.relpath(source, directory)
+            target = release_dir / relative
+            digest = hashlib.sha256(fragment.text.encode("utf-8")).hexdigest()
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(source, target)
+            entries.append(
+                ArchivedFragment(
+                    path=Path(relative).as_posix(),
+                    sha256=digest,
+                    section=title,
+                )
+            )
+        sections.extend(reversed(list(current.sorted_subsections())))
+
+
+def _device(path: StrPath) -> int:
+    return os.stat(path).st_dev
+
+
+def _create_release_dir(archive: Path, release: str) -> Path:
+    archive.mkdir(parents=True, exist_ok=True)
+    name = release
+    number = 1
+    while True:
+        try:
+            (archive / name).mkdir()
+            return archive / name
+        except FileExistsError:
+            number += 1
+            name = f"{release}-{number}"
+
+
+def _write_index(
+    release_dir: Path, release: str, entries: list[ArchivedFragment]
+) -> None:
+    values = {
+        "version": INDEX_VERSION,
+        "release": release,
+        "fragments": [attrs.asdict(entry) for entry in entries],
+    }
+    with open(release_dir / INDEX_NAME, "w", encoding="utf-8") as fp:
+        json.dump(values, fp, separators=(",", ":"))
+        fp.write("\n")
@@ -0,0 +1,276 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Compile many change log directories at once, for example all packages in a
+monorepo, in a pool of processes.
+"""
+
+import os
+import time
+import tomllib
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from itertools import chain, repeat
+from pathlib import Path
+from typing import IO, Self, cast
+
+import attrs
+
+from ._formatter import MARKUP_FORMATTER_MAPPING as _MARKUP_FORMATTER_MAPPING
+from .compile import Section, delete_fragments
+from .config import GlobalConfig
+from .exceptions import DictTypeError, ManifestError, ProtokoloError
+from .i18n import _
+from .replace import atomic_write, find_section_tag, iter_insert_at_offset
+from .types import StrPath, SupportedMarkup
+
+#: The errors that are reported as the result of a package, rather than
+#: stopping the batch. :class:`UnicodeDecodeError` is raised by fragments that
+#: are not valid UTF-8.
+COMPILE_ERRORS = (
+    ProtokoloError,
+    tomllib.TOMLDecodeError,
+    OSError,
+    UnicodeDecodeError,
+)
+
+
+class PackageStatus(Enum):
+    """The outcome of compiling a :class:`Package`."""
+
+    COMPILED = "compiled"
+    EMPTY = "empty"
+    ERROR = "error"
+
+
+@attrs.define(frozen=True)
+class Package:
+    """A change log file and the change log directory that is compiled into
+    it.
+    """
+
+    changelog: Path = attrs.field(converter=Path)
+    directory: Path = attrs.field(converter=Path)
+    markup: SupportedMarkup = "markdown"
+    name: str = attrs.field()
+
+    @name.default
+    def _name_default(self) -> str:
+        return str(self.directory)
+
+    @classmethod
+    def from_config(
+        cls, config: GlobalConfig, base: StrPath, name: str | None = None
+    ) -> Self:
+        """Create a :class:`Package` from *config*, with paths relative to
+        *base*.
+
+        Raises:
+            ManifestError: *config* has no changelog or directory, or an
+                unsupported markup.
+        """
+        for key in ("changelog", "directory"):
+            if config[key] is None:
+                raise ManifestError(
+                    _("{source}: '{key}' is not defined.").format(
+                        source=config.source, key=key
+                    )
+                )
+        markup = config.markup or "markdown"
+        if markup not in _MARKUP_FORMATTER_MAPPING:
+            raise ManifestError(
+                _("{source}: '{markup}' is not a supported markup.").format(
+                    source=config.source, markup=markup
+                )
+            )
+        base = Path(base)
+        directory = base / cast(str, config.directory)
+        return cls(
+            changelog=base / cast(str, config.changelog),
+            directory=directory,
+            markup=markup,
+            name=name if name is not None else str(directory),
+        )
+
+
+@attrs.define(frozen=True)
+class PackageResult:
+    """The outcome of compiling a :class:`Package`."""
+
+    name: str
+    status: PackageStatus
+    message: str = ""
+    fragments: int = 0
+    seconds: float = 0.0
+
+
+def load_manifest(path: StrPath) -> list[Package]:
+    """Load the packages listed in the manifest at *path*. The manifest is a
+    TOML file with a ``[[package]]`` table for each package, containing the
+    keys ``changelog``, ``directory``, and optionally ``markup`` and ``name``.
+    Paths are relative to the directory of the manifest.
+
+    Raises:
+        OSError: the manifest could not be read.
+        tomllib.TOMLDecodeError: the manifest could not be parsed.
+        DictTypeError: a value in the manifest has the wrong type.
+        ManifestError: a package is incomplete.
+    """
+    path = Path(path)
+    with path.open("rb") as fp:
+        try:
+            values = tomllib.load(fp)
+        except tomllib.TOMLDecodeError as error:
+            raise tomllib.TOMLDecodeError(
+                _("Invalid TOML in {file_name}: {error}").format(
+                    file_name=repr(str(path)), error=error
+                )
+            ) from error
+    entries = values.get("package", [])
+    if not isinstance(entries, list):
+        raise DictTypeError("package", list, entries, str(path))
+    packages = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise DictTypeError("package", dict, entry, str(path))
+        entry = dict(entry)
+        name = entry.pop("name", None)
+        if name is not None and not isinstance(name, str):
+            raise DictTypeError("name", str, name, str(path))
+        config = GlobalConfig.from_dict(entry, source=path)
+        packages.append(Package.from_config(config, path.parent, name=name))
+    return packages
+
+
+def discover_packages(
+    root: StrPath,
+) -> tuple[list[Package], list[PackageResult]]:
+    """Find all global ``.protokolo.toml`` files under *root*, and return the
+    packages they define. Hidden directories are skipped, and so are
+    ``.protokolo.toml`` files that do not define both a change log file and
+    directory, such as section configurations.
+
+    Configuration files that cannot be loaded are returned as failed results,
+    such that one broken package does not prevent the others from being
+    compiled.
+    """
+    packages = []
+    failures = []
+    for dirpath, dirnames, filenames in os.walk(os.fspath(root)):
+        dirnames[:] = sorted(name for name in dirnames if name[0] != ".")
+        if ".protokolo.toml" not in filenames:
+            continue
+        config_path = Path(dirpath) / ".protokolo.toml"
+        try:
+            config = GlobalConfig.from_file(config_path)
+            if config.changelog is None and config.directory is None:
+                continue
+            packages.append(Package.from_config(config, dirpath))
+        except COMPILE_ERRORS as error:
+            failures.append(
+                PackageResult(
+                    name=str(config_path),
+                    status=PackageStatus.ERROR,
+                    message=str(error),
+                )
+            )
+    return packages, failures
+
+
+def compile_package(
+    package: Package,
+    section_format_pairs: dict[str, str] | None = None,
+    dry_run: bool = False,
+) -> PackageResult:
+    """Compile *package* the way ``protokolo compile`` does, and return the
+    result. Errors are not raised, but returned as a failed result. If
+    *dry_run* is :const:`True`, the section is compiled, but nothing is
+    written or deleted.
+    """
+    start = time.perf_counter()
+    try:
+        section = Section.from_directory(
+            package.directory,
+            markup=package.markup,
+            section_format_pairs=section_format_pairs,
+        )
+        fragments = section.fragment_count()
+        if not fragments:
+            status = PackageStatus.EMPTY
+        else:
+            _compile_into(section, package.changelog, dry_run)
+            status = PackageStatus.COMPILED
+    except COMPILE_ERRORS as error:
+        return PackageResult(
+            name=package.name,
+            status=PackageStatus.ERROR,
+            message=str(error),
+            seconds=time.perf_counter() - start,
+        )
+    return PackageResult(
+        name=package.name,
+        status=status,
+        fragments=fragments,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def compile_packages(
+    packages: Sequence[Package],
+    section_format_pairs: dict[str, str] | None = None,
+    dry_run: bool = False,
+    max_workers: int | None = None,
+) -> Iterator[PackageResult]:
+    """Compile all *packages* in a pool of *max_workers* processes, which
+    defaults to the amount of CPUs, and yield their results in the same order
+    as *packages*. If *max_workers* is 1, the packages are compiled in this
+    process.
+    """
+    if max_workers == 1 or len(packages) <= 1:
+        for package in packages:
+            yield compile_package(package, section_format_pairs, dry_run)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(
+            compile_package,
+            packages,
+            repeat(section_format_pairs),
+            repeat(dry_run),
+        )
+
+
+def _compile_into(section: Section, changelog: Path, dry_run: bool) -> None:
+    """Insert the compiled *section* into *changelog*, and delete the
+    fragments of *section*. If *dry_run* is :const:`True`, only compile.
+
+    Raises:
+        OSError: input/output error.
+        HeadingFormatError: could not format a heading.
+        SectionTagNotFoundError: *changelog* contains no section tag.
+    """
+    new_section = section.iter_compile()
+    if dry_run:
+        with changelog.open("rb") as fp:
+            for _chunk in _insert_section(new_section, changelog, fp):
+                pass
+        return
+    # The changelog is closed before it is replaced.
+    with atomic_write(str(changelog)) as out:
+        with changelog.open("rb") as fp:
+            out.writelines(_insert_section(new_section, changelog, fp))
+    delete_fragments(section)
+
+
+def _insert_section(
+    new_section: Iterable[str], changelog: Path, fp: IO[bytes]
+) -> Iterator[bytes]:
+    """Insert *new_section* into *changelog*, which is opened as *fp*.
+
+    Raises:
+        OSError: input/output error.
+        SectionTagNotFoundError: *changelog* contains no section tag.
+    """
+    offset = find_section_tag(fp, str(changelog))
+    return iter_insert_at_offset(chain(["\n"], new_section), fp, offset)
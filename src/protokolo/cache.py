@@ -0,0 +1,184 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""A persistent cache of parsed ``.protokolo.toml`` files and fragment texts,
+such that unchanged files need not be read and parsed again.
+"""
+
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Self
+
+import attrs
+
+from .types import StrPath
+
+#: The version of the cache file format. Cache files of other versions are
+#: ignored.
+CACHE_VERSION = 1
+
+#: The name of the cache file inside of the cache directory.
+CACHE_FILE_NAME = "load-cache.pickle"
+
+#: The key of a cache entry: the inode, size, and modification time in
+#: nanoseconds of a file.
+StatKey = tuple[int, int, int]
+
+
+def default_cache_dir() -> Path:
+    """Return the default cache directory, which is ``protokolo`` inside of
+    ``$XDG_CACHE_HOME``, or inside of ``~/.cache`` if that variable is not set.
+    """
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if xdg_cache_home:
+        return Path(xdg_cache_home) / "protokolo"
+    return Path.home() / ".cache" / "protokolo"
+
+
+def stat_key(stat: os.stat_result) -> StatKey:
+    """Create a cache key from the result of :func:`os.stat`."""
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+@attrs.define
+class CacheStats:
+    """Instrumentation of the lookups in a :class:`LoadCache`."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        """The total amount of lookups."""
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that were hits, or 0 if there were no
+        lookups.
+        """
+        if not self.lookups:
+            return 0.0
+        return self.hits / self.lookups
+
+
+@attrs.define
+class LoadCache:
+    """A cache of values that are derived from files, keyed by the path of the
+    file and by its inode, size, and modification time. If any of those change,
+    the entry is no longer valid.
+
+    If *path* is :const:`None`, the cache only lives in memory. Otherwise, it
+    can be written to and loaded from *path*. At most *max_entries* entries are
+    kept; the least recently used entries are evicted first.
+
+    Files that were modified less than *racy_window_ns* nanoseconds ago are not
+    cached, because they might be modified again without their modification
+    time changing.
+    """
+
+    path: Path | None = attrs.field(
+        default=None, converter=attrs.converters.optional(Path)
+    )
+    max_entries: int = 50_000
+    racy_window_ns: int = 1_000_000_000
+    stats: CacheStats = attrs.field(factory=CacheStats, init=False)
+    _entries: OrderedDict[str, tuple[StatKey, Any]] = attrs.field(
+        factory=OrderedDict, init=False, repr=False
+    )
+
+    @classmethod
+    def from_directory(
+        cls, directory: StrPath | None = None, max_entries: int = 50_000
+    ) -> Self:
+        """Load the cache from the cache file in *directory*, which defaults to
+        :func:`default_cache_dir`. If the cache file does not exist, or if it
+        cannot be read, the cache is empty.
+        """
+        if directory is None:
+            directory = default_cache_dir()
+        cache = cls(
+            path=Path(directory) / CACHE_FILE_NAME, max_entries=max_entries
+        )
+        cache.load()
+        return cache
+
+    def load(self) -> None:
+        """Replace the entries of the cache with the contents of the cache file.
+        If the file does not exist or cannot be read, the cache is empty.
+        """
+        self._entries = OrderedDict()
+        if self.path is None:
+            return
+        try:
+            with self.path.open("rb") as fp:
+                contents = pickle.load(fp)
+        # The file can be missing, corrupt, or written by another version.
+        except Exception:  # pylint: disable=broad-exception-caught
+            return
+        if (
+            isinstance(contents, dict)
+            and contents.get("version") == CACHE_VERSION
+            and isinstance(contents.get("entries"), OrderedDict)
+        ):
+            self._entries = contents["entries"]
+
+    def save(self) -> None:
+        """Write the cache to its file. The file is replaced atomically. This
+        does nothing if :attr:`path` is :const:`None`.
+
+        Raises:
+            OSError: the file could not be written.
+        """
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=self.path.parent, delete=False
+        ) as fp:
+            try:
+                pickle.dump(
+                    {"version": CACHE_VERSION, "entries": self._entries}, fp
+                )
+            except BaseException:
+                os.unlink(fp.name)
+                raise
+        os.replace(fp.name, self.path)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache, and delete its file."""
+        self._entries.clear()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    def get(self, path: str, stat: os.stat_result) -> Any | None:
+        """Return the cached value of *path*, or :const:`None` if there is no
+        value, or if the value was cached for a different version of the file.
+        """
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != stat_key(stat):
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self._entries.move_to_end(path)
+        return entry[1]
+
+    def put(self, path: str, stat: os.stat_result, value: Any) -> None:
+        """Cache *value* for the version of *path* described by *stat*. If
+        there are more than :attr:`max_entries` entries, the least recently used
+        entries are evicted.
+        """
+        if time.time_ns() - stat.st_mtime_ns < self.racy_window_ns:
+            return
+        self._entries[path] = (stat_key(stat), value)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
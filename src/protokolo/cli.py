@@ -10,58 +10,194 @@ module that you can't learn from typing ``protokolo --help``.
 
 import gettext
 import os
-import tomllib
-from io import TextIOWrapper
+from collections.abc import Collection, Iterable, Iterator
+from functools import cache
+from itertools import chain
 from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
 
 import click
 from click.formatting import wrap_text
 
-from ._formatter import MARKUP_EXTENSION_MAPPING as _MARKUP_EXTENSION_MAPPING
-from .compile import Section
-from .config import GlobalConfig
+from . import __version__
 from .exceptions import (
     AttributeNotPositiveError,
     DictTypeError,
+    FormatterError,
     HeadingFormatError,
+    JournalError,
+    ManifestError,
     ProtokoloTOMLIsADirectoryError,
     ProtokoloTOMLNotFoundError,
+    SectionTagNotFoundError,
 )
-from .i18n import _
-from .initialise import (
-    create_changelog,
-    create_keep_a_changelog,
-    create_root_toml,
-)
-from .replace import find_first_occurrence, insert_into_str
-from .types import SupportedMarkup
+from .i18n import N_, _
+from .types import ExportFormat, SupportedMarkup
+
+if TYPE_CHECKING:
+    from click.shell_completion import CompletionItem
+
+    from .batch import PackageResult
+    from .cache import LoadCache
+    from .compile import Section
+    from .config import GlobalConfig
 
-# pylint: disable=missing-function-docstring
+# pylint: disable=missing-function-docstring,too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# The modules that do the actual work are imported by the commands that need
+# them, such that starting the program, and --help and --version in particular,
+# stays fast.
+# pylint: disable=import-outside-toplevel,too-many-locals,too-many-lines
+
+#: The amount of characters that are collected before echoing to STDOUT.
+_ECHO_BATCH_SIZE = 64 * 1024
 
 _PACKAGE_PATH = os.path.dirname(__file__)
 _LOCALE_DIR = os.path.join(_PACKAGE_PATH, "locale")
-if gettext.find("protokolo", localedir=_LOCALE_DIR):
-    gettext.bindtextdomain("protokolo", _LOCALE_DIR)
-    # This is needed to make Click recognise our translations. Our own
-    # translations use the class-based API.
-    gettext.textdomain("protokolo")
+
+
+@cache
+def _bind_click_translations() -> None:
+    """Make Click recognise our translations. Our own translations use the
+    class-based API of :mod:`.i18n`. This is done when the program is run
+    rather than when this module is imported.
+    """
+    if gettext.find("protokolo", localedir=_LOCALE_DIR):
+        gettext.bindtextdomain("protokolo", _LOCALE_DIR)
+        gettext.textdomain("protokolo")
+
+
+def _translate(text: str) -> str:
+    """Translate *text*, whose paragraphs were marked for translation with
+    :func:`.i18n.N_` one by one.
+    """
+    return "\n\n".join(
+        _(paragraph) if paragraph else paragraph
+        for paragraph in text.split("\n\n")
+    )
+
+
+class _Command(click.Command):
+    """A command whose help texts, and those of its options, are marked for
+    translation with :func:`.i18n.N_`, and translated when help is shown, such
+    that importing this module does not load the translations.
+    """
+
+    _help_translated = False
+
+    def get_short_help_str(self, limit: int = 45) -> str:
+        self._translate_help()
+        return super().get_short_help_str(limit)
+
+    def format_help(
+        self, ctx: click.Context, formatter: click.HelpFormatter
+    ) -> None:
+        self._translate_help()
+        super().format_help(ctx, formatter)
+
+    def _translate_help(self) -> None:
+        if self._help_translated:
+            return
+        self._help_translated = True
+        if self.help:
+            self.help = _translate(self.help)
+        for param in self.params:
+            if not isinstance(param, click.Option):
+                continue
+            if param.help:
+                param.help = _translate(param.help)
+            if isinstance(param.show_default, str):
+                param.show_default = _(param.show_default)
+
+
+class _MainGroup(_Command, click.Group):
+    """The group of all commands, which sets up the translations of Click
+    before it runs.
+    """
+
+    command_class = _Command
+
+    def main(self, *args: Any, **kwargs: Any) -> Any:
+        _bind_click_translations()
+        return super().main(*args, **kwargs)
+
+
+class _MarkupChoice(click.ParamType):
+    """Like :class:`click.Choice` for the markup languages in
+    :data:`._formatter.MARKUP_FORMATTER_MAPPING` and *extra*. The formatter of
+    the chosen markup language is loaded, but plugins are only discovered if the
+    markup language is not built in, or if the choices are listed for
+    ``--help`` or shell completion.
+    """
+
+    name = "markup"
+
+    def __init__(self, extra: Iterable[str] = ()):
+        self.extra = tuple(extra)
+
+    def choices(self) -> list[str]:
+        """Return the names of all built-in and registered markup languages,
+        and *extra*.
+        """
+        from ._formatter import MARKUP_FORMATTER_MAPPING
+
+        return list(dict.fromkeys(chain(MARKUP_FORMATTER_MAPPING, self.extra)))
+
+    def get_metavar(self, param: click.Parameter, ctx: click.Context) -> str:
+        return f"[{'|'.join(self.choices())}]"
+
+    def shell_complete(
+        self, ctx: click.Context, param: click.Parameter, incomplete: str
+    ) -> list["CompletionItem"]:
+        from click.shell_completion import CompletionItem
+
+        return [
+            CompletionItem(choice)
+            for choice in self.choices()
+            if choice.startswith(incomplete)
+        ]
+
+    def convert(
+        self,
+        value: Any,
+        param: click.Parameter | None,
+        ctx: click.Context | None,
+    ) -> Any:
+        from ._formatter import MARKUP_FORMATTER_MAPPING
+
+        if value in self.extra:
+            return value
+        try:
+            MARKUP_FORMATTER_MAPPING[value]
+        except KeyError:
+            choices = ", ".join(map(repr, self.choices()))
+            self.fail(
+                _("{value} is not one of {choices}.").format(
+                    value=repr(value), choices=choices
+                ),
+                param,
+                ctx,
+            )
+        except FormatterError as error:
+            self.fail(str(error), param, ctx)
+        return value
 
 
 _VERSION_TEXT = (
-    _("%(prog)s, version %(version)s")
+    N_("%(prog)s, version %(version)s")
     + "\n\n"
-    + _(
+    + N_(
         "This program is free software licensed under the European Union Public"
         " Licence, version 1.2 or later."
     )
     + "\n\n"
-    + _("Written by Carmen Bianca BAKKER.")
+    + N_("Written by Carmen Bianca BAKKER.")
 )
 
 _MAIN_HELP = (
-    _("Protokolo is a change log generator.")
+    N_("Protokolo is a change log generator.")
     + "\n\n"
-    + _(
+    + N_(
         "Protokolo allows you to maintain your change log fragments in"
         " separate files, and then finally aggregate them into a new section in"
         " CHANGELOG just before release."
@@ -69,10 +205,47 @@ _MAIN_HELP = (
 )
 
 
-@click.group(name="protokolo", help=_MAIN_HELP)
-@click.version_option(
-    package_name="protokolo",
-    message=wrap_text(_VERSION_TEXT, preserve_paragraphs=True),
+#: The options of each subcommand whose defaults are taken from the global
+#: config, by subcommand. The options are named like the keys of the config.
+_CONFIG_OPTIONS = {
+    "compile": ("changelog", "markup", "directory"),
+    "init": ("changelog", "markup", "directory"),
+    "render": ("markup", "directory"),
+    "watch": ("changelog", "markup", "directory"),
+}
+
+
+def _default_map(config: "GlobalConfig") -> dict[str, dict[str, Any]]:
+    """Return the defaults of the options in :data:`_CONFIG_OPTIONS` from
+    *config*, for :attr:`click.Context.default_map`.
+    """
+    return {
+        command: {option: config[option] for option in options}
+        for command, options in _CONFIG_OPTIONS.items()
+    }
+
+
+def _echo_version(
+    ctx: click.Context, _param: click.Parameter, value: bool
+) -> None:
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo(
+        wrap_text(_translate(_VERSION_TEXT), preserve_paragraphs=True)
+        % {"prog": ctx.find_root().info_name, "version": __version__}
+    )
+    ctx.exit()
+
+
+@click.group(name="protokolo", cls=_MainGroup, help=_MAIN_HELP)
+@click.option(
+    "--version",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=_echo_version,
+    # The same message as that of click.version_option.
+    help=N_("Show the version and exit."),
 )
 @click.pass_context
 def main(ctx: click.Context) -> None:
@@ -81,29 +254,25 @@ def main(ctx: click.Context) -> None:
         ctx.default_map = {}
 
     # Only load the global config if the subcommand needs it.
-    if ctx.invoked_subcommand in ["compile", "init"]:
+    if ctx.invoked_subcommand in _CONFIG_OPTIONS:
+        import tomllib
+
+        from .config import GlobalConfig
+
         cwd = Path.cwd()
         config_path = GlobalConfig.find_config(Path.cwd())
         if config_path:
             config_path = config_path.relative_to(cwd)
             try:
-                config = GlobalConfig.from_file(config_path)
+                config = _load_global_config(
+                    config_path, ctx.obj.get("load_cache")
+                )
             except (tomllib.TOMLDecodeError, DictTypeError, OSError) as error:
                 raise click.UsageError(str(error)) from error
-            # TODO: reuse this repetition maybe?
-            ctx.default_map["compile"] = {
-                "changelog": config.changelog,
-                "markup": config.markup,
-                "directory": config.directory,
-            }
-            ctx.default_map["init"] = {
-                "changelog": config.changelog,
-                "markup": config.markup,
-                "directory": config.directory,
-            }
-
-
-_COMPILE_HELP = _(
+            ctx.default_map.update(_default_map(config))
+
+
+_COMPILE_HELP = N_(
     "Aggregate all change log fragments into a change log file. The"
     " fragments are gathered from a change log directory, and subsequently"
     " deleted."
@@ -114,15 +283,15 @@ _COMPILE_HELP = _(
 @click.option(
     "--changelog",
     "-c",
-    show_default=_("determined by config"),
+    show_default=N_("determined by config"),
     type=click.File("r+", encoding="utf-8", lazy=True),
     required=True,
-    help=_("File into which to compile."),
+    help=N_("File into which to compile."),
 )
 @click.option(
     "--directory",
     "-d",
-    show_default=_("determined by config"),
+    show_default=N_("determined by config"),
     type=click.Path(
         exists=True,
         file_okay=False,
@@ -131,16 +300,16 @@ _COMPILE_HELP = _(
         path_type=Path,
     ),
     required=True,
-    help=_("Change log directory to compile."),
+    help=N_("Change log directory to compile."),
 )
 @click.option(
     "--markup",
     "-m",
     default="markdown",
     # TRANSLATORS: do not translate markdown.
-    show_default=_("determined by config, or markdown"),
-    type=click.Choice(SupportedMarkup.__args__),  # type: ignore
-    help=_("Markup language."),
+    show_default=N_("determined by config, or markdown"),
+    type=_MarkupChoice(),
+    help=N_("Markup language."),
 )
 @click.option(
     "--format",
@@ -150,14 +319,65 @@ _COMPILE_HELP = _(
     metavar="<KEY VALUE>...",
     multiple=True,
     # TRANSLATORS: string-format is a verb.
-    help=_("Use key-value pairs to string-format section headings."),
+    help=N_("Use key-value pairs to string-format section headings."),
 )
 @click.option(
     "--dry-run",
     "-n",
     is_flag=True,
     # TRANSLATORS: do not translate STDOUT.
-    help=_("Do not write to file system; print result to STDOUT."),
+    help=N_("Do not write to file system; print result to STDOUT."),
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help=N_(
+        "Amount of threads used to read the change log directory and delete"
+        " the fragments."
+    ),
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    help=N_("Cache the contents of the change log directory between runs."),
+)
+@click.option(
+    "--clear-cache",
+    is_flag=True,
+    help=N_("Delete the cache before reading the change log directory."),
+)
+@click.option(
+    "--cache-stats",
+    is_flag=True,
+    # TRANSLATORS: do not translate STDERR.
+    help=N_("Print the hit rate of the cache to STDERR."),
+)
+@click.option(
+    "--deletion-stats",
+    is_flag=True,
+    # TRANSLATORS: do not translate STDERR.
+    help=N_(
+        "Print the amount of deleted fragments and the time it took to STDERR."
+    ),
+)
+@click.option(
+    "--transactional",
+    is_flag=True,
+    help=N_(
+        "Journal all changes, such that an interrupted run is completed or"
+        " rolled back by the next run."
+    ),
+)
+@click.option(
+    "--archive",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    help=N_(
+        "Move the compiled fragments into a release directory in this"
+        " directory instead of deleting them."
+    ),
 )
 def compile_(
     changelog: click.File,
@@ -165,73 +385,91 @@ def compile_(
     markup: SupportedMarkup,
     format_: tuple[tuple[str, str], ...],
     dry_run: bool,
+    jobs: int,
+    cache: bool,
+    clear_cache: bool,
+    cache_stats: bool,
+    deletion_stats: bool,
+    transactional: bool,
+    archive: Path | None,
 ) -> None:
-    format_pairs: dict[str, str] = dict(format_)
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    import codecs
+    from datetime import date
 
-    # Create Section
-    try:
-        section = Section.from_directory(
-            directory, markup=markup, section_format_pairs=format_pairs
+    from .archive import archive_fragments, release_name
+    from .journal import compile_transactionally
+    from .replace import atomic_write
+
+    if transactional and archive is not None:
+        raise click.UsageError(
+            # TRANSLATORS: do not translate --transactional or --archive.
+            _("--transactional cannot be used with --archive.")
         )
-    except (
-        ProtokoloTOMLNotFoundError,
-        ProtokoloTOMLIsADirectoryError,
-        tomllib.TOMLDecodeError,
-        DictTypeError,
-        AttributeNotPositiveError,
-        OSError,
-    ) as error:
-        raise click.UsageError(str(error)) from error
+    if not dry_run:
+        _recover(changelog.name)
+        _check_archive(directory, archive)
+    section = _load_section(
+        directory,
+        markup=markup,
+        section_format_pairs=dict(format_),
+        max_workers=jobs,
+        cache=cache,
+        clear_cache=clear_cache,
+        cache_stats=cache_stats,
+    )
 
     # Compile Section
+    if section.is_empty():
+        click.echo(_("There are no change log fragments to compile."))
+        return
     try:
-        new_section = section.compile()
+        # The archive agrees with the change log on the date.
+        today = date.today()
+        new_section = section.iter_compile(today=today)
     except HeadingFormatError as error:
         raise click.UsageError(str(error)) from error
 
-    if not new_section:
-        click.echo(_("There are no change log fragments to compile."))
-        return
-
     # Write to CHANGELOG
+    new_contents = _iter_new_changelog(changelog.name, new_section)
     try:
-        fp: TextIOWrapper
-        with changelog.open() as fp:  # type: ignore
-            # TODO: use buffer reading, probably
-            contents = fp.read()
-            # TODO: magic variable
-            lineno = find_first_occurrence("protokolo-section-tag", contents)
-            if lineno is None:
-                raise click.UsageError(
-                    # TRANSLATORS: do not translate protokolo-section-tag.
-                    _("There is no 'protokolo-section-tag' in {path}.").format(
-                        path=repr(changelog.name)
-                    )
-                )
-            new_contents = insert_into_str(f"\n{new_section}", contents, lineno)
-            if dry_run:
-                click.echo(new_contents, nl=False)
-            else:
-                fp.seek(0)
-                fp.write(new_contents)
-                fp.truncate()
-    except OSError as error:
+        if dry_run:
+            _echo_chunks(codecs.iterdecode(new_contents, "utf-8"))
+        elif transactional:
+            compile_transactionally(section, changelog.name, new_contents)
+        else:
+            with atomic_write(changelog.name) as out:
+                out.writelines(new_contents)
+    except (OSError, JournalError) as error:
         raise click.UsageError(str(error)) from error
 
-    # Delete change log fragments
-    if not dry_run:
-        _delete_fragments(section)
+    # Delete or archive change log fragments
+    if dry_run or transactional:
+        return
+    if archive is not None:
+        try:
+            archive_fragments(
+                section,
+                directory,
+                archive,
+                release_name(dict(format_)),
+                today=today,
+            )
+        except OSError as error:
+            raise click.UsageError(str(error)) from error
+    else:
+        _delete_fragments(section, jobs, deletion_stats)
 
 
 _INIT_HELP = (
-    _(
+    N_(
         "Set up your project to be ready to use Protokolo. It creates a change"
         " log file, a change log directory with subsections that match the Keep"
         " a Changelog recommendations, and a root .protokolo.toml file with"
         " defaults for subsequent Protokolo commands."
     )
     + "\n\n"
-    + _(
+    + N_(
         "Files that already exist are never overwritten, except the root"
         " .protokolo.toml file, which is always (re-)generated."
     )
@@ -244,38 +482,44 @@ _INIT_HELP = (
     "-c",
     default="CHANGELOG.md",
     # TRANSLATORS: do not translate CHANGELOG.md.
-    show_default=_("determined by config, or CHANGELOG.md"),
+    show_default=N_("determined by config, or CHANGELOG.md"),
     type=click.File("w", encoding="utf-8", lazy=True),
-    help=_("Change log file to create."),
+    help=N_("Change log file to create."),
 )
 @click.option(
     "--directory",
     "-d",
     default="changelog.d",
     # TRANSLATORS: do not translate changelog.d.
-    show_default=_("determined by config, or changelog.d"),
+    show_default=N_("determined by config, or changelog.d"),
     type=click.Path(
         file_okay=False,
         dir_okay=True,
         readable=True,
         path_type=Path,
     ),
-    help=_("Change log directory to create."),
+    help=N_("Change log directory to create."),
 )
 @click.option(
     "--markup",
     "-m",
     default="markdown",
     # TRANSLATORS: do not translate markdown.
-    show_default=_("determined by config, or markdown"),
-    type=click.Choice(SupportedMarkup.__args__),  # type: ignore
-    help=_("Markup language."),
+    show_default=N_("determined by config, or markdown"),
+    type=_MarkupChoice(),
+    help=N_("Markup language."),
 )
 def init(
     changelog: click.File,
     directory: Path,
     markup: SupportedMarkup,
 ) -> None:
+    from .initialise import (
+        create_changelog,
+        create_keep_a_changelog,
+        create_root_toml,
+    )
+
     try:
         create_changelog(changelog.name, markup)
         create_keep_a_changelog(directory)
@@ -284,10 +528,671 @@ def init(
         raise click.UsageError(str(error)) from error
 
 
-def _delete_fragments(section: Section) -> None:
-    """Delete :class:`.compile.Fragment`s' source files recursively."""
-    for fragment in section.fragments:
-        if fragment.source:
-            Path(fragment.source).unlink(missing_ok=True)
-    for subsection in section.subsections:
-        _delete_fragments(subsection)
+_WATCH_HELP = (
+    N_(
+        "Watch a change log directory, and print a preview of the change log"
+        " file with the compiled fragments every time the directory changes."
+        " Only the changed fragments and subsections are loaded again."
+    )
+    + "\n\n"
+    + N_(
+        "Nothing is written to the change log file, and no fragments are"
+        " deleted."
+    )
+)
+
+
+@main.command(name="watch", help=_WATCH_HELP)
+@click.option(
+    "--changelog",
+    "-c",
+    show_default=N_("determined by config"),
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        path_type=Path,
+    ),
+    required=True,
+    help=N_("File into which the fragments would be compiled."),
+)
+@click.option(
+    "--directory",
+    "-d",
+    show_default=N_("determined by config"),
+    type=click.Path(
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        readable=True,
+        path_type=Path,
+    ),
+    required=True,
+    help=N_("Change log directory to watch."),
+)
+@click.option(
+    "--markup",
+    "-m",
+    default="markdown",
+    # TRANSLATORS: do not translate markdown.
+    show_default=N_("determined by config, or markdown"),
+    type=_MarkupChoice(),
+    help=N_("Markup language."),
+)
+@click.option(
+    "--format",
+    "-f",
+    "format_",
+    type=(str, str),
+    metavar="<KEY VALUE>...",
+    multiple=True,
+    # TRANSLATORS: string-format is a verb.
+    help=N_("Use key-value pairs to string-format section headings."),
+)
+@click.option(
+    "--output",
+    "-o",
+    default="-",
+    # TRANSLATORS: do not translate STDOUT.
+    show_default=N_("STDOUT"),
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    help=N_("File to which the preview is written."),
+)
+@click.option(
+    "--debounce",
+    default=0.2,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help=N_("Seconds without changes to wait before rendering."),
+)
+def watch(
+    changelog: Path,
+    directory: Path,
+    markup: SupportedMarkup,
+    format_: tuple[tuple[str, str], ...],
+    output: str,
+    debounce: float,
+) -> None:
+    from .replace import write_atomically
+    from .watch import LOAD_ERRORS, LiveSection, create_watcher
+    from .watch import watch as run_watch
+
+    try:
+        live = LiveSection(
+            directory,
+            markup=markup,
+            section_format_pairs=dict(format_),
+        )
+    except LOAD_ERRORS as error:
+        raise click.UsageError(str(error)) from error
+
+    def render(section: "Section") -> None:
+        try:
+            chunks = _preview_changelog(section, changelog)
+            if output == "-":
+                _echo_chunks(chunks)
+            else:
+                write_atomically(output, chunks)
+        except click.UsageError as error:
+            click.echo(error.format_message(), err=True)
+        except OSError as error:
+            click.echo(str(error), err=True)
+
+    def on_error(error: Exception) -> None:
+        click.echo(str(error), err=True)
+
+    with create_watcher(directory) as watcher:
+        try:
+            run_watch(live, watcher, render, on_error, debounce=debounce)
+        except KeyboardInterrupt:
+            pass
+
+
+_RENDER_HELP = (
+    N_(
+        "Render the change log directory into one or more files, each in its"
+        " own markup language or export format. The change log directory is"
+        " read only once, and the files are written concurrently. Nothing is"
+        " deleted."
+    )
+    + "\n\n"
+    # TRANSLATORS: do not translate compile, --markup, json, or ndjson.
+    + N_(
+        "Every file in a markup language contains the fragments in that markup"
+        " language, like the section that compile would insert with the same"
+        " --markup. The export formats json and ndjson describe the sections"
+        " and fragments in the markup language of the change log directory in"
+        " a machine-readable way."
+    )
+)
+
+
+@main.command(name="render", help=_RENDER_HELP)
+@click.option(
+    "--directory",
+    "-d",
+    show_default=N_("determined by config"),
+    type=click.Path(
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        readable=True,
+        path_type=Path,
+    ),
+    required=True,
+    help=N_("Change log directory to render."),
+)
+@click.option(
+    "--markup",
+    "-m",
+    default="markdown",
+    # TRANSLATORS: do not translate markdown.
+    show_default=N_("determined by config, or markdown"),
+    type=_MarkupChoice(),
+    help=N_("Markup language of the change log directory."),
+)
+@click.option(
+    "--output",
+    "-o",
+    "outputs",
+    type=(
+        _MarkupChoice(extra=ExportFormat.__args__),  # type: ignore
+        click.Path(dir_okay=False, writable=True, allow_dash=True),
+    ),
+    metavar="<FORMAT PATH>...",
+    multiple=True,
+    required=True,
+    # TRANSLATORS: do not translate STDOUT.
+    help=N_(
+        "Render in a markup language or export format to a file, or to"
+        " STDOUT if '-'."
+    ),
+)
+@click.option(
+    "--format",
+    "-f",
+    "format_",
+    type=(str, str),
+    metavar="<KEY VALUE>...",
+    multiple=True,
+    # TRANSLATORS: string-format is a verb.
+    help=N_("Use key-value pairs to string-format section headings."),
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help=N_("Amount of threads used to read the change log directory."),
+)
+def render(
+    directory: Path,
+    markup: SupportedMarkup,
+    outputs: tuple[tuple[SupportedMarkup | ExportFormat, str], ...],
+    format_: tuple[tuple[str, str], ...],
+    jobs: int,
+) -> None:
+    from datetime import date
+
+    from .render import iter_render, render_extensions, render_section
+
+    section = _load_section(
+        directory,
+        markup=markup,
+        section_format_pairs=dict(format_),
+        max_workers=jobs,
+        cache=False,
+        extensions=render_extensions(markup, (output for output, _ in outputs)),
+    )
+    if section.is_empty():
+        click.echo(_("There are no change log fragments to compile."))
+        return
+    today = date.today()
+    files = [(output, path) for output, path in outputs if path != "-"]
+    try:
+        stdout = [
+            iter_render(section, output, today)
+            for output, path in outputs
+            if path == "-"
+        ]
+        render_section(section, files, today=today)
+    except (HeadingFormatError, OSError) as error:
+        raise click.UsageError(str(error)) from error
+    for chunks in stdout:
+        _echo_chunks(chunks)
+
+
+_BATCH_HELP = (
+    N_(
+        "Compile many change log directories at once, for example all"
+        " packages in a monorepo. The packages are listed in a manifest, or"
+        " discovered by searching for global .protokolo.toml files. They are"
+        " compiled in parallel processes, and the results and timings are"
+        " summarised."
+    )
+    + "\n\n"
+    + N_(
+        "A failing package does not stop the other packages from being"
+        " compiled."
+    )
+)
+
+
+@main.command(name="batch", help=_BATCH_HELP)
+@click.option(
+    "--manifest",
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        path_type=Path,
+    ),
+    help=N_("TOML file that lists the packages to compile."),
+)
+@click.option(
+    "--root",
+    default=".",
+    show_default=True,
+    type=click.Path(
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        readable=True,
+        path_type=Path,
+    ),
+    help=N_("Directory in which to discover packages if there is no manifest."),
+)
+@click.option(
+    "--format",
+    "-f",
+    "format_",
+    type=(str, str),
+    metavar="<KEY VALUE>...",
+    multiple=True,
+    # TRANSLATORS: string-format is a verb.
+    help=N_("Use key-value pairs to string-format section headings."),
+)
+@click.option(
+    "--dry-run",
+    "-n",
+    is_flag=True,
+    help=N_("Do not write to file system; only report the results."),
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=None,
+    show_default=N_("amount of CPUs"),
+    type=click.IntRange(min=1),
+    help=N_("Amount of processes used to compile packages."),
+)
+@click.pass_context
+def batch(
+    ctx: click.Context,
+    manifest: Path | None,
+    root: Path,
+    format_: tuple[tuple[str, str], ...],
+    dry_run: bool,
+    jobs: int | None,
+) -> None:
+    import time
+    import tomllib
+    from collections import Counter
+
+    from .batch import (
+        PackageStatus,
+        compile_packages,
+        discover_packages,
+        load_manifest,
+    )
+
+    start = time.perf_counter()
+    failures: list["PackageResult"] = []
+    if manifest is not None:
+        try:
+            packages = load_manifest(manifest)
+        except (
+            tomllib.TOMLDecodeError,
+            DictTypeError,
+            ManifestError,
+            OSError,
+        ) as error:
+            raise click.UsageError(str(error)) from error
+    else:
+        packages, failures = discover_packages(root)
+
+    counts = Counter(result.status for result in failures)
+    for result in chain(
+        failures,
+        compile_packages(
+            packages,
+            section_format_pairs=dict(format_),
+            dry_run=dry_run,
+            max_workers=jobs,
+        ),
+    ):
+        counts[result.status] += 1
+        _echo_result(result)
+    click.echo(
+        _(
+            "{compiled} compiled, {empty} empty, {failed} failed in"
+            " {seconds:.2f} s."
+        ).format(
+            compiled=counts[PackageStatus.COMPILED],
+            empty=counts[PackageStatus.EMPTY],
+            failed=counts[PackageStatus.ERROR],
+            seconds=time.perf_counter() - start,
+        )
+    )
+    if counts[PackageStatus.ERROR]:
+        ctx.exit(1)
+
+
+_DAEMON_HELP = (
+    N_(
+        "Run a daemon that keeps the parsed change log directories of"
+        " repositories in memory. The 'protokolo' command forwards"
+        " 'compile --dry-run' invocations to the daemon if the"
+        " PROTOKOLO_DAEMON_SOCKET environment variable is set to the path of"
+        " its socket."
+    )
+    + "\n\n"
+    + N_(
+        "If the daemon cannot be reached, the command runs normally. The"
+        " result is identical either way."
+    )
+)
+
+
+@main.command(name="daemon", help=_DAEMON_HELP)
+@click.option(
+    "--socket",
+    "socket_path",
+    # TRANSLATORS: do not translate PROTOKOLO_DAEMON_SOCKET.
+    show_default=N_("$PROTOKOLO_DAEMON_SOCKET, or a per-user runtime path"),
+    type=click.Path(dir_okay=False),
+    help=N_("Path of the socket on which to listen."),
+)
+def daemon(socket_path: str | None) -> None:
+    from .daemon import serve
+
+    try:
+        serve(socket_path, main)
+    except OSError as error:
+        raise click.UsageError(str(error)) from error
+
+
+def _load_global_config(
+    config_path: Path, load_cache: "LoadCache | None"
+) -> "GlobalConfig":
+    """Load the global config from *config_path*, or from *load_cache* if the
+    file has not changed since it was cached.
+
+    Raises:
+        tomllib.TOMLDecodeError: Could not parse TOML.
+        DictTypeError: Value isn't of the correct type.
+        OSError: input/output error.
+    """
+    from .config import GlobalConfig
+
+    if load_cache is None:
+        return GlobalConfig.from_file(config_path)
+    stat = config_path.stat()
+    # Prefix the key, because the file may also be a section configuration.
+    key = f"config:{config_path.absolute()}"
+    config = load_cache.get(key, stat)
+    if config is None:
+        config = GlobalConfig.from_file(config_path)
+        load_cache.put(key, stat, config)
+    return config
+
+
+def _load_section(
+    directory: Path,
+    markup: SupportedMarkup,
+    section_format_pairs: dict[str, str],
+    max_workers: int,
+    cache: bool,
+    extensions: Collection[str] | None = None,
+    clear_cache: bool = False,
+    cache_stats: bool = False,
+) -> "Section":
+    """Load a :class:`.compile.Section` from *directory*, optionally using and
+    updating the persistent cache. If *extensions* is given, the fragments with
+    those suffixes are loaded instead of those of *markup*. If *clear_cache* is
+    true, the persistent cache is deleted first. If *cache_stats* is true, the
+    hit rate of the cache is echoed to stderr.
+
+    Raises:
+        click.UsageError: the section could not be loaded, or the cache could
+            not be deleted.
+    """
+    # pylint: disable=too-many-arguments
+    import tomllib
+
+    from .cache import CACHE_FILE_NAME, LoadCache, default_cache_dir
+    from .compile import Section
+
+    if clear_cache:
+        try:
+            LoadCache(path=default_cache_dir() / CACHE_FILE_NAME).clear()
+        except OSError as error:
+            raise click.UsageError(str(error)) from error
+    load_cache: LoadCache | None
+    if cache:
+        load_cache = LoadCache.from_directory()
+    else:
+        # The daemon passes an in-memory cache through the context.
+        obj = click.get_current_context().find_object(dict) or {}
+        load_cache = obj.get("load_cache")
+    try:
+        section = Section.from_directory(
+            directory,
+            markup=markup,
+            section_format_pairs=section_format_pairs,
+            max_workers=max_workers,
+            cache=load_cache,
+            extensions=extensions,
+        )
+    except (
+        ProtokoloTOMLNotFoundError,
+        ProtokoloTOMLIsADirectoryError,
+        tomllib.TOMLDecodeError,
+        DictTypeError,
+        AttributeNotPositiveError,
+        OSError,
+    ) as error:
+        raise click.UsageError(str(error)) from error
+    if load_cache is not None:
+        try:
+            load_cache.save()
+        except OSError:
+            # The cache is an optimisation; failing to write it is not fatal.
+            pass
+        if cache_stats:
+            click.echo(
+                _(
+                    "Cache: {hits} hits, {misses} misses, {rate:.0%} hit rate."
+                ).format(
+                    hits=load_cache.stats.hits,
+                    misses=load_cache.stats.misses,
+                    rate=load_cache.stats.hit_rate,
+                ),
+                err=True,
+            )
+    return section
+
+
+def _delete_fragments(
+    section: "Section", max_workers: int, echo_stats: bool
+) -> None:
+    """Delete the fragments of *section*, and echo how many were deleted to
+    stderr if *echo_stats* is true.
+
+    Raises:
+        click.UsageError: a fragment could not be deleted.
+    """
+    from .compile import delete_fragments
+
+    try:
+        stats = delete_fragments(section, max_workers=max_workers)
+    except OSError as error:
+        raise click.UsageError(str(error)) from error
+    if echo_stats:
+        click.echo(
+            _(
+                "Deleted {deleted} fragments in {directories} directories in"
+                " {ms:.0f} ms. {missing} fragments no longer existed."
+            ).format(
+                deleted=stats.deleted,
+                directories=stats.directories,
+                ms=stats.seconds * 1000,
+                missing=stats.missing,
+            ),
+            err=True,
+        )
+
+
+def _echo_result(result: "PackageResult") -> None:
+    """Echo a line that summarises *result*, followed by its message if it
+    failed.
+    """
+    import textwrap
+
+    click.echo(
+        _("{status:<8} {fragments:>5} fragments {ms:>9.1f} ms  {name}").format(
+            status=result.status.value,
+            fragments=result.fragments,
+            ms=result.seconds * 1000,
+            name=result.name,
+        )
+    )
+    if result.message:
+        click.echo(textwrap.indent(result.message, "    "), err=True)
+
+
+def _find_section_tag(fp: IO[bytes], name: str) -> int:
+    """Find the byte offset in *fp* after the line that contains the section
+    tag.
+
+    Raises:
+        click.UsageError: there is no section tag.
+        OSError: input/output error.
+    """
+    from .replace import find_section_tag
+
+    try:
+        return find_section_tag(fp, name)
+    except SectionTagNotFoundError as error:
+        raise click.UsageError(str(error)) from error
+
+
+def _iter_new_changelog(
+    changelog: str, new_section: Iterable[str]
+) -> Iterator[bytes]:
+    """Yield the bytes of *changelog* with *new_section* inserted after the
+    section tag. *changelog* is closed once all bytes are yielded.
+
+    Raises:
+        click.UsageError: there is no section tag.
+        OSError: input/output error.
+    """
+    from .replace import iter_insert_at_offset
+
+    with open(changelog, "rb") as fp:
+        offset = _find_section_tag(fp, changelog)
+        yield from iter_insert_at_offset(chain(["\n"], new_section), fp, offset)
+
+
+def _check_archive(directory: Path, archive: Path | None) -> None:
+    """Check that the fragments in *directory* can be moved into *archive*, if
+    any.
+
+    Raises:
+        click.UsageError: the fragments cannot be moved.
+    """
+    from .archive import check_archive
+
+    if archive is None:
+        return
+    try:
+        check_archive(directory, archive)
+    except OSError as error:
+        raise click.UsageError(str(error)) from error
+
+
+def _recover(changelog: str) -> None:
+    """Complete or roll back an interrupted transactional run on
+    *changelog*.
+
+    Raises:
+        click.UsageError: the journal could not be recovered.
+    """
+    from .journal import Recovery, recover
+
+    try:
+        recovery = recover(changelog)
+    except (OSError, JournalError) as error:
+        raise click.UsageError(str(error)) from error
+    if recovery == Recovery.COMMITTED:
+        click.echo(
+            _("Completed the interrupted compilation of {path}.").format(
+                path=repr(changelog)
+            ),
+            err=True,
+        )
+    elif recovery == Recovery.ROLLED_BACK:
+        click.echo(
+            _("Rolled back the interrupted compilation of {path}.").format(
+                path=repr(changelog)
+            ),
+            err=True,
+        )
+
+
+def _preview_changelog(section: "Section", changelog: Path) -> Iterator[str]:
+    """Yield the contents of *changelog* with *section* compiled into it, as
+    ``compile --dry-run`` would print them. If *section* is empty, the contents
+    are unchanged.
+
+    Raises:
+        click.UsageError: the section could not be compiled, or there is no
+            section tag.
+        OSError: input/output error.
+    """
+    import codecs
+
+    from .replace import iter_insert_at_offset
+
+    with changelog.open("rb") as fp:
+        offset = _find_section_tag(fp, str(changelog))
+        if section.is_empty():
+            new_section: Iterable[str] = []
+        else:
+            try:
+                new_section = chain(["\n"], section.iter_compile())
+            except HeadingFormatError as error:
+                raise click.UsageError(str(error)) from error
+        yield from codecs.iterdecode(
+            iter_insert_at_offset(new_section, fp, offset), "utf-8"
+        )
+
+
+def _echo_chunks(chunks: Iterable[str]) -> None:
+    """Echo *chunks* to STDOUT in batches, instead of flushing after every
+    chunk.
+    """
+    batch: list[str] = []
+    size = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= _ECHO_BATCH_SIZE:
+            click.echo("".join(batch), nl=False)
+            batch.clear()
+            size = 0
+    if batch:
+        click.echo("".join(batch), nl=False)
@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Entry point of the program that forwards requests to a running
+``protokolo daemon`` if possible, and runs them in-process otherwise.
+
+This module only imports the standard library, such that forwarding a request
+does not pay for importing the rest of :mod:`protokolo`. The modules that are
+only needed to forward a request are imported when a request is forwarded.
+"""
+
+import os
+import sys
+from collections.abc import Sequence
+from typing import Any
+
+from . import __version__
+from ._protocol import (
+    PROTOCOL_VERSION,
+    SOCKET_ENV_VAR,
+    is_private_directory,
+    significant_env,
+)
+
+#: The amount of seconds to wait for the daemon before falling back to running
+#: in-process.
+TIMEOUT = 30.0
+
+
+def is_forwardable(args: Sequence[str]) -> bool:
+    """Return whether *args* might be a ``compile --dry-run`` invocation, which
+    is the only command that the daemon runs. The daemon checks this more
+    strictly.
+    """
+    return (
+        bool(args)
+        and args[0] == "compile"
+        and any(arg in ("--dry-run", "-n") for arg in args)
+        and "--help" not in args
+    )
+
+
+def forward(
+    args: Sequence[str], socket_path: str, prog_name: str = "protokolo"
+) -> dict[str, Any] | None:
+    """Send *args* to the daemon listening on *socket_path*. Return its
+    response, which contains ``exit_code``, ``stdout``, and ``stderr``, or
+    :const:`None` if the daemon could not be reached or declined the request.
+
+    The request is not sent if the directory of *socket_path* is not private
+    to the current user, because another user could have put their own socket
+    there.
+    """
+    # pylint: disable=import-outside-toplevel
+    import json
+    import socket
+
+    if not is_private_directory(os.path.dirname(os.path.abspath(socket_path))):
+        return None
+    request = {
+        "version": PROTOCOL_VERSION,
+        "protokolo_version": __version__,
+        "args": list(args),
+        "prog_name": prog_name,
+        "cwd": os.getcwd(),
+        "env": significant_env(),
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(TIMEOUT)
+            sock.connect(socket_path)
+            with sock.makefile("rwb") as fp:
+                fp.write(json.dumps(request).encode("utf-8") + b"\n")
+                fp.flush()
+                response = json.loads(fp.readline())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(response, dict) or response.get("status") != "ok":
+        return None
+    return response
+
+
+def main(args: Sequence[str] | None = None) -> None:
+    """Run :func:`.cli.main`, but forward the request to the daemon if
+    :data:`SOCKET_ENV_VAR` is set and the request can be forwarded.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    socket_path = os.environ.get(SOCKET_ENV_VAR)
+    if socket_path and is_forwardable(args):
+        prog_name = os.path.basename(sys.argv[0]) or "protokolo"
+        response = forward(args, socket_path, prog_name=prog_name)
+        if response is not None:
+            sys.stdout.write(response["stdout"])
+            sys.stdout.flush()
+            sys.stderr.write(response["stderr"])
+            sys.stderr.flush()
+            sys.exit(response["exit_code"])
+
+    # pylint: disable=import-outside-toplevel
+    from .cli import main as cli_main
+
+    # pylint: disable=no-value-for-parameter
+    cli_main(args=list(args))
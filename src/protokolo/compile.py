@@ -4,71 +4,502 @@
 
 """Code to combine the files in ``changelog.d/`` into a single text block."""
 
-import errno
+import asyncio
+import os
+import time
 import tomllib
-from io import StringIO
-from itertools import chain
-from operator import attrgetter
-from os import strerror
-from pathlib import Path, PurePath
-from typing import Iterator, Self, cast
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections.abc import Collection, Iterable, Iterator, MutableSet
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from io import BytesIO, StringIO
+from itertools import chain, repeat
+from operator import itemgetter
+from pathlib import PurePath
+from typing import Any, Self, TypeGuard, TypeVar, cast
 
 import attrs as attrs_
 from attrs.converters import optional
 
 from ._formatter import MARKUP_EXTENSION_MAPPING as _MARKUP_EXTENSION_MAPPING
 from ._formatter import MARKUP_FORMATTER_MAPPING as _MARKUP_FORMATTER_MAPPING
-from .config import SectionAttributes, parse_toml
-from .exceptions import (
-    AttributeNotPositiveError,
-    HeadingFormatError,
-    ProtokoloTOMLIsADirectoryError,
-    ProtokoloTOMLNotFoundError,
+from ._formatter import MarkupFormatter
+from ._walk import (
+    DirectoryListing,
+    FileReader,
+    SyscallCounter,
+    _stem,
+    scan_directory,
 )
+from .cache import LoadCache
+from .config import SectionAttributes, parse_toml
+from .exceptions import AttributeNotPositiveError, HeadingFormatError
 from .i18n import _
 from .types import StrPath, SupportedMarkup
 
-# pylint: disable=too-few-public-methods
+_O_DIRECTORY = getattr(os, "O_DIRECTORY", 0)
+
+
+def _parse_protokolo_toml(
+    protokolo_toml: str, contents: bytes
+) -> dict[str, Any]:
+    """Parse the *contents* of a ``.protokolo.toml`` file, returning the values
+    of its ``[protokolo.section]`` table.
+
+    Raises:
+        tomllib.TOMLDecodeError: ``.protokolo.toml`` couldn't be parsed.
+    """
+    try:
+        return parse_toml(BytesIO(contents), section=["protokolo", "section"])
+    except tomllib.TOMLDecodeError as error:
+        raise tomllib.TOMLDecodeError(
+            _("Invalid TOML in {file_name}: {error}").format(
+                file_name=repr(protokolo_toml), error=error
+            )
+        ) from error
 
 
-@attrs_.define(frozen=True)
+@attrs_.define(frozen=True, eq=False, weakref_slot=False)
 class Fragment:
-    """A fragment, analogous to a file."""
+    """A fragment, analogous to a file.
+
+    A fragment that is created without *text* but with a *source* is lazy: its
+    text is read from *source* when it is first accessed, and can be released
+    from memory again with :meth:`release`. Lazy fragments are equal if their
+    sources are equal.
+
+    To keep large trees of fragments small, the source is stored as a string,
+    and the size of a lazy fragment as an integer. *size* can be passed if it
+    is already known, such that it need not be determined again.
+    """
+
+    _text: str | None = None
+    _source: str | None = attrs_.field(default=None, converter=optional(str))
+    _size: int | None = attrs_.field(default=None, repr=False)
+    _lazy: bool = attrs_.field(init=False, repr=False)
+
+    def __attrs_post_init__(self) -> None:
+        if self._text is None and self._source is None:
+            raise ValueError(_("A fragment needs either text or a source."))
+        object.__setattr__(self, "_lazy", self._text is None)
+
+    @property
+    def source(self) -> PurePath | None:
+        """The file from which the fragment was loaded, if any."""
+        if self._source is None:
+            return None
+        return PurePath(self._source)
+
+    @property
+    def text(self) -> str:
+        """The text of the fragment. If the fragment is lazy, the text is read
+        from :attr:`source` on first access.
 
-    text: str
-    source: PurePath | None = attrs_.field(
-        default=None, converter=optional(PurePath)
-    )
+        Raises:
+            OSError: the lazy fragment could not be read.
+        """
+        text = self._text
+        if text is None:
+            with open(cast(str, self._source), encoding="utf-8") as fp:
+                text = fp.read()
+            object.__setattr__(self, "_text", text)
+        return text
+
+    @property
+    def is_lazy(self) -> bool:
+        """Whether the text of the fragment is read on demand."""
+        return self._lazy
+
+    @property
+    def size(self) -> int:
+        """The size of the fragment in bytes. For lazy fragments, this is the
+        size of :attr:`source`, which is determined once, without reading the
+        text.
+
+        Raises:
+            OSError: the size of the lazy fragment could not be determined.
+        """
+        if not self._lazy:
+            return len(cast(str, self._text).encode("utf-8"))
+        size = self._size
+        if size is None:
+            size = os.stat(cast(str, self._source)).st_size
+            object.__setattr__(self, "_size", size)
+        return size
+
+    def release(self) -> None:
+        """Release the text of a lazy fragment from memory. It is read again on
+        next access. This does nothing for fragments that are not lazy.
+        """
+        if self._lazy:
+            object.__setattr__(self, "_text", None)
 
     def compile(self) -> str:
         """Compile the fragment. For the time being, this just means adding a
         newline at the end if one does not exist.
+
+        Raises:
+            OSError: the lazy fragment could not be read.
+        """
+        text = self.text
+        if not text.endswith("\n"):
+            return f"{text}\n"
+        return text
+
+    def _key(self) -> tuple[str | None, str | None]:
+        if self._lazy:
+            return (self._source, None)
+        return (self._source, self._text)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Fragment):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        # Do not hash the entire text, which can be large. Equal fragments
+        # have equal sources and texts.
+        if self._lazy or self._source is not None:
+            return hash(self._source)
+        text = cast(str, self._text)
+        return hash((len(text), text[:64]))
+
+
+_T = TypeVar("_T")
+
+
+class ChildSet(MutableSet[_T], ABC):
+    """A set of the children of a :class:`Section`, kept in sorted order, that
+    informs the section of every change, such that the section can keep its
+    aggregate statistics up to date.
+
+    The sort key of every child is computed when it is added. Iterating yields
+    the children in sorted order without sorting, and adding or removing a
+    child takes a binary search. Children are compared with each other only if
+    their sort keys are equal, and they are never hashed.
+
+    If the sort keys of the children can change while they are in the set,
+    :meth:`_generation` changes with them. Only then are the keys compared with
+    the stored keys on the next access, and the children sorted again if any of
+    them changed.
+    """
+
+    __slots__ = ("_owner", "_keys", "_items", "_sorted_generation")
+
+    def __init__(self, owner: "Section") -> None:
+        self._owner = owner
+        self._keys: list[tuple[Any, ...]] = []
+        self._items: list[_T] = []
+        self._sorted_generation = self._generation()
+
+    def __contains__(self, item: object) -> bool:
+        if not self._is_child(item):
+            return False
+        return self._index(item) is not None
+
+    def __iter__(self) -> Iterator[_T]:
+        self._refresh()
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f"{{{', '.join(map(repr, self._items))}}}"
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[Any]) -> set[Any]:
+        # Results of set operations are plain sets.
+        return set(it)
+
+    def add(self, value: _T) -> None:
+        self._refresh()
+        key = self._sort_key(value)
+        index = bisect_right(self._keys, key)
+        if self._find(value, key, index) is not None:
+            return
+        self._check(value)
+        self._keys.insert(index, key)
+        self._items.insert(index, value)
+        self._attach(value)
+
+    def discard(self, value: _T) -> None:
+        if not self._is_child(value):
+            return
+        index = self._index(value)
+        if index is not None:
+            del self._keys[index]
+            del self._items[index]
+            self._detach(value)
+
+    def clear(self) -> None:
+        items = self._items
+        self._keys = []
+        self._items = []
+        for item in items:
+            self._detach(item)
+
+    def update(self, *iterables: Iterable[_T]) -> None:
+        """Add all items of *iterables*. If there are more new items than
+        existing items, they are sorted in one go instead of being inserted
+        one by one.
+        """
+        new = [item for iterable in iterables for item in iterable]
+        for item in new:
+            self._check(item)
+        self._refresh()
+        if len(new) <= len(self._items):
+            for item in new:
+                self.add(item)
+            return
+        pairs = sorted(
+            chain(
+                zip(self._keys, self._items, repeat(False)),
+                ((self._sort_key(item), item, True) for item in new),
+            ),
+            key=itemgetter(0),
+        )
+        keys: list[tuple[Any, ...]] = []
+        items: list[_T] = []
+        attached = []
+        run_start = 0
+        for key, item, is_new in pairs:
+            if not keys or keys[-1] != key:
+                run_start = len(keys)
+            elif any(other == item for other in items[run_start:]):
+                continue
+            keys.append(key)
+            items.append(item)
+            if is_new:
+                attached.append(item)
+        self._keys = keys
+        self._items = items
+        for item in attached:
+            self._attach(item)
+
+    def _index(self, value: _T) -> int | None:
+        self._refresh()
+        key = self._sort_key(value)
+        return self._find(value, key, bisect_right(self._keys, key))
+
+    def _refresh(self) -> None:
+        """If the sort keys of the items may have changed since the last
+        access, sort the items again if any of their keys no longer match the
+        stored keys.
+        """
+        generation = self._generation()
+        if generation == self._sorted_generation:
+            return
+        self._sorted_generation = generation
+        keys = [self._sort_key(item) for item in self._items]
+        if keys == self._keys:
+            return
+        # The sort is stable, such that items with equal keys keep their order.
+        pairs = sorted(zip(keys, self._items), key=itemgetter(0))
+        self._keys = list(map(itemgetter(0), pairs))
+        self._items = list(map(itemgetter(1), pairs))
+
+    def _find(self, value: _T, key: tuple[Any, ...], end: int) -> int | None:
+        """Find *value* among the items with *key*, which end at *end*."""
+        index = end - 1
+        while index >= 0 and self._keys[index] == key:
+            if self._items[index] == value:
+                return index
+            index -= 1
+        return None
+
+    @staticmethod
+    @abstractmethod
+    def _sort_key(value: _T) -> tuple[Any, ...]:
+        """Return the key by which *value* is sorted."""
+
+    @staticmethod
+    def _generation() -> int:
+        """Return a number that changes whenever the sort key of any item may
+        have changed. By default, sort keys never change.
+        """
+        return 0
+
+    def _check(self, value: _T) -> None:
+        """Raise an error if *value* cannot be added to the set.
+
+        Raises:
+            ValueError: *value* cannot be added.
         """
-        if not self.text.endswith("\n"):
-            return f"{self.text}\n"
-        return self.text
+
+    @staticmethod
+    @abstractmethod
+    def _is_child(value: object) -> TypeGuard[_T]:
+        """Return whether *value* is of the type of the items of the set."""
+
+    @abstractmethod
+    def _attach(self, value: _T) -> None:
+        """Inform the owner of the set that *value* was added."""
+
+    @abstractmethod
+    def _detach(self, value: _T) -> None:
+        """Inform the owner of the set that *value* was removed."""
+
+
+class _FragmentSet(ChildSet[Fragment]):
+    __slots__ = ()
+
+    @staticmethod
+    def _sort_key(value: Fragment) -> tuple[Any, ...]:
+        # Fragments are sorted by the stem of their source. Fragments without
+        # a source go last, sorted by their text.
+        source = value._source
+        if source is not None:
+            return (0, _stem(source), source)
+        return (1, value.text, "")
+
+    @staticmethod
+    def _is_child(value: object) -> TypeGuard[Fragment]:
+        return isinstance(value, Fragment)
+
+    def _attach(self, value: Fragment) -> None:
+        # pylint: disable=protected-access
+        self._owner._apply_delta(1, 0)
+
+    def _detach(self, value: Fragment) -> None:
+        # pylint: disable=protected-access
+        self._owner._apply_delta(-1, 0)
+
+
+class _SubsectionSet(ChildSet["Section"]):
+    __slots__ = ()
+
+    @staticmethod
+    def _sort_key(value: "Section") -> tuple[Any, ...]:
+        # Subsections are sorted by their order, then by their title.
+        # Subsections without an order go last.
+        order = value.attrs.order
+        if order is not None:
+            return (0, order, value.attrs.title)
+        return (1, 0, value.attrs.title)
+
+    @staticmethod
+    def _is_child(value: object) -> TypeGuard["Section"]:
+        return isinstance(value, Section)
+
+    @staticmethod
+    def _generation() -> int:
+        return SectionAttributes.sort_generation
+
+    def _check(self, value: "Section") -> None:
+        # pylint: disable=protected-access
+        if value._parent is not None and value._parent is not self._owner:
+            raise ValueError(
+                _(
+                    "The section is already a subsection of another section."
+                    " Remove it from there first."
+                )
+            )
+
+    def _attach(self, value: "Section") -> None:
+        # pylint: disable=protected-access
+        value._parent = self._owner
+        self._owner._apply_delta(*value._subtree_delta())
+
+    def _detach(self, value: "Section") -> None:
+        # pylint: disable=protected-access
+        value._parent = None
+        fragments, nonempty = value._subtree_delta()
+        self._owner._apply_delta(-fragments, -nonempty)
+
+
+def _attrs_changed(
+    _section: Any, _attribute: Any, value: SectionAttributes
+) -> SectionAttributes:
+    # The title and order of the section may have changed with its attributes.
+    SectionAttributes.sort_key_changed()
+    return value
 
 
 @attrs_.define(eq=False)
 class Section:
-    """A section, analogous to a directory."""
+    """A section, analogous to a directory.
+
+    :attr:`fragments` and :attr:`subsections` are mutable sets. The section
+    keeps aggregate statistics of all its descendants up to date as they are
+    changed, such that :meth:`is_empty`, :meth:`fragment_count`, and
+    :meth:`nonempty_descendant_count` take constant time. :meth:`byte_count` is
+    computed when it is first called after a change, and cached.
 
-    attrs: SectionAttributes = attrs_.field(factory=SectionAttributes)
+    A section can be the subsection of only one section at a time. Adding a
+    section to the subsections of a second section raises :exc:`ValueError`;
+    discard it from the subsections of the first section before.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    attrs: SectionAttributes = attrs_.field(
+        factory=SectionAttributes, on_setattr=_attrs_changed
+    )
     markup: SupportedMarkup = "markdown"
     source: PurePath | None = attrs_.field(
         default=None, converter=optional(PurePath)
     )
 
-    fragments: set[Fragment] = attrs_.field(factory=set, init=False)
-    subsections: set[Self] = attrs_.field(factory=set, init=False)
+    _fragments: _FragmentSet = attrs_.field(init=False, repr=False)
+    _subsections: _SubsectionSet = attrs_.field(init=False, repr=False)
+    _parent: Self | None = attrs_.field(default=None, init=False, repr=False)
+    _fragment_count: int = attrs_.field(default=0, init=False, repr=False)
+    _byte_count: int | None = attrs_.field(default=0, init=False, repr=False)
+    _nonempty_count: int = attrs_.field(default=0, init=False, repr=False)
+
+    def __attrs_post_init__(self) -> None:
+        self._fragments = _FragmentSet(self)
+        self._subsections = _SubsectionSet(self)
+
+    @property
+    def fragments(self) -> ChildSet[Fragment]:
+        """The fragments directly inside of this section. Assigning to this
+        property replaces the contents of the set.
+        """
+        return self._fragments
+
+    @fragments.setter
+    def fragments(self, value: Iterable[Fragment]) -> None:
+        value = list(value)
+        self._fragments.clear()
+        self._fragments.update(value)
+
+    @property
+    def subsections(self) -> ChildSet[Self]:
+        """The subsections directly inside of this section. Assigning to this
+        property replaces the contents of the set.
+
+        Raises:
+            ValueError: a subsection that is added is already the subsection of
+                another section.
+        """
+        return cast(ChildSet[Self], self._subsections)
+
+    @subsections.setter
+    def subsections(self, value: Iterable[Self]) -> None:
+        value = list(value)
+        for subsection in value:
+            # pylint: disable=protected-access
+            self._subsections._check(subsection)
+        self._subsections.clear()
+        self._subsections.update(value)
 
     @classmethod
-    def from_directory(
+    def from_directory(  # pylint: disable=too-many-arguments
         cls,
         directory: StrPath,
         level: int = 1,
         markup: SupportedMarkup = "markdown",
         section_format_pairs: dict[str, str] | None = None,
+        *,
+        counter: SyscallCounter | None = None,
+        max_workers: int = 1,
+        lazy: bool = False,
+        cache: LoadCache | None = None,
+        extensions: Collection[str] | None = None,
     ) -> Self:
         """Factory method to recursively create a :class:`Section` from a
         directory.
@@ -80,6 +511,19 @@ class Section:
             markup: The markup language.
             section_format_pairs: Additional key-value pairs used to format the
                 section headings, applied recursively to all subsections.
+            counter: If provided, the file system calls made while loading the
+                directory are counted on this object.
+            max_workers: If greater than 1, the ``.protokolo.toml`` files and
+                fragments are read concurrently in a pool of this many threads.
+                The result is identical to reading them one by one.
+            lazy: If :const:`True`, the fragments are not read. Instead, they
+                are lazy :class:`Fragment` objects that are read when they are
+                compiled.
+            cache: If provided, the parsed ``.protokolo.toml`` files and the
+                texts of fragments are taken from this cache if the files have
+                not changed, and the cache is updated with the files that have.
+            extensions: The suffixes of the fragments to load, if not those of
+                *markup*.
 
         Raises:
             OSError: input/output error.
@@ -93,52 +537,141 @@ class Section:
         if section_format_pairs is None:
             section_format_pairs = {}
 
-        directory = Path(directory)
-        section = cls(markup=markup, source=directory)
-
-        section._load_section_attributes(directory, level, section_format_pairs)
-        section._load_subsections_and_fragments(
-            directory, section.attrs.level, section_format_pairs
+        if extensions is None:
+            extensions = _MARKUP_EXTENSION_MAPPING[markup]
+        listing = scan_directory(directory, extensions, counter=counter)
+        reader = FileReader(counter=counter, cache=cache)
+        if max_workers > 1:
+            reader.prefetch(listing, max_workers, fragments=not lazy)
+        return cls._from_listing(
+            listing, level, markup, section_format_pairs, reader, lazy
         )
 
-        return section
-
-    def _load_section_attributes(
-        self, directory: Path, level: int, section_format_pairs: dict[str, str]
-    ) -> None:
-        """Locate ``.protokolo.toml`` and create a :class:`SectionAttributes`
-        object from it, then set that object on self.
+    @classmethod
+    async def afrom_directory(  # pylint: disable=too-many-arguments
+        cls,
+        directory: StrPath,
+        level: int = 1,
+        markup: SupportedMarkup = "markdown",
+        section_format_pairs: dict[str, str] | None = None,
+        *,
+        counter: SyscallCounter | None = None,
+        max_concurrency: int = 16,
+        lazy: bool = False,
+        cache: LoadCache | None = None,
+        extensions: Collection[str] | None = None,
+    ) -> Self:
+        """Like :meth:`from_directory`, but without blocking the event loop.
+        The directory is walked and the ``.protokolo.toml`` files are parsed in
+        a separate thread, and at most *max_concurrency* files are read at the
+        same time.
 
         Raises:
             OSError: input/output error.
             ProtokoloTOMLNotFoundError: ``.protokolo.toml`` doesn't exist.
             ProtokoloTOMLIsADirectoryError: ``.protokolo.toml`` is not a file.
             tomllib.TOMLDecodeError: ``.protokolo.toml`` couldn't be parsed.
+            DictTypeError: ``.protokolo.toml`` fields have the wrong type.
+            AttributeNotPositiveError: value in ``.protokolo.toml`` should be a
+                positive integer.
         """
-        protokolo_toml = directory / ".protokolo.toml"
-        if not protokolo_toml.exists():
-            raise ProtokoloTOMLNotFoundError(
-                errno.ENOENT, strerror(errno.ENOENT), str(protokolo_toml)
-            )
-        if not protokolo_toml.is_file():
-            raise ProtokoloTOMLIsADirectoryError(
-                errno.EISDIR, strerror(errno.EISDIR), str(protokolo_toml)
+        if section_format_pairs is None:
+            section_format_pairs = {}
+
+        if extensions is None:
+            extensions = _MARKUP_EXTENSION_MAPPING[markup]
+        listing = await asyncio.to_thread(
+            scan_directory, directory, extensions, counter=counter
+        )
+        reader = FileReader(counter=counter, cache=cache)
+        await reader.aprefetch(listing, max_concurrency, fragments=not lazy)
+        return await asyncio.to_thread(
+            cls._from_listing,
+            listing,
+            level,
+            markup,
+            section_format_pairs,
+            reader,
+            lazy,
+        )
+
+    @classmethod
+    def _from_listing(
+        cls,
+        listing: DirectoryListing,
+        level: int,
+        markup: SupportedMarkup,
+        section_format_pairs: dict[str, str],
+        reader: FileReader,
+        lazy: bool,
+    ) -> Self:
+        """Recursively create a :class:`Section` from a
+        :class:`._walk.DirectoryListing`.
+
+        Raises:
+            OSError: input/output error.
+            tomllib.TOMLDecodeError: ``.protokolo.toml`` couldn't be parsed.
+            DictTypeError: ``.protokolo.toml`` fields have the wrong type.
+            AttributeNotPositiveError: value in ``.protokolo.toml`` should be a
+                positive integer.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        section = cls(markup=markup, source=listing.path)
+        section._load_section_attributes(
+            listing.protokolo_toml,
+            reader.load_parsed(
+                listing.protokolo_toml,
+                partial(_parse_protokolo_toml, listing.protokolo_toml),
+            ),
+            level,
+            section_format_pairs,
+        )
+        if lazy:
+            fragments = [
+                Fragment(source=path, size=reader.stat(path).st_size)
+                for path in listing.fragments
+            ]
+        else:
+            fragments = [
+                Fragment(text=reader.load_text(path), source=path)
+                for path in listing.fragments
+            ]
+        subsections = {
+            cls._from_listing(
+                sublisting,
+                section.attrs.level + 1,
+                markup,
+                section_format_pairs,
+                reader,
+                lazy,
             )
-        with protokolo_toml.open("rb") as fp:
-            try:
-                values = parse_toml(fp, section=["protokolo", "section"])
-            except tomllib.TOMLDecodeError as error:
-                raise tomllib.TOMLDecodeError(
-                    _("Invalid TOML in {file_name}: {error}").format(
-                        file_name=repr(fp.name), error=error
-                    )
-                ) from error
+            for sublisting in listing.subdirectories
+        }
+        section.fragments = fragments
+        section.subsections = subsections
+        return section
+
+    def _load_section_attributes(
+        self,
+        protokolo_toml: str,
+        values: dict[str, Any],
+        level: int,
+        section_format_pairs: dict[str, str],
+    ) -> None:
+        """Create a :class:`SectionAttributes` object from the parsed *values*
+        of *protokolo_toml*, then set that object on self.
+
+        Raises:
+            DictTypeError: ``.protokolo.toml`` fields have the wrong type.
+            AttributeNotPositiveError: value in ``.protokolo.toml`` should be a
+                positive integer.
+        """
         try:
-            attrs = SectionAttributes.from_dict(values, source=fp.name)
+            attrs = SectionAttributes.from_dict(values, source=protokolo_toml)
         except AttributeNotPositiveError as error:
             raise AttributeNotPositiveError(
                 _("Wrong value in {file_name}: {error}").format(
-                    file_name=repr(fp.name), error=error
+                    file_name=repr(protokolo_toml), error=error
                 )
             ) from error
         # The level of the current section is determined first by the value
@@ -149,43 +682,6 @@ class Section:
             attrs[key] = val
         self.attrs = attrs
 
-    def _load_subsections_and_fragments(
-        self, directory: Path, level: int, section_format_pairs: dict[str, str]
-    ) -> None:
-        """Locate subsections and fragments. Load fragments onto self, and
-        recursively create subsections to also load them onto self.
-
-        Raises:
-            OSError: input/output error.
-            ProtokoloTOMLNotFoundError: ``.protokolo.toml`` doesn't exist.
-            ProtokoloTOMLIsADirectoryError: ``.protokolo.toml`` is not a file.
-            tomllib.TOMLDecodeError: ``.protokolo.toml`` couldn't be parsed.
-            DictTypeError: ``.protokolo.toml`` fields have the wrong type.
-            AttributeNotPositiveError: value in ``.protokolo.toml`` should be a
-                positive integer.
-        """
-        subsections = set()
-        fragments = set()
-        for path in directory.iterdir():
-            if path.is_dir() and (path / ".protokolo.toml").is_file():
-                subsections.add(
-                    self.from_directory(
-                        path,
-                        level=level + 1,
-                        markup=self.markup,
-                        section_format_pairs=section_format_pairs,
-                    )
-                )
-            elif (
-                path.is_file()
-                and path.suffix in _MARKUP_EXTENSION_MAPPING[self.markup]
-            ):
-                with path.open("r", encoding="utf-8") as fp_:
-                    content = fp_.read()
-                    fragments.add(Fragment(text=content, source=path))
-        self.subsections = cast(set[Self], subsections)
-        self.fragments = fragments
-
     def compile(self) -> str:
         """Compile the entire section recursively, first printing the fragments
         in order, then the subsections.
@@ -195,8 +691,7 @@ class Section:
         Raises:
             HeadingFormatError: could not format heading of section.
         """
-        buffer = self.write_to_buffer()
-        return buffer.getvalue()
+        return "".join(self.iter_compile())
 
     def write_to_buffer(self, buffer: StringIO | None = None) -> StringIO:
         """Like compile, but writing to a :class:`StringIO` buffer.
@@ -206,82 +701,259 @@ class Section:
         """
         if buffer is None:
             buffer = StringIO()
+        for chunk in self.iter_compile():
+            buffer.write(chunk)
+        return buffer
 
-        if self.is_empty():
-            return buffer
+    def iter_compile(
+        self,
+        markup: SupportedMarkup | None = None,
+        today: date | None = None,
+    ) -> Iterator[str]:
+        """Like compile, but yield the headings and fragments one by one in
+        order, such that the compiled section never needs to be held in memory
+        in its entirety. The text of lazy fragments is released after they are
+        yielded.
+
+        All headings are formatted before the iterator is returned, such that
+        errors are raised before anything is yielded.
+
+        Args:
+            markup: The markup language of the headings, if not :attr:`markup`.
+                The fragments are yielded as-is regardless.
+            today: The date with which ``$date`` is replaced, if not today's
+                date.
+
+        Raises:
+            HeadingFormatError: could not format heading of section.
+        """
+        headings: dict[Section, str] = {}
+        # $date is resolved once, such that all headings agree on it.
+        self._format_headings(
+            headings,
+            _MARKUP_FORMATTER_MAPPING[markup or self.markup],
+            today or date.today(),
+        )
+        return self._iter_compile(headings)
 
+    def _format_headings(
+        self,
+        headings: dict["Section", str],
+        formatter: type[MarkupFormatter],
+        today: date,
+    ) -> None:
+        """Recursively format the headings of all non-empty sections into
+        *headings* with *formatter*, replacing ``$date`` with *today*.
+
+        Raises:
+            HeadingFormatError: could not format heading of section.
+        """
+        if self.is_empty():
+            return
         try:
-            heading = _MARKUP_FORMATTER_MAPPING[self.markup].format_section(
-                self.attrs,
-            )
+            headings[self] = formatter.format_section(self.attrs, today)
         except HeadingFormatError as error:
             raise HeadingFormatError(
                 _(
                     "Failed to format section heading of {source}: {error}"
                 ).format(source=repr(str(self.source)), error=str(error))
             ) from error
-        buffer.write(heading)
-        buffer.write("\n")
+        for subsection in self.sorted_subsections():
+            # pylint: disable=protected-access
+            subsection._format_headings(headings, formatter, today)
+
+    def _iter_compile(self, headings: dict["Section", str]) -> Iterator[str]:
+        if self.is_empty():
+            return
+
+        yield headings[self]
+        yield "\n"
 
         if self.fragments:
-            buffer.write("\n")
+            yield "\n"
         for fragment in self.sorted_fragments():
-            buffer.write(fragment.compile())
+            yield fragment.compile()
+            fragment.release()
 
         for subsection in self.sorted_subsections():
             if not subsection.is_empty():
-                buffer.write("\n")
-            subsection.write_to_buffer(buffer=buffer)
-
-        return buffer
+                yield "\n"
+            # pylint: disable=protected-access
+            yield from subsection._iter_compile(headings)
 
     def is_empty(self) -> bool:
         """A :class:`Section` is empty if it contains neither fragments nor
         subsections. If it contains no fragments, and its subsections are empty,
         then it is also considered empty.
         """
-        if self.fragments:
-            return False
-        if not self.subsections:
-            return True
-        for subsection in self.subsections:
-            if not subsection.is_empty():
-                return False
-        return True
+        return not self._fragment_count
 
-    def sorted_fragments(self) -> Iterator[Fragment]:
-        """Yield the fragments, ordered by their source. Fragments that do not
-        have a source are sorted afterwards by their text.
+    def fragment_count(self) -> int:
+        """The amount of fragments in this section and all its descendants."""
+        return self._fragment_count
+
+    def byte_count(self) -> int:
+        """The total size in bytes of the fragments in this section and all its
+        descendants. See :attr:`Fragment.size`.
+
+        The sizes are only determined when this is called, and the total is
+        cached until the fragments change.
+
+        Raises:
+            OSError: the size of a lazy fragment could not be determined.
         """
-        with_source = {
-            fragment
-            for fragment in self.fragments
-            if fragment.source is not None
-        }
-        source_sorted = sorted(
-            with_source,
-            key=lambda fragment: cast(PurePath, fragment.source).stem,
-        )
-        alphabetical_sorted = sorted(
-            self.fragments - with_source, key=attrgetter("text")
+        # pylint: disable=protected-access
+        if self._byte_count is None:
+            # Compute the stale totals bottom-up, without recursion.
+            stale = []
+            sections = [self]
+            while sections:
+                section = sections.pop()
+                stale.append(section)
+                sections.extend(
+                    subsection
+                    for subsection in section.subsections
+                    if subsection._byte_count is None
+                )
+            for section in reversed(stale):
+                section._byte_count = sum(
+                    fragment.size for fragment in section.fragments
+                ) + sum(
+                    cast(int, subsection._byte_count)
+                    for subsection in section.subsections
+                )
+        return cast(int, self._byte_count)
+
+    def nonempty_descendant_count(self) -> int:
+        """The amount of non-empty sections among all descendants of this
+        section, not including the section itself.
+        """
+        return self._nonempty_count
+
+    def _subtree_delta(self) -> tuple[int, int]:
+        """The statistics that this section adds to its parent."""
+        return (
+            self._fragment_count,
+            self._nonempty_count + (0 if self.is_empty() else 1),
         )
-        return chain(source_sorted, alphabetical_sorted)
+
+    def _apply_delta(self, fragments: int, nonempty: int) -> None:
+        """Change the statistics of this section and all its ancestors. If the
+        fragments changed, the cached :meth:`byte_count` is cleared.
+        """
+        section: Section | None = self
+        while section is not None and (fragments or nonempty):
+            was_empty = section.is_empty()
+            # pylint: disable=protected-access
+            section._fragment_count += fragments
+            if fragments:
+                section._byte_count = None
+            section._nonempty_count += nonempty
+            # Whether this section flipped between empty and non-empty
+            # changes the amount of non-empty descendants of its ancestors.
+            nonempty += int(was_empty) - int(section.is_empty())
+            section = section._parent
+
+    def sorted_fragments(self) -> Iterator[Fragment]:
+        """Yield the fragments, ordered by the stem of their source. Fragments
+        that do not have a source are sorted afterwards by their text.
+        """
+        return iter(self._fragments)
 
     def sorted_subsections(self) -> Iterator[Self]:
         """Yield the subsections, first ordered by their order value, then the
-        remainder sorted alphabetically.
+        remainder sorted alphabetically by title.
+
+        If the order or title of a subsection changed after it was added, the
+        subsections are sorted again.
         """
-        with_order = {
-            section
-            for section in self.subsections
-            if section.attrs.order is not None
-        }
-        ordered_sorted = sorted(
-            with_order,
-            key=attrgetter("attrs.order", "attrs.title"),
-        )
-        alphabetical_sorted = sorted(
-            self.subsections - with_order,
-            key=attrgetter("attrs.title"),
-        )
-        return chain(ordered_sorted, alphabetical_sorted)
+        return iter(self.subsections)
+
+
+@attrs_.define
+class DeletionStats:
+    """The outcome of :func:`delete_fragments`."""
+
+    # pylint: disable=too-few-public-methods
+
+    #: The amount of files that were deleted.
+    deleted: int = 0
+    #: The amount of files that no longer existed.
+    missing: int = 0
+    #: The amount of directories that the files were in.
+    directories: int = 0
+    seconds: float = 0.0
+
+
+def delete_fragments(section: Section, max_workers: int = 1) -> DeletionStats:
+    """Delete the source files of the fragments of *section*
+    recursively. Files that no longer exist are skipped.
+
+    The files are grouped by directory. Each directory is opened once, and the
+    files in it are deleted relative to the directory, such that their paths
+    need not be resolved again. If *max_workers* is greater than 1, the
+    directories are handled in a pool of that many threads.
+
+    Raises:
+        OSError: a file could not be deleted.
+    """
+    start = time.perf_counter()
+    directories: dict[str, list[str]] = {}
+    sections = [section]
+    while sections:
+        current = sections.pop()
+        for fragment in current.fragments:
+            source = fragment._source
+            if source is not None:
+                directory, name = os.path.split(source)
+                directories.setdefault(directory, []).append(name)
+        sections.extend(current.subsections)
+
+    stats = DeletionStats(directories=len(directories))
+    if max_workers > 1 and len(directories) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(
+                executor.map(_unlink_in_directory, *zip(*directories.items()))
+            )
+    else:
+        results = [
+            _unlink_in_directory(directory, names)
+            for directory, names in directories.items()
+        ]
+    for deleted, missing in results:
+        stats.deleted += deleted
+        stats.missing += missing
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def _unlink_in_directory(directory: str, names: list[str]) -> tuple[int, int]:
+    """Delete the files *names* in *directory*, and return the amount of
+    deleted and missing files.
+
+    Raises:
+        OSError: a file could not be deleted.
+    """
+    deleted = missing = 0
+    if os.unlink not in os.supports_dir_fd:
+        for name in names:
+            try:
+                os.unlink(os.path.join(directory, name))
+                deleted += 1
+            except FileNotFoundError:
+                missing += 1
+        return deleted, missing
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY | _O_DIRECTORY)
+    except FileNotFoundError:
+        return 0, len(names)
+    try:
+        for name in names:
+            try:
+                os.unlink(name, dir_fd=fd)
+                deleted += 1
+            except FileNotFoundError:
+                missing += 1
+    finally:
+        os.close(fd)
+    return deleted, missing
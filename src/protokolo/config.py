@@ -5,11 +5,11 @@
 """The global configuration of Protokolo."""
 
 import tomllib
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from copy import deepcopy
 from pathlib import Path
-from types import UnionType
-from typing import IO, Any, Self, cast
+from types import MappingProxyType, UnionType
+from typing import IO, Any, ClassVar, Self, TypeAlias, cast
 
 import attrs
 
@@ -58,18 +58,71 @@ def parse_toml(
         return {}
 
 
+def _accepted_types(expected_type: type | UnionType) -> frozenset[type]:
+    """Return the types whose instances are valid for *expected_type* without
+    a closer look.
+    """
+    if isinstance(expected_type, UnionType):
+        return frozenset(expected_type.__args__)
+    if isinstance(expected_type, type):
+        return frozenset([expected_type])
+    return frozenset()
+
+
+_DEFAULT_EXPECTED = (
+    cast(UnionType, TOMLValueType),
+    _accepted_types(TOMLValueType),
+)
+_SCALAR_TYPES = _DEFAULT_EXPECTED[1] - {dict, list}
+
+
+#: Maps a key to its expected type and the types accepted by
+#: :func:`_accepted_types`.
+_AnnotatedTypes: TypeAlias = dict[str, tuple[type | UnionType, frozenset[type]]]
+_ANNOTATED_TYPES: dict[type, _AnnotatedTypes] = {}
+
+
+def _annotated_types(cls: type) -> _AnnotatedTypes:
+    """Return the expected types of the keys of the :class:`TOMLConfig`
+    subclass *cls* that have an annotated private attribute. This is computed
+    once per class.
+    """
+    result = _ANNOTATED_TYPES.get(cls)
+    if result is None:
+        result = _ANNOTATED_TYPES[cls] = {
+            name[1:]: (expected_type, _accepted_types(expected_type))
+            for name, expected_type in cls.__annotations__.items()
+            if name.startswith("_")
+        }
+    return result
+
+
 @attrs.define
 class TOMLConfig:
     """A utility class to hold data parsed from a TOML file.
 
     Immediately after object instantiation, :meth:`validate` is called.
+
+    The values are copied on write. Only the top-level table is copied during
+    instantiation. Nested tables and arrays are shared with the dictionary from
+    which the object was created, until they are accessed or changed, at which
+    point all values are copied once.
     """
 
     _values: dict[str, TOMLValue] = attrs.field(factory=dict)
     source: str | None = attrs.field(converter=str, default=None)
+    _owned: bool = attrs.field(
+        init=False, default=False, repr=False, eq=False, order=False
+    )
 
     def __attrs_post_init__(self) -> None:
-        self._values = deepcopy(self._values)
+        values = self._default_values()
+        values.update(self._values)
+        self._values = values
+        self._values_changed()
+        self._owned = not any(
+            isinstance(value, (dict, list)) for value in values.values()
+        )
         # Can't use validator on the attribute itself because the validation
         # depends on `self`. So we do the validation here.
         self.validate()
@@ -91,24 +144,45 @@ class TOMLConfig:
 
     def __getitem__(self, key: str | Sequence[str]) -> TOMLValue:
         if isinstance(key, str):
-            keys = [key]
+            value = self._values[key]
         else:
-            keys = list(key)
-        return nested_itemgetter(*keys)(self._values)
+            value = nested_itemgetter(*key)(self._values)
+        if not self._owned and isinstance(value, (dict, list)):
+            # The caller may change the returned value.
+            self._own()
+            return self[key]
+        return value
 
     def __setitem__(self, key: str | Sequence[str], value: TOMLValue) -> None:
         if isinstance(key, str):
-            final_key = key
-            keys = []
+            self._values[key] = value
         else:
-            copied = list(key)
-            final_key = copied.pop()
-            keys = copied
-        nested_itemgetter(*keys)(self._values)[final_key] = value
+            keys = list(key)
+            final_key = keys.pop()
+            if keys:
+                self._own()
+            nested_itemgetter(*keys)(self._values)[final_key] = value
+        self._values_changed()
+
+    def as_dict(self) -> Mapping[str, TOMLValue]:
+        """Return a read-only mapping of the :class:`TOMLConfig`. The mapping
+        is a view, so it reflects later changes to the :class:`TOMLConfig`.
+        """
+        self._own()
+        return MappingProxyType(self._values)
+
+    def _default_values(self) -> dict[str, TOMLValue]:
+        """Return the values that are used for keys that are not defined."""
+        return {}
 
-    def as_dict(self) -> dict[str, TOMLValue]:
-        """Return a mapping of the :class:`TOMLConfig`."""
-        return deepcopy(self._values)
+    def _values_changed(self) -> None:
+        """Called after the top-level values are set or changed."""
+
+    def _own(self) -> None:
+        """Copy the values that are shared with other objects, if any."""
+        if not self._owned:
+            self._values = deepcopy(self._values)
+            self._owned = True
 
     def validate(self) -> None:
         """Verify that all keys contain valid TOML types. This is automatically
@@ -122,11 +196,15 @@ class TOMLConfig:
         self._validate(cast(dict[str, Any], self._values))
 
     def _validate(self, values: dict[str, Any]) -> None:
+        annotated = _annotated_types(type(self))
         for name, value in values.items():
             # Use typed annotations to expect a very specific type. If not,
             # allow any valid TOML type.
-            expected_type = self.__annotations__.get(f"_{name}", TOMLValueType)
-            self._validate_item(value, name, expected_type=expected_type)
+            expected_type, accepted = annotated.get(name, _DEFAULT_EXPECTED)
+            # Only values that are not exactly of an accepted type need the
+            # full check.
+            if type(value) not in accepted:
+                self._validate_item(value, name, expected_type=expected_type)
             if isinstance(value, dict):
                 self._validate(value)
             elif isinstance(value, list):
@@ -154,6 +232,8 @@ class TOMLConfig:
         name: str,
     ) -> None:
         for item in values:
+            if type(item) in _SCALAR_TYPES:
+                continue
             if isinstance(item, dict):
                 self._validate(item)
             elif isinstance(item, list):
@@ -184,14 +264,38 @@ class SectionAttributes(TOMLConfig):
         default=None, repr=False, eq=False, order=False
     )
 
-    def __attrs_post_init__(self) -> None:
-        self._values = deepcopy(self._values)
-        # The private variables are no longer used after they are written to
-        # _values.
-        self._values.setdefault("title", self._title)
-        self._values.setdefault("level", self._level)
-        self._values.setdefault("order", self._order)
-        super().__attrs_post_init__()
+    #: Incremented whenever the title or order of any section changes after
+    #: its attributes were created, such that sorted collections of sections
+    #: know when they must be sorted again.
+    sort_generation: ClassVar[int] = 0
+
+    def __setitem__(self, key: str | Sequence[str], value: TOMLValue) -> None:
+        sort_values = (self._title, self._order)
+        super().__setitem__(key, value)
+        if (self._title, self._order) != sort_values:
+            self.sort_key_changed()
+
+    @staticmethod
+    def sort_key_changed() -> None:
+        """Record that the title or order of a section changed, by
+        incrementing :attr:`sort_generation`.
+        """
+        SectionAttributes.sort_generation += 1
+
+    def _default_values(self) -> dict[str, TOMLValue]:
+        return {
+            "title": self._title,
+            "level": self._level,
+            "order": self._order,
+        }
+
+    def _values_changed(self) -> None:
+        # Copy the values into the private attributes, which the properties
+        # read from directly.
+        values = self._values
+        self._title = cast(str, values["title"])
+        self._level = cast(int, values["level"])
+        self._order = cast(int | None, values["order"])
 
     @classmethod
     def from_dict(
@@ -237,20 +341,22 @@ class SectionAttributes(TOMLConfig):
         """The title of a section. If no value is provided, it defaults to
         'TODO: No section title defined'.
         """
-        return cast(str, self["title"])
+        return self._title
 
     @title.setter
     def title(self, value: str) -> None:
-        self["title"] = value
+        if value != self._title:
+            self.sort_key_changed()
+        self._values["title"] = self._title = value
 
     @property
     def level(self) -> int:
         """The level of the section heading, which must not be zero or lower."""
-        return cast(int, self["level"])
+        return self._level
 
     @level.setter
     def level(self, value: int) -> None:
-        self["level"] = value
+        self._values["level"] = self._level = value
 
     @property
     def order(self) -> int | None:
@@ -258,11 +364,13 @@ class SectionAttributes(TOMLConfig):
         or lower, and may be :const:`None`, in which case it is alphabetically
         sorted after all sections that do have an order.
         """
-        return cast(int | None, self["order"])
+        return self._order
 
     @order.setter
     def order(self, value: int | None) -> None:
-        self["order"] = value
+        if value != self._order:
+            self.sort_key_changed()
+        self._values["order"] = self._order = value
 
 
 @attrs.define
@@ -286,12 +394,12 @@ class GlobalConfig(TOMLConfig):
         "pyproject.toml": ["tool", "protokolo"],
     }
 
-    def __attrs_post_init__(self) -> None:
-        self._values = deepcopy(self._values)
-        self._values.setdefault("changelog", self._changelog)
-        self._values.setdefault("markup", self._markup)
-        self._values.setdefault("directory", self._directory)
-        super().__attrs_post_init__()
+    def _default_values(self) -> dict[str, TOMLValue]:
+        return {
+            "changelog": self._changelog,
+            "markup": self._markup,
+            "directory": self._directory,
+        }
 
     @classmethod
     def from_file(cls, path: StrPath) -> Self:
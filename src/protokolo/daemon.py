@@ -0,0 +1,195 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""A daemon that runs ``compile --dry-run`` requests from
+:mod:`protokolo.client` over a Unix domain socket, keeping the parsed
+configuration files and fragments of every repository in memory between
+requests.
+
+The protocol is a single line of JSON in each direction per connection. The
+request contains the version of the protocol, the version of :mod:`protokolo`,
+the command-line arguments, the name of the program, the working directory, and
+the values of :data:`._protocol.SIGNIFICANT_ENV_VARS`. The response contains
+``status``, which is ``ok`` or ``unsupported``, and, if the status is ``ok``,
+``exit_code``, ``stdout``, and ``stderr``.
+"""
+
+import contextlib
+import errno
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+from typing import Any, cast
+
+import click
+
+from . import __version__
+from ._protocol import (
+    PROTOCOL_VERSION,
+    SOCKET_ENV_VAR,
+    default_socket_path,
+    is_private_directory,
+    significant_env,
+)
+from .cache import LoadCache
+from .i18n import _
+
+
+def run_request(
+    request: dict[str, Any], main: click.Group, caches: dict[str, LoadCache]
+) -> dict[str, Any]:
+    """Run *request* with the command-line interface *main* in-process, and
+    return the response. Requests from a client with a different version of
+    :mod:`protokolo` are declined. The :class:`.cache.LoadCache` of the
+    request's working directory is taken from *caches*, or added to it.
+    """
+    unsupported = {"status": "unsupported"}
+    args = request.get("args")
+    cwd = request.get("cwd")
+    if (
+        request.get("version") != PROTOCOL_VERSION
+        or request.get("protokolo_version") != __version__
+        or request.get("env") != significant_env()
+        or not isinstance(cwd, str)
+        or not _is_dry_run(args, main)
+    ):
+        return unsupported
+    args = cast(list[str], args)
+    prog_name = request.get("prog_name") or "protokolo"
+
+    cwd = os.path.realpath(cwd)
+    cache = caches.setdefault(cwd, LoadCache())
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    stderr = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    old_cwd = os.getcwd()
+    exit_code: Any = 0
+    try:
+        os.chdir(cwd)
+        with (
+            contextlib.redirect_stdout(stdout),
+            contextlib.redirect_stderr(stderr),
+        ):
+            try:
+                main.main(
+                    args=args,
+                    prog_name=prog_name,
+                    obj={"load_cache": cache},
+                )
+            except SystemExit as exit_:
+                exit_code = exit_.code
+    except OSError:
+        return unsupported
+    finally:
+        os.chdir(old_cwd)
+    if exit_code is None:
+        exit_code = 0
+    elif not isinstance(exit_code, int):
+        stderr.write(f"{exit_code}\n")
+        exit_code = 1
+    return {
+        "status": "ok",
+        "exit_code": exit_code,
+        "stdout": _getvalue(stdout),
+        "stderr": _getvalue(stderr),
+    }
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """A server that handles one request at a time, because requests change
+    the working directory and the standard streams of the process.
+
+    Raises:
+        OSError: the socket could not be created, or its directory is not
+            private to the current user.
+    """
+
+    def __init__(self, socket_path: str, main: click.Group):
+        self.main = main
+        self.caches: dict[str, LoadCache] = {}
+        directory = os.path.dirname(os.path.abspath(socket_path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Another user may have created the directory first.
+        if not is_private_directory(directory):
+            raise OSError(
+                errno.EPERM,
+                _(
+                    "The directory of the socket must be owned by you and"
+                    " inaccessible to other users"
+                ),
+                directory,
+            )
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.server_address)  # type: ignore[arg-type]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            request = None
+        if isinstance(request, dict):
+            response = run_request(
+                request, self.server.main, self.server.caches
+            )
+        else:
+            response = {"status": "unsupported"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+def _is_dry_run(args: Any, main: click.Group) -> bool:
+    """Return whether *args* is a ``compile --dry-run`` invocation of
+    *main*.
+    """
+    if (
+        not isinstance(args, list)
+        or not all(isinstance(arg, str) for arg in args)
+        or not args
+        or args[0] != "compile"
+    ):
+        return False
+    compile_ = main.commands["compile"]
+    try:
+        ctx = compile_.make_context("compile", args[1:], resilient_parsing=True)
+    except click.ClickException:
+        return False
+    return bool(ctx.params.get("dry_run"))
+
+
+def _getvalue(stream: io.TextIOWrapper) -> str:
+    stream.flush()
+    return cast(io.BytesIO, stream.buffer).getvalue().decode("utf-8")
+
+
+def serve(socket_path: str | None, main: click.Group) -> None:
+    """Serve requests for the command-line interface *main* on *socket_path*
+    until interrupted. If *socket_path* is :const:`None`, the value of
+    :data:`._protocol.SOCKET_ENV_VAR` or
+    :func:`._protocol.default_socket_path` is
+    used.
+
+    Raises:
+        OSError: the socket could not be created.
+    """
+    if socket_path is None:
+        socket_path = os.environ.get(SOCKET_ENV_VAR) or default_socket_path()
+    # Exit cleanly on SIGTERM, such that the socket is removed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with DaemonServer(socket_path, main) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
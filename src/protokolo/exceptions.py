@@ -113,3 +113,23 @@ class ProtokoloTOMLIsADirectoryError(IsADirectoryError, ProtokoloTOMLError):
 
 class HeadingFormatError(ValueError, ProtokoloError):
     """Could not create heading."""
+
+
+class SectionTagNotFoundError(ProtokoloError):
+    """The change log file does not contain a ``protokolo-section-tag``."""
+
+
+class ManifestError(ProtokoloError):
+    """A package in a batch manifest or configuration is incomplete or
+    invalid.
+    """
+
+
+class JournalError(ProtokoloError):
+    """The journal of a transactional compilation is invalid, or already
+    exists.
+    """
+
+
+class FormatterError(ProtokoloError):
+    """A formatter plugin could not be loaded."""
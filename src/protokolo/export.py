@@ -0,0 +1,184 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Export a section as JSON or NDJSON, such that other tools need not parse the
+compiled Markdown or reStructuredText.
+
+The JSON export is a single object for the section, which contains the
+fragments and subsections in order::
+
+    {"title": "1.0.0 - 2023-11-08", "level": 2, "order": null,
+     "source": "changelog.d",
+     "fragments": [{"source": "changelog.d/foo.md", "text": "- Foo"}],
+     "subsections": [...]}
+
+The NDJSON export has one record per line, first the section, then its
+fragments, then its subsections, recursively. The sections are numbered in
+that order, such that the tree can be reconstructed::
+
+    {"type": "section", "id": 0, "parent": null, "title": "1.0.0 - 2023-11-08",
+     "level": 2, "order": null, "source": "changelog.d"}
+    {"type": "fragment", "section": 0, "source": "changelog.d/foo.md",
+     "text": "- Foo"}
+
+The text of a fragment is the contents of its file. The titles are formatted
+the way headings are, but without markup, and empty subsections are left out.
+"""
+
+import json
+import os
+from collections.abc import Callable, Iterator
+from datetime import date
+from itertools import count
+from typing import Any
+
+from ._formatter import MarkupFormatter
+from .compile import Fragment, Section
+from .exceptions import HeadingFormatError
+from .i18n import _
+from .types import ExportFormat
+
+
+def iter_json(section: Section, today: date | None = None) -> Iterator[str]:
+    """Yield *section* as a JSON document in chunks, such that it never needs
+    to be held in memory in its entirety. ``$date`` in titles is replaced with
+    *today*, which defaults to today's date. The text of lazy fragments is
+    released after it is yielded.
+
+    All titles are formatted before the iterator is returned, such that errors
+    are raised before anything is yielded.
+
+    Raises:
+        HeadingFormatError: could not format the title of a section.
+    """
+    titles = _format_titles(section, today)
+    return _iter_json(section, titles)
+
+
+def iter_ndjson(section: Section, today: date | None = None) -> Iterator[str]:
+    """Like :func:`iter_json`, but yield one line of NDJSON for every section
+    and fragment.
+
+    Raises:
+        HeadingFormatError: could not format the title of a section.
+    """
+    titles = _format_titles(section, today)
+    return _iter_ndjson(section, titles)
+
+
+#: The functions that export a section, by :data:`.types.ExportFormat`.
+EXPORT_FUNCTIONS: dict[
+    ExportFormat, Callable[[Section, date | None], Iterator[str]]
+] = {
+    "json": iter_json,
+    "ndjson": iter_ndjson,
+}
+
+
+def _format_titles(section: Section, today: date | None) -> dict[Section, str]:
+    """Format the titles of *section* and its non-empty subsections.
+
+    Raises:
+        HeadingFormatError: could not format the title of a section.
+    """
+    if today is None:
+        today = date.today()
+    titles = {}
+    sections = [section]
+    while sections:
+        current = sections.pop()
+        try:
+            titles[current] = MarkupFormatter.format_title(current.attrs, today)
+        except HeadingFormatError as error:
+            raise HeadingFormatError(
+                _(
+                    "Failed to format section heading of {source}: {error}"
+                ).format(source=repr(str(current.source)), error=str(error))
+            ) from error
+        sections.extend(
+            subsection
+            for subsection in current.subsections
+            if not subsection.is_empty()
+        )
+    return titles
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _source(section_or_fragment: Section | Fragment) -> str | None:
+    source = section_or_fragment.source
+    return os.fspath(source) if source is not None else None
+
+
+def _section_values(section: Section, title: str) -> dict[str, Any]:
+    return {
+        "title": title,
+        "level": section.attrs.level,
+        "order": section.attrs.order,
+        "source": _source(section),
+    }
+
+
+def _fragment_values(fragment: Fragment) -> dict[str, Any]:
+    values = {"source": _source(fragment), "text": fragment.text}
+    fragment.release()
+    return values
+
+
+def _nonempty_subsections(section: Section) -> list[Section]:
+    return [
+        subsection
+        for subsection in section.sorted_subsections()
+        if not subsection.is_empty()
+    ]
+
+
+def _iter_json(section: Section, titles: dict[Section, str]) -> Iterator[str]:
+    # The stack contains sections that are yet to be opened, and the text that
+    # closes them.
+    stack: list[Section | str] = ["\n", section]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        # Reopen the object to add the fragments and subsections.
+        yield _dumps(_section_values(item, titles[item]))[:-1]
+        yield ',"fragments":['
+        for index, fragment in enumerate(item.sorted_fragments()):
+            if index:
+                yield ","
+            yield _dumps(_fragment_values(fragment))
+        yield '],"subsections":['
+        stack.append("]}")
+        subsections = _nonempty_subsections(item)
+        for index in reversed(range(len(subsections))):
+            stack.append(subsections[index])
+            if index:
+                stack.append(",")
+
+
+def _iter_ndjson(section: Section, titles: dict[Section, str]) -> Iterator[str]:
+    ids = count()
+    stack: list[tuple[Section, int | None]] = [(section, None)]
+    while stack:
+        current, parent = stack.pop()
+        section_id = next(ids)
+        record: dict[str, Any] = {
+            "type": "section",
+            "id": section_id,
+            "parent": parent,
+        }
+        record.update(_section_values(current, titles[current]))
+        yield _dumps(record) + "\n"
+        for fragment in current.sorted_fragments():
+            record = {"type": "fragment", "section": section_id}
+            record.update(_fragment_values(fragment))
+            yield _dumps(record) + "\n"
+        stack.extend(
+            (subsection, section_id)
+            for subsection in reversed(_nonempty_subsections(current))
+        )
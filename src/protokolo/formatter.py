@@ -0,0 +1,45 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""The interface for formatter plugins.
+
+A plugin adds a markup language by subclassing :class:`MarkupFormatter`,
+setting :attr:`MarkupFormatter.extensions` to the suffixes of its fragments,
+and implementing ``_format_section``, which returns the heading of *title* at
+*level*::
+
+    from protokolo.formatter import MarkupFormatter
+
+    class HTMLFormatter(MarkupFormatter):
+        extensions = frozenset({".html"})
+
+        @classmethod
+        def _format_section(cls, title: str, level: int) -> str:
+            return f"<h{level}>{html.escape(title)}</h{level}>"
+
+The formatter is registered as an entry point in the group
+:data:`ENTRY_POINT_GROUP`, after which its name can be used as the markup
+language of Protokolo. See :class:`FormatterRegistry`.
+"""
+
+from ._formatter import (
+    ENTRY_POINT_GROUP,
+    MARKUP_FORMATTER_MAPPING,
+    FormatterRegistry,
+    MarkdownFormatter,
+    MarkupFormatter,
+    ReStructuredTextFormatter,
+)
+
+__all__ = [
+    "ENTRY_POINT_GROUP",
+    "FORMATTERS",
+    "FormatterRegistry",
+    "MarkdownFormatter",
+    "MarkupFormatter",
+    "ReStructuredTextFormatter",
+]
+
+#: The registry of all formatters.
+FORMATTERS = MARKUP_FORMATTER_MAPPING
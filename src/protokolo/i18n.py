@@ -2,26 +2,71 @@
 #
 # SPDX-License-Identifier: EUPL-1.2+
 
-""":mod:`gettext` plumbing of :mod:`protokolo`."""
+""":mod:`gettext` plumbing of :mod:`protokolo`.
+
+The translation catalog is loaded when the first message is translated, not
+when this module is imported. Messages that are defined when a module is
+imported, such as the help texts of the command-line interface, are marked with
+:func:`N_` and translated with :func:`_` when they are used, such that importing
+the module does not load the catalog.
+"""
 
 import gettext as _gettext_module
 import os
+from functools import cache
+from typing import Any
 
 _PACKAGE_PATH = os.path.dirname(__file__)
 _LOCALE_DIR = os.path.join(_PACKAGE_PATH, "locale")
 
-#: Translations object used throughout :mod:`protokolo`. The translations
-#: are sourced from ``protokolo/locale/<lang>/LC_MESSAGES/protokolo.mo``.
-TRANSLATIONS: _gettext_module.NullTranslations = _gettext_module.translation(
-    "protokolo", localedir=_LOCALE_DIR, fallback=True
-)
-#: :meth:`gettext.NullTranslations.gettext` of :data:`TRANSLATIONS`
-_ = TRANSLATIONS.gettext
-#: :meth:`gettext.NullTranslations.gettext` of :data:`TRANSLATIONS`
-gettext = TRANSLATIONS.gettext
-#: :meth:`gettext.NullTranslations.ngettext` of :data:`TRANSLATIONS`
-ngettext = TRANSLATIONS.ngettext
-#: :meth:`gettext.NullTranslations.pgettext` of :data:`TRANSLATIONS`
-pgettext = TRANSLATIONS.pgettext
-#: :meth:`gettext.NullTranslations.npgettext` of :data:`TRANSLATIONS`
-npgettext = TRANSLATIONS.npgettext
+
+@cache
+def translations() -> _gettext_module.NullTranslations:
+    """Return the translations object used throughout :mod:`protokolo`. The
+    translations are sourced from
+    ``protokolo/locale/<lang>/LC_MESSAGES/protokolo.mo``.
+    """
+    return _gettext_module.translation(
+        "protokolo", localedir=_LOCALE_DIR, fallback=True
+    )
+
+
+def gettext(message: str) -> str:
+    """:meth:`gettext.NullTranslations.gettext` of :func:`translations`"""
+    return translations().gettext(message)
+
+
+def ngettext(msgid1: str, msgid2: str, n: int) -> str:
+    """:meth:`gettext.NullTranslations.ngettext` of :func:`translations`"""
+    return translations().ngettext(msgid1, msgid2, n)
+
+
+def pgettext(context: str, message: str) -> str:
+    """:meth:`gettext.NullTranslations.pgettext` of :func:`translations`"""
+    return translations().pgettext(context, message)
+
+
+def npgettext(context: str, msgid1: str, msgid2: str, n: int) -> str:
+    """:meth:`gettext.NullTranslations.npgettext` of :func:`translations`"""
+    return translations().npgettext(context, msgid1, msgid2, n)
+
+
+def gettext_noop(message: str) -> str:
+    """Return *message* unchanged, marking it for translation with
+    :func:`gettext` later.
+    """
+    return message
+
+
+#: Alias of :func:`gettext`.
+_ = gettext
+
+#: Alias of :func:`gettext_noop`.
+N_ = gettext_noop  # pylint: disable=invalid-name
+
+
+def __getattr__(name: str) -> Any:
+    # TRANSLATIONS used to be loaded on import.
+    if name == "TRANSLATIONS":
+        return translations()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,267 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Compile a section into a change log as a transaction, such that an
+interrupted compilation is either completed or rolled back by the next run.
+
+A transaction goes through the following steps:
+
+1. A journal is created next to the change log. It lists the temporary file
+   into which the new change log is written, and the fragments that are to be
+   deleted with a hash of the text that is compiled. The journal is
+   *prepared*. Creating the journal fails if it already exists, such that two
+   compilations never run at once.
+2. The new change log is written to the temporary file.
+3. The journal is written again with a hash of the new change log. The journal
+   is *committed*.
+4. The temporary file replaces the change log, the fragments are deleted, and
+   the journal is removed.
+
+If the process is interrupted, :func:`recover` rolls a prepared journal back by
+removing the temporary file, and rolls a committed journal forward by
+completing step 4. Fragments that were changed after they were loaded are not
+deleted.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
+from enum import Enum
+from typing import Any, Self
+
+import attrs
+
+from .compile import Fragment, Section
+from .exceptions import JournalError
+from .i18n import _
+from .replace import _fsync_directory, atomic_write
+from .types import StrPath
+
+#: The version of the journal format.
+JOURNAL_VERSION = 1
+
+
+class Recovery(Enum):
+    """The outcome of :func:`recover`."""
+
+    COMMITTED = "committed"
+    ROLLED_BACK = "rolled back"
+
+
+@attrs.define
+class Journal:
+    """The intended changes of a transaction. *fragments* maps the paths of
+    the fragments to the SHA-256 hashes of their text, as it was compiled.
+    *changelog_hash* is the SHA-256 hash of the new change log, and is only set
+    once the journal is committed.
+    """
+
+    changelog: str
+    temporary: str
+    fragments: dict[str, str] = attrs.field(factory=dict)
+    changelog_hash: str | None = None
+
+    @property
+    def is_committed(self) -> bool:
+        """Whether the new change log was written completely."""
+        return self.changelog_hash is not None
+
+    @classmethod
+    def read(cls, path: StrPath) -> Self:
+        """Read the journal at *path*.
+
+        Raises:
+            OSError: the journal could not be read.
+            JournalError: the journal is invalid.
+        """
+        with open(path, "rb") as fp:
+            try:
+                values = json.load(fp)
+                if values.pop("version") != JOURNAL_VERSION:
+                    raise ValueError()
+                return cls(**values)
+            except (ValueError, TypeError, KeyError, AttributeError) as error:
+                raise JournalError(
+                    _(
+                        "{path} is not a valid journal. Remove it if no"
+                        " compilation is running."
+                    ).format(path=repr(os.fspath(path)))
+                ) from error
+
+    def create(self, path: StrPath) -> None:
+        """Write the journal to *path*, which must not exist yet. The file is
+        created exclusively, such that of two processes that create the same
+        journal, only one succeeds.
+
+        Raises:
+            FileExistsError: *path* already exists.
+            OSError: the journal could not be written.
+        """
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(self._dump())
+                fp.flush()
+                os.fsync(fp.fileno())
+        except BaseException:
+            os.unlink(path)
+            raise
+        _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+    def write(self, path: StrPath) -> None:
+        """Write the journal to *path* atomically.
+
+        Raises:
+            OSError: the journal could not be written.
+        """
+        with atomic_write(os.fspath(path)) as fp:
+            fp.write(self._dump())
+
+    def _dump(self) -> bytes:
+        values: dict[str, Any] = {"version": JOURNAL_VERSION}
+        values.update(attrs.asdict(self))
+        return json.dumps(values, indent=2).encode("utf-8")
+
+
+def journal_path(changelog: StrPath) -> str:
+    """Return the path of the journal of *changelog*. If *changelog* is a
+    symbolic link, the journal is next to the file that it points to.
+    """
+    directory, name = os.path.split(os.path.realpath(changelog))
+    return os.path.join(directory, f".{name}.protokolo-journal")
+
+
+def temporary_path(changelog: StrPath) -> str:
+    """Return the path of the temporary file into which the new contents of
+    *changelog* are written.
+    """
+    directory, name = os.path.split(os.path.realpath(changelog))
+    return os.path.join(directory, f".{name}.protokolo-new")
+
+
+def compile_transactionally(
+    section: Section, changelog: StrPath, chunks: Iterable[bytes]
+) -> None:
+    """Replace the contents of *changelog* with *chunks*, and delete the
+    fragments of *section*, as a transaction. If consuming *chunks* raises an
+    error, the transaction is rolled back. If *changelog* is a symbolic link,
+    the file that it points to is replaced.
+
+    The fragments are hashed by the text that *section* holds, which is the
+    text that is compiled into *chunks*. Lazy fragments are read for this, and
+    are only released again as they are compiled. A fragment that is changed on
+    disk afterwards is not deleted.
+
+    Raises:
+        OSError: input/output error.
+        UnicodeDecodeError: a lazy fragment is not valid UTF-8.
+        JournalError: there is already a journal for *changelog*.
+    """
+    path = journal_path(changelog)
+    journal = Journal(
+        changelog=os.path.realpath(changelog),
+        temporary=temporary_path(changelog),
+        fragments={
+            fragment_path: _hash_text(fragment.text)
+            for fragment_path, fragment in _fragments(section)
+        },
+    )
+    try:
+        journal.create(path)
+    except FileExistsError as error:
+        raise JournalError(
+            _(
+                "{path} already exists. Another compilation may be running."
+            ).format(path=repr(path))
+        ) from error
+    try:
+        digest = hashlib.sha256()
+        with open(journal.temporary, "wb") as fp:
+            for chunk in chunks:
+                digest.update(chunk)
+                fp.write(chunk)
+            fp.flush()
+            os.fsync(fp.fileno())
+        with suppress(FileNotFoundError):
+            os.chmod(journal.temporary, os.stat(changelog).st_mode & 0o7777)
+        journal.changelog_hash = digest.hexdigest()
+        journal.write(path)
+    except BaseException:
+        _roll_back(journal, path)
+        raise
+    _roll_forward(journal, path)
+
+
+def recover(changelog: StrPath) -> Recovery | None:
+    """If a transaction on *changelog* was interrupted, complete it if it was
+    committed, and roll it back otherwise. Return what was done, or
+    :const:`None` if there was nothing to recover.
+
+    Raises:
+        OSError: input/output error.
+        JournalError: the journal is invalid.
+    """
+    path = journal_path(changelog)
+    try:
+        journal = Journal.read(path)
+    except FileNotFoundError:
+        return None
+    if journal.is_committed and (
+        not os.path.exists(journal.temporary)
+        or _hash_file(journal.temporary) == journal.changelog_hash
+    ):
+        _roll_forward(journal, path)
+        return Recovery.COMMITTED
+    _roll_back(journal, path)
+    return Recovery.ROLLED_BACK
+
+
+def _roll_forward(journal: Journal, path: str) -> None:
+    # If the temporary file does not exist, it already replaced the change log.
+    with suppress(FileNotFoundError):
+        os.replace(journal.temporary, journal.changelog)
+        _fsync_directory(os.path.dirname(journal.changelog))
+    for fragment_path, expected in journal.fragments.items():
+        with suppress(FileNotFoundError):
+            if _hash_fragment(fragment_path) == expected:
+                os.unlink(fragment_path)
+    os.unlink(path)
+
+
+def _roll_back(journal: Journal, path: str) -> None:
+    with suppress(FileNotFoundError):
+        os.unlink(journal.temporary)
+    os.unlink(path)
+
+
+def _fragments(section: Section) -> Iterator[tuple[str, Fragment]]:
+    sections = [section]
+    while sections:
+        current = sections.pop()
+        for fragment in current.fragments:
+            if fragment.source is not None:
+                yield os.path.abspath(fragment.source), fragment
+        sections.extend(current.subsections)
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _hash_fragment(path: str) -> str | None:
+    """Hash the text of the fragment at *path* as it would be loaded, or
+    return :const:`None` if it is not valid UTF-8.
+    """
+    try:
+        with open(path, encoding="utf-8") as fp:
+            return _hash_text(fp.read())
+    except UnicodeDecodeError:
+        return None
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as fp:
+        return hashlib.file_digest(fp, "sha256").hexdigest()
@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Render one section into several markup languages and export formats at
+once.
+
+The change log directory is scanned once into a :class:`.compile.Section` that
+contains the fragments of all markup languages of the outputs, see
+:func:`render_extensions`. Every output in a markup language is compiled from
+the fragments in that markup language, such that it is identical to the section
+compiled by ``protokolo compile --markup``. Outputs in an export format are
+exported by :mod:`.export` with the fragments in the markup language of the
+section. The fragments are written as-is.
+"""
+
+import os
+from collections.abc import Collection, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import cast
+
+from ._formatter import MARKUP_EXTENSION_MAPPING
+from .compile import Section
+from .export import EXPORT_FUNCTIONS
+from .replace import write_atomically
+from .types import ExportFormat, StrPath, SupportedMarkup
+
+
+def render_extensions(
+    markup: SupportedMarkup,
+    output_formats: Iterable[SupportedMarkup | ExportFormat],
+) -> frozenset[str]:
+    """Return the suffixes of the fragments that must be loaded to render a
+    section in the markup language *markup* in all *output_formats*.
+    """
+    extensions = set(MARKUP_EXTENSION_MAPPING[markup])
+    for output_format in output_formats:
+        if output_format not in EXPORT_FUNCTIONS:
+            extensions.update(MARKUP_EXTENSION_MAPPING[output_format])
+    return frozenset(extensions)
+
+
+def render_section(
+    section: Section,
+    outputs: Sequence[tuple[SupportedMarkup | ExportFormat, StrPath]],
+    max_workers: int | None = None,
+    today: date | None = None,
+) -> None:
+    """Render *section* once for every ``(output_format, path)`` pair in
+    *outputs* with :func:`iter_render`, and write the result to *path*
+    atomically. The files are written
+    concurrently in a pool of *max_workers* threads, which defaults to one per
+    output. ``$date`` is replaced with *today*, which defaults to today's date,
+    in all outputs.
+
+    All headings are formatted before anything is written, such that a heading
+    that cannot be formatted in one markup language does not leave the other
+    outputs behind.
+
+    Raises:
+        HeadingFormatError: could not format heading of section.
+        OSError: an output could not be written. The other outputs are still
+            written.
+    """
+    if today is None:
+        today = date.today()
+    renders = [
+        iter_render(section, output_format, today)
+        for output_format, _ in outputs
+    ]
+    paths = [os.fspath(path) for _, path in outputs]
+    if len(outputs) <= 1:
+        for path, chunks in zip(paths, renders):
+            write_atomically(path, chunks)
+        return
+    with ThreadPoolExecutor(
+        max_workers=max_workers or len(outputs)
+    ) as executor:
+        futures = [
+            executor.submit(write_atomically, path, chunks)
+            for path, chunks in zip(paths, renders)
+        ]
+    for future in futures:
+        future.result()
+
+
+def iter_render(
+    section: Section,
+    output_format: SupportedMarkup | ExportFormat,
+    today: date | None = None,
+) -> Iterator[str]:
+    """Compile the fragments of *section* in the markup language
+    *output_format* with :meth:`.compile.Section.iter_compile`, or export the
+    fragments in the markup language of *section* in the export format
+    *output_format* with :mod:`.export`. Fragments without a source are always
+    included.
+
+    Raises:
+        HeadingFormatError: could not format heading of section.
+    """
+    if output_format in EXPORT_FUNCTIONS:
+        export = EXPORT_FUNCTIONS[cast(ExportFormat, output_format)]
+        return export(
+            _select_fragments(
+                section,
+                MARKUP_EXTENSION_MAPPING[section.markup],
+                section.markup,
+            ),
+            today,
+        )
+    markup = cast(SupportedMarkup, output_format)
+    return _select_fragments(
+        section, MARKUP_EXTENSION_MAPPING[markup], markup
+    ).iter_compile(today=today)
+
+
+def _select_fragments(
+    section: Section, extensions: Collection[str], markup: SupportedMarkup
+) -> Section:
+    """Return a copy of *section* in *markup* that recursively contains only
+    the fragments with a suffix in *extensions*. The copy shares its
+    attributes and fragments with *section*.
+    """
+    copy = Section(attrs=section.attrs, markup=markup, source=section.source)
+    copy.fragments = [
+        fragment
+        for fragment in section.fragments
+        if fragment.source is None or fragment.source.suffix in extensions
+    ]
+    copy.subsections = [
+        _select_fragments(subsection, extensions, markup)
+        for subsection in section.subsections
+    ]
+    return copy
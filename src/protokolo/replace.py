@@ -2,10 +2,28 @@
 #
 # SPDX-License-Identifier: EUPL-1.2+
 
-"""Code to find-and-insert in CHANGELOG."""
+"""Code to find-and-insert in CHANGELOG.
 
-# TODO: This code should probably be refactored to not rely on line count, but
-# on character count.
+The functions that operate on strings count lines. The functions that operate
+on files use byte offsets instead, such that files need neither be decoded nor
+split into lines.
+"""
+
+import mmap
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import IO
+
+from .exceptions import SectionTagNotFoundError
+from .i18n import _
+
+#: The tag after which new sections are inserted into the change log.
+SECTION_TAG = "protokolo-section-tag"
+
+#: The amount of bytes that are copied at once by :func:`iter_insert_at_offset`.
+BLOCK_SIZE = 1024 * 1024
 
 
 def insert_into_str(text: str, target: str, lineno: int) -> str:
@@ -41,3 +59,156 @@ def find_first_occurrence(text: str, source: str) -> int | None:
         if text in line:
             return lineno
     return None
+
+
+def find_occurrence_offset(text: str, source: IO[bytes]) -> int | None:
+    """Return the byte offset of the end of the first line in *source* that
+    contains *text*, which is where text is inserted after that line. *source*
+    must be a real file, which is searched with :mod:`mmap` without reading it
+    into memory.
+
+    Return :const:`None` if no occurrence was found.
+
+    Raises:
+        OSError: *source* could not be mapped.
+    """
+    if not os.fstat(source.fileno()).st_size:
+        return None
+    with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        index = mapped.find(text.encode("utf-8"))
+        if index < 0:
+            return None
+        end = mapped.find(b"\n", index)
+        if end < 0:
+            return len(mapped)
+        return end + 1
+
+
+def find_section_tag(source: IO[bytes], name: str) -> int:
+    """Return the byte offset of the end of the first line in *source* that
+    contains :data:`SECTION_TAG`, as in :func:`find_occurrence_offset`. *name*
+    is the name of *source* in the error message.
+
+    Raises:
+        OSError: *source* could not be mapped.
+        SectionTagNotFoundError: *source* contains no section tag.
+    """
+    offset = find_occurrence_offset(SECTION_TAG, source)
+    if offset is None:
+        raise SectionTagNotFoundError(
+            # TRANSLATORS: do not translate protokolo-section-tag.
+            _("There is no 'protokolo-section-tag' in {path}.").format(
+                path=repr(name)
+            )
+        )
+    return offset
+
+
+def iter_insert_at_offset(
+    chunks: Iterable[str], source: IO[bytes], offset: int
+) -> Iterator[bytes]:
+    """Yield the bytes of *source* with *chunks* inserted at the byte *offset*,
+    as returned by :func:`find_occurrence_offset`. The chunks are encoded as
+    UTF-8. *source* is read from the start, and copied in blocks of
+    :data:`BLOCK_SIZE` bytes, such that it is never read into memory all at
+    once.
+
+    As in :func:`insert_into_str`, a newline is added after the chunks if one
+    is missing, and before the chunks if they are inserted at the end of
+    *source*, and *source* does not end with a newline. Nothing is added if
+    *chunks* are empty.
+
+    If the line before *offset* ends with ``\\r\\n``, the newlines in *chunks*
+    and the added newlines are written as ``\\r\\n`` as well, such that the
+    line endings of *source* are kept.
+    """
+    source.seek(0)
+    remaining = offset
+    tail = b"\n"
+    while remaining > 0:
+        block = source.read(min(BLOCK_SIZE, remaining))
+        if not block:
+            break
+        remaining -= len(block)
+        tail = (tail + block)[-2:]
+        yield block
+    newline = "\r\n" if tail == b"\r\n" else "\n"
+    encoded_newline = newline.encode("utf-8")
+    last_chunk = ""
+    for chunk in chunks:
+        if chunk:
+            # Corner case for when inserting at the end, but the last character
+            # is not a newline.
+            if not last_chunk and not tail.endswith(b"\n"):
+                yield encoded_newline
+            yield chunk.replace("\n", newline).encode("utf-8")
+            last_chunk = chunk
+    # If the inserted text does not end with a newline, add one.
+    if last_chunk and not last_chunk.endswith("\n"):
+        yield encoded_newline
+    while block := source.read(BLOCK_SIZE):
+        yield block
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[IO[bytes]]:
+    """Return a context manager that yields a temporary binary file next to
+    *path*.
+    When the context is exited without an error, the temporary file is flushed
+    to disk and replaces *path*, such that *path* is never partially written,
+    not even if the process is killed. If *path* exists, its permissions are
+    kept. On error, the temporary file is removed.
+
+    If *path* is a symbolic link, the file that it points to is replaced, and
+    the link is kept. Because *path* is replaced by a new file, hard links to
+    it are not updated, and its owner and group are not kept.
+
+    Raises:
+        OSError: input/output error.
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    with tempfile.NamedTemporaryFile(
+        "wb", dir=directory, prefix=".", delete=False
+    ) as fp:
+        try:
+            yield fp
+            fp.flush()
+            os.fsync(fp.fileno())
+            try:
+                os.chmod(fp.name, os.stat(path).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+        except BaseException:
+            fp.close()
+            os.unlink(fp.name)
+            raise
+    os.replace(fp.name, path)
+    _fsync_directory(directory)
+
+
+def write_atomically(path: str, chunks: Iterable[str]) -> None:
+    """Write *chunks* to *path* as UTF-8 with :func:`atomic_write`.
+
+    Raises:
+        OSError: input/output error.
+    """
+    with atomic_write(path) as fp:
+        for chunk in chunks:
+            fp.write(chunk.encode("utf-8"))
+
+
+def _fsync_directory(directory: str) -> None:
+    """Flush the entries of *directory* to disk, such that a rename in it is
+    durable. This does nothing on platforms that cannot open directories.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
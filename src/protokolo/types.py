@@ -13,8 +13,13 @@ from typing import Literal, Mapping, TypeAlias
 #: Anything that looks like a path.
 StrPath: TypeAlias = str | PathLike
 
-#: The supported markup languages.
-SupportedMarkup: TypeAlias = Literal["markdown", "restructuredtext"]
+#: The name of a markup language in
+#: :data:`._formatter.MARKUP_FORMATTER_MAPPING`. The built-in markup languages
+#: are ``markdown`` and ``restructuredtext``, and plugins can add more.
+SupportedMarkup: TypeAlias = str
+
+#: The supported structured export formats.
+ExportFormat: TypeAlias = Literal["json", "ndjson"]
 
 #: A TOML dictionary.
 TOMLType: TypeAlias = Mapping[str, "TOMLValue"]
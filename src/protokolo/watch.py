@@ -0,0 +1,402 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Watch a change log directory for changes, and keep a
+:class:`.compile.Section` tree up to date without reloading the entire
+directory.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import tomllib
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import attrs
+
+from ._formatter import MARKUP_EXTENSION_MAPPING as _MARKUP_EXTENSION_MAPPING
+from ._walk import _suffix
+from .compile import Fragment, Section
+from .exceptions import ProtokoloError
+from .i18n import _
+from .types import StrPath, SupportedMarkup
+
+#: The errors that can occur while (re)loading a part of the section tree.
+#: :class:`UnicodeDecodeError` is raised by fragments that are not valid UTF-8,
+#: for example because they are read while they are being written.
+LOAD_ERRORS = (
+    ProtokoloError,
+    tomllib.TOMLDecodeError,
+    OSError,
+    UnicodeDecodeError,
+)
+
+
+class Watcher(ABC):
+    """Report the paths under a directory that changed."""
+
+    @abstractmethod
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """Wait at most *timeout* seconds (forever if :const:`None`) for
+        changes, and return the paths that changed. The set is empty if nothing
+        changed within *timeout*.
+        """
+
+    def close(self) -> None:
+        """Release the resources of the watcher."""
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class PollingWatcher(Watcher):
+    """A :class:`Watcher` that periodically compares the status of all files
+    and directories under *directory*. This works on all platforms.
+    """
+
+    def __init__(self, directory: StrPath, interval: float = 0.5):
+        self.directory = os.fspath(directory)
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._take_snapshot()
+            changed = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def _take_snapshot(self) -> dict[str, tuple[int, int, int, bool]]:
+        snapshot = {}
+        directories = [self.directory]
+        while directories:
+            try:
+                with os.scandir(directories.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            stat = entry.stat()
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (
+                            stat.st_ino,
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            is_dir,
+                        )
+                        if is_dir:
+                            directories.append(entry.path)
+            except OSError:
+                continue
+        return snapshot
+
+
+class InotifyWatcher(Watcher):
+    """A :class:`Watcher` that uses the Linux inotify API through
+    :mod:`ctypes`. New subdirectories are watched as they are created.
+
+    Raises:
+        OSError: inotify is not available.
+    """
+
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_DELETE_SELF = 0x00000400
+    _IN_MOVE_SELF = 0x00000800
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ISDIR = 0x40000000
+    _MASK = (
+        _IN_MODIFY
+        | _IN_CLOSE_WRITE
+        | _IN_MOVED_FROM
+        | _IN_MOVED_TO
+        | _IN_CREATE
+        | _IN_DELETE
+        | _IN_DELETE_SELF
+        | _IN_MOVE_SELF
+    )
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory: StrPath):
+        if not sys.platform.startswith("linux"):
+            raise OSError(_("inotify is only available on Linux."))
+        self.directory = os.fspath(directory)
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watches: dict[int, str] = {}
+        self._buffer = b""
+        self._add_watches(self.directory)
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            self._buffer += data
+            changed |= self._parse_events()
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _add_watches(self, directory: str) -> None:
+        directories = [directory]
+        while directories:
+            path = directories.pop()
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(path), self._MASK
+            )
+            if wd < 0:
+                continue
+            self._watches[wd] = path
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+            except OSError:
+                continue
+
+    def _parse_events(self) -> set[str]:
+        changed = set()
+        offset = 0
+        size = self._EVENT.size
+        while len(self._buffer) - offset >= size:
+            wd, mask, _, length = self._EVENT.unpack_from(self._buffer, offset)
+            if len(self._buffer) - offset < size + length:
+                break
+            name = self._buffer[offset + size : offset + size + length]
+            offset += size + length
+            if mask & self._IN_Q_OVERFLOW:
+                # Events were lost; report the entire directory as changed.
+                changed.add(self.directory)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & self._IN_IGNORED:
+                del self._watches[wd]
+                continue
+            name = name.rstrip(b"\0")
+            path = (
+                os.path.join(directory, os.fsdecode(name))
+                if name
+                else directory
+            )
+            changed.add(path)
+            if mask & self._IN_ISDIR and mask & (
+                self._IN_CREATE | self._IN_MOVED_TO
+            ):
+                self._add_watches(path)
+                # Files may have been created before the watch was added.
+                changed.add(path)
+        self._buffer = self._buffer[offset:]
+        return changed
+
+
+def create_watcher(directory: StrPath, interval: float = 0.5) -> Watcher:
+    """Create an :class:`InotifyWatcher` for *directory* if inotify is
+    available, or a :class:`PollingWatcher` otherwise.
+    """
+    try:
+        return InotifyWatcher(directory)
+    except (OSError, AttributeError):
+        return PollingWatcher(directory, interval=interval)
+
+
+@attrs.define
+class LiveSection:
+    """A :class:`.compile.Section` tree loaded from *directory* that can be
+    patched with :meth:`apply` when files in the directory change, reloading
+    only the affected fragments and subsections.
+    """
+
+    directory: str = attrs.field(converter=str)
+    markup: SupportedMarkup = "markdown"
+    section_format_pairs: dict[str, str] = attrs.field(factory=dict)
+    section: Section = attrs.field(init=False)
+    _sections: dict[str, Section] = attrs.field(factory=dict, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        self.reload()
+
+    def reload(self) -> None:
+        """Reload the entire tree.
+
+        Raises:
+            OSError: input/output error.
+            ProtokoloTOMLNotFoundError: ``.protokolo.toml`` doesn't exist.
+            ProtokoloTOMLIsADirectoryError: ``.protokolo.toml`` is not a file.
+            tomllib.TOMLDecodeError: ``.protokolo.toml`` couldn't be parsed.
+            DictTypeError: ``.protokolo.toml`` fields have the wrong type.
+            AttributeNotPositiveError: value in ``.protokolo.toml`` should be a
+                positive integer.
+        """
+        self.section = Section.from_directory(
+            self.directory,
+            markup=self.markup,
+            section_format_pairs=self.section_format_pairs,
+        )
+        self._sections = {}
+        self._register(self.section)
+
+    def apply(self, paths: Iterable[str]) -> None:
+        """Patch the tree for the changed *paths*. Changed fragments are read
+        again, and changed directories and ``.protokolo.toml`` files cause their
+        subsection to be reloaded.
+
+        Raises:
+            OSError: input/output error.
+            ProtokoloTOMLNotFoundError: ``.protokolo.toml`` doesn't exist.
+            ProtokoloTOMLIsADirectoryError: ``.protokolo.toml`` is not a file.
+            tomllib.TOMLDecodeError: ``.protokolo.toml`` couldn't be parsed.
+            DictTypeError: ``.protokolo.toml`` fields have the wrong type.
+            AttributeNotPositiveError: value in ``.protokolo.toml`` should be a
+                positive integer.
+        """
+        fragments = set()
+        directories = set()
+        for path in map(os.path.normpath, paths):
+            if os.path.basename(path) == ".protokolo.toml":
+                directories.add(os.path.dirname(path))
+            elif path in self._sections or os.path.isdir(path):
+                directories.add(path)
+            elif _suffix(path) in _MARKUP_EXTENSION_MAPPING[self.markup]:
+                fragments.add(path)
+
+        if os.path.normpath(self.directory) in directories:
+            self.reload()
+            return
+        # Reload the outermost directories first; nested directories are
+        # reloaded along with them.
+        for directory in sorted(directories, key=len):
+            if not any(
+                directory.startswith(other + os.sep)
+                for other in directories
+                if other != directory
+            ):
+                self._reload_directory(directory)
+        for fragment in fragments:
+            if not any(
+                fragment.startswith(directory + os.sep)
+                for directory in directories
+            ):
+                self._reload_fragment(fragment)
+
+    def _register(self, section: Section) -> None:
+        self._sections[os.path.normpath(str(section.source))] = section
+        for subsection in section.subsections:
+            self._register(subsection)
+
+    def _unregister(self, section: Section) -> None:
+        self._sections.pop(os.path.normpath(str(section.source)), None)
+        for subsection in section.subsections:
+            self._unregister(subsection)
+
+    def _reload_directory(self, directory: str) -> None:
+        parent = self._sections.get(os.path.dirname(directory))
+        if parent is None:
+            return
+        old = self._sections.get(directory)
+        if old is not None:
+            self._unregister(old)
+            parent.subsections.discard(old)
+        if not os.path.isfile(os.path.join(directory, ".protokolo.toml")):
+            return
+        new = Section.from_directory(
+            directory,
+            level=parent.attrs.level + 1,
+            markup=self.markup,
+            section_format_pairs=self.section_format_pairs,
+        )
+        parent.subsections.add(new)
+        self._register(new)
+
+    def _reload_fragment(self, path: str) -> None:
+        section = self._sections.get(os.path.dirname(path))
+        if section is None:
+            return
+        for fragment in list(section.fragments):
+            if fragment.source is not None and (
+                os.path.normpath(fragment.source) == path
+            ):
+                section.fragments.discard(fragment)
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as fp:
+                section.fragments.add(Fragment(text=fp.read(), source=path))
+
+
+def watch(  # pylint: disable=too-many-arguments
+    live: LiveSection,
+    watcher: Watcher,
+    render: Callable[[Section], None],
+    on_error: Callable[[Exception], None],
+    *,
+    debounce: float = 0.2,
+    stop: Callable[[], bool] = lambda: False,
+) -> None:
+    """Render *live* once, then wait for changes from *watcher*. Changes are
+    collected until there have been none for *debounce* seconds, after which
+    *live* is patched and rendered again. Errors while patching are passed to
+    *on_error*, after which *live* is reloaded on the next change. The loop
+    ends when *stop* returns :const:`True` after a render.
+    """
+    render(live.section)
+    broken = False
+    while not stop():
+        changed = watcher.wait()
+        while True:
+            more = watcher.wait(timeout=debounce)
+            if not more:
+                break
+            changed |= more
+        try:
+            if broken:
+                live.reload()
+            else:
+                live.apply(changed)
+            broken = False
+        except LOAD_ERRORS as error:
+            broken = True
+            on_error(error)
+            continue
+        render(live.section)
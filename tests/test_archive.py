@@ -0,0 +1,170 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the archiving of fragments."""
+
+import errno
+import hashlib
+import os
+
+import pytest
+from freezegun import freeze_time
+
+from protokolo import archive
+from protokolo.archive import (
+    ArchivedFragment,
+    archive_fragments,
+    check_archive,
+    read_index,
+    release_name,
+)
+from protokolo.compile import Section
+
+
+class TestReleaseName:
+    """Collect all tests for release_name."""
+
+    def test_version(self):
+        """The version is used if it is defined."""
+        assert release_name({"version": "1.0.0"}) == "1.0.0"
+
+    @freeze_time("2023-11-08")
+    def test_date(self):
+        """Otherwise, today's date is used."""
+        assert release_name() == "2023-11-08"
+        assert release_name({"version": ""}) == "2023-11-08"
+
+
+class TestArchiveFragments:
+    """Collect all tests for archive_fragments."""
+
+    @freeze_time("2023-11-08")
+    def test_simple(self, project_dir):
+        """Fragments are moved into the release directory, mirroring the
+        change log directory, and an index with the formatted section titles
+        is written.
+        """
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        (project_dir / "changelog.d/feature/bar.md").write_text("Bar")
+        section = Section.from_directory(
+            project_dir / "changelog.d",
+            section_format_pairs={"version": "1.0.0"},
+        )
+        release_dir = archive_fragments(
+            section,
+            project_dir / "changelog.d",
+            project_dir / "archive",
+            "1.0.0",
+        )
+        assert release_dir == project_dir / "archive/1.0.0"
+        assert not (project_dir / "changelog.d/foo.md").exists()
+        assert not (project_dir / "changelog.d/feature/bar.md").exists()
+        assert (release_dir / "foo.md").read_text() == "Foo"
+        assert (release_dir / "feature/bar.md").read_text() == "Bar"
+        assert read_index(release_dir) == [
+            ArchivedFragment(
+                path="foo.md",
+                sha256=hashlib.sha256(b"Foo").hexdigest(),
+                section="1.0.0 - 2023-11-08",
+            ),
+            ArchivedFragment(
+                path="feature/bar.md",
+                sha256=hashlib.sha256(b"Bar").hexdigest(),
+                section="Features",
+            ),
+        ]
+
+    def test_hash_loaded_text(self, project_dir):
+        """Fragments are hashed by the text that was loaded, not by what is on
+        disk when they are moved.
+        """
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        section = Section.from_directory(project_dir / "changelog.d")
+        (project_dir / "changelog.d/foo.md").write_text("Changed")
+        release_dir = archive_fragments(
+            section,
+            project_dir / "changelog.d",
+            project_dir / "archive",
+            "1.0.0",
+        )
+        assert read_index(release_dir)[0].sha256 == (
+            hashlib.sha256(b"Foo").hexdigest()
+        )
+
+    def test_release_exists(self, project_dir):
+        """If the release directory exists, a number is appended."""
+        (project_dir / "archive/1.0.0").mkdir(parents=True)
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        section = Section.from_directory(project_dir / "changelog.d")
+        release_dir = archive_fragments(
+            section,
+            project_dir / "changelog.d",
+            project_dir / "archive",
+            "1.0.0",
+        )
+        assert release_dir == project_dir / "archive/1.0.0-2"
+        assert (release_dir / "foo.md").exists()
+
+    def test_different_file_system(self, project_dir, monkeypatch):
+        """If the archive is on a different file system, nothing is moved."""
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        section = Section.from_directory(project_dir / "changelog.d")
+        monkeypatch.setattr(
+            archive, "_device", lambda path: hash(os.path.basename(path))
+        )
+        with pytest.raises(OSError) as exc_info:
+            archive_fragments(
+                section,
+                project_dir / "changelog.d",
+                project_dir / "archive",
+                "1.0.0",
+            )
+        assert exc_info.value.errno == errno.EXDEV
+        assert (project_dir / "changelog.d/foo.md").exists()
+        assert not (project_dir / "archive").exists()
+
+    def test_move_error(self, project_dir, monkeypatch):
+        """If a fragment cannot be moved, the fragments that were moved are
+        still indexed.
+        """
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        (project_dir / "changelog.d/feature/bar.md").write_text("Bar")
+        section = Section.from_directory(project_dir / "changelog.d")
+        rename = os.rename
+
+        def fail_on_bar(source, target):
+            if os.path.basename(source) == "bar.md":
+                raise OSError(errno.EXDEV, os.strerror(errno.EXDEV), source)
+            rename(source, target)
+
+        monkeypatch.setattr(os, "rename", fail_on_bar)
+        with pytest.raises(OSError):
+            archive_fragments(
+                section,
+                project_dir / "changelog.d",
+                project_dir / "archive",
+                "1.0.0",
+            )
+        assert [
+            entry.path for entry in read_index(project_dir / "archive/1.0.0")
+        ] == ["foo.md"]
+        assert (project_dir / "changelog.d/feature/bar.md").exists()
+
+
+class TestCheckArchive:
+    """Collect all tests for check_archive."""
+
+    def test_missing_archive(self, project_dir):
+        """An archive that does not exist yet is checked by its nearest
+        existing parent.
+        """
+        check_archive(project_dir / "changelog.d", project_dir / "a/b/c")
+
+    def test_different_file_system(self, project_dir, monkeypatch):
+        """An archive on a different file system is an error."""
+        monkeypatch.setattr(
+            archive, "_device", lambda path: hash(os.path.basename(path))
+        )
+        with pytest.raises(OSError):
+            check_archive(project_dir / "changelog.d", project_dir)
@@ -0,0 +1,259 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the batch compilation code."""
+
+import shutil
+import tomllib
+from pathlib import Path
+
+import pytest
+
+from protokolo._util import cleandoc_nl
+from protokolo.batch import (
+    Package,
+    PackageStatus,
+    compile_package,
+    compile_packages,
+    discover_packages,
+    load_manifest,
+)
+from protokolo.exceptions import DictTypeError, ManifestError
+
+# pylint: disable=redefined-outer-name,unspecified-encoding
+
+
+@pytest.fixture()
+def monorepo(project_dir):
+    """Turn the project directory into a monorepo with the packages ``foo``
+    and ``bar``, each with a global configuration file.
+    """
+    for name in ["foo", "bar"]:
+        package = project_dir / "packages" / name
+        package.mkdir(parents=True)
+        shutil.copytree(project_dir / "changelog.d", package / "changelog.d")
+        shutil.copy(project_dir / "CHANGELOG.md", package / "CHANGELOG.md")
+        (package / ".protokolo.toml").write_text(
+            cleandoc_nl(
+                """
+                [protokolo]
+                changelog = "CHANGELOG.md"
+                directory = "changelog.d"
+                """
+            )
+        )
+        (package / f"changelog.d/feature/{name}.md").write_text(f"- {name}")
+    return project_dir
+
+
+class TestLoadManifest:
+    """Collect all tests for load_manifest."""
+
+    def test_simple(self, monorepo):
+        """Paths are relative to the manifest."""
+        (monorepo / "manifest.toml").write_text(
+            cleandoc_nl(
+                """
+                [[package]]
+                name = "foo"
+                changelog = "packages/foo/CHANGELOG.md"
+                directory = "packages/foo/changelog.d"
+
+                [[package]]
+                changelog = "packages/bar/CHANGELOG.rst"
+                directory = "packages/bar/changelog.d"
+                markup = "restructuredtext"
+                """
+            )
+        )
+        packages = load_manifest(monorepo / "manifest.toml")
+        assert packages == [
+            Package(
+                changelog=monorepo / "packages/foo/CHANGELOG.md",
+                directory=monorepo / "packages/foo/changelog.d",
+                name="foo",
+            ),
+            Package(
+                changelog=monorepo / "packages/bar/CHANGELOG.rst",
+                directory=monorepo / "packages/bar/changelog.d",
+                markup="restructuredtext",
+            ),
+        ]
+        assert packages[1].name == str(monorepo / "packages/bar/changelog.d")
+
+    def test_missing_key(self, monorepo):
+        """A package without a directory is an error."""
+        (monorepo / "manifest.toml").write_text(
+            '[[package]]\nchangelog = "CHANGELOG.md"\n'
+        )
+        with pytest.raises(ManifestError):
+            load_manifest(monorepo / "manifest.toml")
+
+    def test_wrong_markup(self, monorepo):
+        """An unsupported markup is an error."""
+        (monorepo / "manifest.toml").write_text(
+            cleandoc_nl(
+                """
+                [[package]]
+                changelog = "CHANGELOG.md"
+                directory = "changelog.d"
+                markup = "asciidoc"
+                """
+            )
+        )
+        with pytest.raises(ManifestError):
+            load_manifest(monorepo / "manifest.toml")
+
+    def test_wrong_type(self, monorepo):
+        """Values of the wrong type are an error."""
+        (monorepo / "manifest.toml").write_text(
+            '[[package]]\nchangelog = 1\ndirectory = "changelog.d"\n'
+        )
+        with pytest.raises(DictTypeError):
+            load_manifest(monorepo / "manifest.toml")
+
+    def test_invalid_toml(self, monorepo):
+        """Invalid TOML is an error."""
+        (monorepo / "manifest.toml").write_text("{'invalid")
+        with pytest.raises(tomllib.TOMLDecodeError):
+            load_manifest(monorepo / "manifest.toml")
+
+
+class TestDiscoverPackages:
+    """Collect all tests for discover_packages."""
+
+    def test_simple(self, monorepo):
+        """Global configurations are found; section configurations are
+        skipped.
+        """
+        packages, failures = discover_packages(monorepo)
+        assert not failures
+        assert [package.directory for package in packages] == [
+            monorepo / "packages/bar/changelog.d",
+            monorepo / "packages/foo/changelog.d",
+        ]
+
+    def test_hidden_skipped(self, monorepo):
+        """Hidden directories are not searched."""
+        shutil.copytree(monorepo / "packages/foo", monorepo / ".hidden")
+        packages, _ = discover_packages(monorepo)
+        assert len(packages) == 2
+
+    def test_broken(self, monorepo):
+        """Broken configurations are returned as failures."""
+        (monorepo / "packages/foo/.protokolo.toml").write_text("{'invalid")
+        packages, failures = discover_packages(monorepo)
+        assert len(packages) == 1
+        assert len(failures) == 1
+        assert failures[0].status == PackageStatus.ERROR
+        assert "Invalid TOML" in failures[0].message
+
+
+class TestCompilePackage:
+    """Collect all tests for compile_package."""
+
+    def test_compiled(self, monorepo):
+        """The section is compiled into the change log, and the fragments are
+        deleted.
+        """
+        package = Package(
+            changelog=monorepo / "packages/foo/CHANGELOG.md",
+            directory=monorepo / "packages/foo/changelog.d",
+        )
+        result = compile_package(package, {"version": "1.0.0"})
+        assert result.status == PackageStatus.COMPILED
+        assert result.fragments == 1
+        assert "- foo" in package.changelog.read_text()
+        assert "1.0.0" in package.changelog.read_text()
+        assert not (package.directory / "feature/foo.md").exists()
+
+    def test_dry_run(self, monorepo):
+        """Nothing is changed during a dry run."""
+        package = Package(
+            changelog=monorepo / "packages/foo/CHANGELOG.md",
+            directory=monorepo / "packages/foo/changelog.d",
+        )
+        contents = package.changelog.read_text()
+        result = compile_package(package, dry_run=True)
+        assert result.status == PackageStatus.COMPILED
+        assert package.changelog.read_text() == contents
+        assert (package.directory / "feature/foo.md").exists()
+
+    def test_empty(self, monorepo):
+        """A package without fragments is empty."""
+        package = Package(
+            changelog=monorepo / "CHANGELOG.md",
+            directory=monorepo / "changelog.d",
+        )
+        assert compile_package(package).status == PackageStatus.EMPTY
+
+    def test_no_section_tag(self, monorepo):
+        """A change log without a section tag is a failure, and nothing is
+        deleted.
+        """
+        package = Package(
+            changelog=monorepo / "packages/foo/CHANGELOG.md",
+            directory=monorepo / "packages/foo/changelog.d",
+        )
+        package.changelog.write_text("# Change log\n")
+        result = compile_package(package)
+        assert result.status == PackageStatus.ERROR
+        assert "protokolo-section-tag" in result.message
+        assert (package.directory / "feature/foo.md").exists()
+
+    def test_decode_error(self, monorepo):
+        """A fragment that is not valid UTF-8 is a failure, and nothing is
+        changed.
+        """
+        package = Package(
+            changelog=monorepo / "packages/foo/CHANGELOG.md",
+            directory=monorepo / "packages/foo/changelog.d",
+        )
+        contents = package.changelog.read_text()
+        (package.directory / "bad.md").write_bytes(b"\xff")
+        result = compile_package(package)
+        assert result.status == PackageStatus.ERROR
+        assert "utf-8" in result.message
+        assert package.changelog.read_text() == contents
+        assert (package.directory / "feature/foo.md").exists()
+
+
+class TestCompilePackages:
+    """Collect all tests for compile_packages."""
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_order_and_results(self, monorepo, max_workers):
+        """Results are in the order of the packages, regardless of the amount
+        of workers.
+        """
+        packages, _ = discover_packages(monorepo)
+        packages.append(
+            Package(
+                changelog=monorepo / "missing.md",
+                directory=monorepo / "missing",
+            )
+        )
+        results = list(compile_packages(packages, max_workers=max_workers))
+        assert [result.name for result in results] == [
+            package.name for package in packages
+        ]
+        assert [result.status for result in results] == [
+            PackageStatus.COMPILED,
+            PackageStatus.COMPILED,
+            PackageStatus.ERROR,
+        ]
+        assert "- bar" in Path(packages[0].changelog).read_text()
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_decode_error(self, monorepo, max_workers):
+        """A fragment that is not valid UTF-8 does not stop the other
+        packages.
+        """
+        packages, _ = discover_packages(monorepo)
+        (Path(packages[0].directory) / "bad.md").write_bytes(b"\xff")
+        results = list(compile_packages(packages, max_workers=max_workers))
+        assert [result.status for result in results] == [
+            PackageStatus.ERROR,
+            PackageStatus.COMPILED,
+        ]
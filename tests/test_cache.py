@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the persistent load cache."""
+
+import os
+import pickle
+
+from protokolo.cache import (
+    CACHE_FILE_NAME,
+    CacheStats,
+    LoadCache,
+    default_cache_dir,
+)
+
+
+def make_old(path):
+    """Set the modification time of *path* to a long time ago, such that it is
+    outside of the racy window of the cache.
+    """
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+
+class TestDefaultCacheDir:
+    """Collect all tests for default_cache_dir."""
+
+    def test_xdg_cache_home(self, monkeypatch, empty_dir):
+        """Use $XDG_CACHE_HOME if it is set."""
+        monkeypatch.setenv("XDG_CACHE_HOME", str(empty_dir))
+        assert default_cache_dir() == empty_dir / "protokolo"
+
+    def test_home(self, monkeypatch, empty_dir):
+        """Fall back to ~/.cache."""
+        monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+        monkeypatch.setenv("HOME", str(empty_dir))
+        assert default_cache_dir() == empty_dir / ".cache/protokolo"
+
+
+class TestCacheStats:
+    """Collect all tests for CacheStats."""
+
+    def test_hit_rate(self):
+        """The hit rate is the fraction of lookups that were hits."""
+        assert CacheStats(hits=3, misses=1).hit_rate == 0.75
+
+    def test_hit_rate_no_lookups(self):
+        """Without lookups, the hit rate is 0."""
+        assert CacheStats().hit_rate == 0.0
+
+
+class TestLoadCache:
+    """Collect all tests for LoadCache."""
+
+    def test_get_put(self, empty_dir):
+        """A value can be retrieved for an unchanged file."""
+        path = empty_dir / "foo.md"
+        path.write_text("Foo")
+        make_old(path)
+        cache = LoadCache()
+        assert cache.get(str(path), path.stat()) is None
+        cache.put(str(path), path.stat(), "Foo")
+        assert cache.get(str(path), path.stat()) == "Foo"
+        assert cache.stats == CacheStats(hits=1, misses=1)
+
+    def test_changed_file(self, empty_dir):
+        """A value is no longer valid if the file changed."""
+        path = empty_dir / "foo.md"
+        path.write_text("Foo")
+        make_old(path)
+        cache = LoadCache()
+        cache.put(str(path), path.stat(), "Foo")
+        path.write_text("Hello")
+        make_old(path)
+        assert cache.get(str(path), path.stat()) is None
+
+    def test_racy_window(self, empty_dir):
+        """Recently modified files are not cached."""
+        path = empty_dir / "foo.md"
+        path.write_text("Foo")
+        cache = LoadCache()
+        cache.put(str(path), path.stat(), "Foo")
+        assert len(cache) == 0
+
+    def test_max_entries(self, empty_dir):
+        """The least recently used entries are evicted."""
+        cache = LoadCache(max_entries=2)
+        paths = []
+        for name in ["foo", "bar", "baz"]:
+            path = empty_dir / name
+            path.write_text(name)
+            make_old(path)
+            paths.append(path)
+        cache.put(str(paths[0]), paths[0].stat(), "foo")
+        cache.put(str(paths[1]), paths[1].stat(), "bar")
+        # Use foo, making bar the least recently used.
+        assert cache.get(str(paths[0]), paths[0].stat()) == "foo"
+        cache.put(str(paths[2]), paths[2].stat(), "baz")
+        assert len(cache) == 2
+        assert cache.get(str(paths[1]), paths[1].stat()) is None
+        assert cache.get(str(paths[0]), paths[0].stat()) == "foo"
+
+    def test_save_load(self, empty_dir):
+        """The cache persists between instances."""
+        path = empty_dir / "foo.md"
+        path.write_text("Foo")
+        make_old(path)
+        cache = LoadCache.from_directory(empty_dir / "cache")
+        cache.put(str(path), path.stat(), "Foo")
+        cache.save()
+        assert (empty_dir / "cache" / CACHE_FILE_NAME).exists()
+
+        cache = LoadCache.from_directory(empty_dir / "cache")
+        assert cache.get(str(path), path.stat()) == "Foo"
+
+    def test_load_corrupt(self, empty_dir):
+        """A corrupt cache file results in an empty cache."""
+        (empty_dir / CACHE_FILE_NAME).write_text("garbage")
+        cache = LoadCache.from_directory(empty_dir)
+        assert len(cache) == 0
+
+    def test_load_other_version(self, empty_dir):
+        """A cache file of a different version is ignored."""
+        with (empty_dir / CACHE_FILE_NAME).open("wb") as fp:
+            pickle.dump({"version": -1, "entries": {}}, fp)
+        cache = LoadCache.from_directory(empty_dir)
+        assert len(cache) == 0
+
+    def test_clear(self, empty_dir):
+        """Clearing the cache removes its entries and its file."""
+        path = empty_dir / "foo.md"
+        path.write_text("Foo")
+        make_old(path)
+        cache = LoadCache.from_directory(empty_dir)
+        cache.put(str(path), path.stat(), "Foo")
+        cache.save()
+        cache.clear()
+        assert len(cache) == 0
+        assert not (empty_dir / CACHE_FILE_NAME).exists()
+
+    def test_save_in_memory(self):
+        """Saving a cache without a path does nothing."""
+        LoadCache().save()
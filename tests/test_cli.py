@@ -5,17 +5,40 @@
 """Test the formatting code."""
 
 import errno
+import gettext
+import os
+import subprocess
+import sys
 from pathlib import Path
 
+import pytest
 from freezegun import freeze_time
 
 import protokolo
-from protokolo import cli
+from protokolo import _formatter, archive, i18n, initialise, watch
+from protokolo._formatter import (
+    FormatterRegistry,
+    MarkdownFormatter,
+    ReStructuredTextFormatter,
+)
 from protokolo._util import cleandoc_nl
-from protokolo.cli import main
+from protokolo.cli import _default_map, _translate, main
 from protokolo.config import GlobalConfig, SectionAttributes
+from protokolo.journal import Journal, journal_path, temporary_path
 
-# pylint: disable=unspecified-encoding
+# pylint: disable=unspecified-encoding,too-many-public-methods,too-many-lines
+
+#: Modules that are too slow to import for ``protokolo --version``.
+SLOW_MODULES = {
+    "asyncio",
+    "attr",
+    "concurrent.futures",
+    "importlib.metadata",
+    "json",
+    "protokolo.compile",
+    "protokolo.config",
+    "tomllib",
+}
 
 
 def raise_permission(filename):
@@ -55,6 +78,132 @@ class TestMain:
         )
         assert result.output.endswith("Written by Carmen Bianca BAKKER.\n")
 
+    def test_version_imports(self):
+        """protokolo --version only imports what it needs."""
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "from protokolo.client import main; main(['--version'])",
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        assert result.returncode == 0
+        imported = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _self, cumulative, name = line[len("import time:") :].split("|")
+            if not cumulative.strip().isdigit():
+                continue
+            imported.add(name.strip())
+        assert not imported & SLOW_MODULES
+
+    def test_import_does_not_translate(self):
+        """Importing the command-line interface does not load the
+        translations.
+        """
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import protokolo.cli; from protokolo.i18n import translations;"
+                " print(translations.cache_info().misses)",
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        assert result.returncode == 0
+        assert result.stdout == "0\n"
+
+    def test_default_map(self):
+        """The defaults of the subcommands are taken from the global
+        config.
+        """
+        config = GlobalConfig(
+            values={
+                "changelog": "CHANGES.rst",
+                "markup": "restructuredtext",
+                "directory": "changes",
+            }
+        )
+        default_map = _default_map(config)
+        assert default_map["compile"] == {
+            "changelog": "CHANGES.rst",
+            "markup": "restructuredtext",
+            "directory": "changes",
+        }
+        assert default_map["init"] == default_map["compile"]
+        assert default_map["watch"] == default_map["compile"]
+        assert default_map["render"] == {
+            "markup": "restructuredtext",
+            "directory": "changes",
+        }
+
+    def test_help_translated(self, monkeypatch):
+        """Help texts are translated paragraph by paragraph when they are
+        used.
+        """
+
+        class Translations(gettext.NullTranslations):
+            """Translate every message to upper case."""
+
+            def gettext(self, message):
+                return message.upper()
+
+        monkeypatch.setattr(i18n, "translations", Translations)
+        assert _translate("First.\n\nSecond.") == "FIRST.\n\nSECOND."
+
+
+class TestMarkupChoice:
+    """Collect all tests for the --markup option."""
+
+    @pytest.fixture()
+    def registry(self, monkeypatch):
+        """Replace the registry of formatters with one that has an additional
+        formatter.
+        """
+        registry = FormatterRegistry(
+            {
+                "markdown": MarkdownFormatter,
+                "restructuredtext": ReStructuredTextFormatter,
+            },
+            group="protokolo.tests.nothing",
+        )
+        registry.register("html", MarkdownFormatter)
+        monkeypatch.setattr(_formatter, "MARKUP_FORMATTER_MAPPING", registry)
+
+    def test_help(self, runner):
+        """--help lists the markup languages."""
+        result = runner.invoke(main, ["compile", "--help"])
+        assert "--markup [markdown|restructuredtext]" in result.output
+
+    @pytest.mark.usefixtures("registry")
+    def test_help_registered(self, runner):
+        """--help lists registered formatters as well."""
+        result = runner.invoke(main, ["compile", "--help"])
+        assert "--markup [markdown|restructuredtext|html]" in result.output
+
+    @pytest.mark.usefixtures("registry")
+    def test_shell_complete(self):
+        """The markup languages are completed in the shell."""
+        command = main.commands["compile"]
+        ctx = command.make_context("compile", [], resilient_parsing=True)
+        param = next(
+            param for param in command.params if param.name == "markup"
+        )
+        assert [
+            item.value for item in param.type.shell_complete(ctx, param, "")
+        ] == ["markdown", "restructuredtext", "html"]
+        assert [
+            item.value for item in param.type.shell_complete(ctx, param, "r")
+        ] == ["restructuredtext"]
+
 
 class TestCompile:
     """Collect all tests for compile."""
@@ -383,6 +532,33 @@ class TestCompile:
             "Error: There is no 'protokolo-section-tag' in 'CHANGELOG.md'"
             in result.output
         )
+        assert Path("CHANGELOG.md").read_text() == "Hello, world!"
+        assert Path("changelog.d/foo.md").exists()
+        assert not list(Path().glob(".tmp*"))
+
+    def test_changelog_replaced_atomically(self, runner):
+        """The change log is replaced by a new file with the same
+        permissions.
+        """
+        Path("changelog.d/foo.md").write_text("Foo")
+        Path("CHANGELOG.md").chmod(0o640)
+        inode = Path("CHANGELOG.md").stat().st_ino
+        result = runner.invoke(
+            main,
+            [
+                "compile",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+            ],
+        )
+        assert result.exit_code == 0
+        stat = Path("CHANGELOG.md").stat()
+        assert stat.st_ino != inode
+        assert stat.st_mode & 0o777 == 0o640
+        assert "Foo" in Path("CHANGELOG.md").read_text()
+        assert not list(Path().glob(".tmp*"))
 
     @freeze_time("2023-11-08")
     def test_nested_fragments_deleted(self, runner):
@@ -561,6 +737,257 @@ class TestCompile:
             """
         )
 
+    @freeze_time("2023-11-08")
+    def test_jobs(self, runner):
+        """Reading the directory in multiple threads gives the same result as
+        reading it in one.
+        """
+        for i in range(20):
+            Path(f"changelog.d/{i}.md").write_text(f"- {i}")
+            Path(f"changelog.d/feature/{i}.md").write_text(f"- Feature {i}")
+        args = [
+            "compile",
+            "--changelog",
+            "CHANGELOG.md",
+            "--directory",
+            "changelog.d",
+            "--dry-run",
+        ]
+        serial = runner.invoke(main, args)
+        parallel = runner.invoke(main, args + ["--jobs", "4"])
+        assert parallel.exit_code == 0
+        assert parallel.stdout == serial.stdout
+
+    @freeze_time("2023-11-08")
+    def test_cache(self, runner, monkeypatch):
+        """--cache writes a cache file, and does not change the result."""
+        monkeypatch.setenv("XDG_CACHE_HOME", "cache")
+        Path("changelog.d/foo.md").write_text("Foo")
+        args = [
+            "compile",
+            "--changelog",
+            "CHANGELOG.md",
+            "--directory",
+            "changelog.d",
+            "--dry-run",
+        ]
+        uncached = runner.invoke(main, args)
+        first = runner.invoke(main, args + ["--cache"])
+        second = runner.invoke(main, args + ["--cache"])
+        assert Path("cache/protokolo/load-cache.pickle").exists()
+        assert first.stdout == uncached.stdout
+        assert second.stdout == uncached.stdout
+
+    def test_clear_cache(self, runner, monkeypatch):
+        """--clear-cache deletes the cache file."""
+        monkeypatch.setenv("XDG_CACHE_HOME", "cache")
+        Path("changelog.d/foo.md").write_text("Foo")
+        args = [
+            "compile",
+            "--changelog",
+            "CHANGELOG.md",
+            "--directory",
+            "changelog.d",
+            "--dry-run",
+        ]
+        runner.invoke(main, args + ["--cache"])
+        assert Path("cache/protokolo/load-cache.pickle").exists()
+        result = runner.invoke(main, args + ["--clear-cache"])
+        assert result.exit_code == 0
+        assert not Path("cache/protokolo/load-cache.pickle").exists()
+
+    def test_cache_stats(self, runner, monkeypatch):
+        """--cache-stats prints the hit rate to stderr, and a cleared cache
+        has no hits.
+        """
+        monkeypatch.setenv("XDG_CACHE_HOME", "cache")
+        Path("changelog.d/foo.md").write_text("Foo")
+        # Files that were modified very recently are not cached.
+        for path in Path("changelog.d").rglob("*"):
+            os.utime(path, (0, 0))
+        args = [
+            "compile",
+            "--changelog",
+            "CHANGELOG.md",
+            "--directory",
+            "changelog.d",
+            "--dry-run",
+            "--cache",
+            "--cache-stats",
+        ]
+        first = runner.invoke(main, args)
+        assert "0 hits" in first.stderr
+        second = runner.invoke(main, args)
+        assert "100% hit rate" in second.stderr
+        assert "100% hit rate" not in second.stdout
+        cleared = runner.invoke(main, args + ["--clear-cache"])
+        assert "0 hits" in cleared.stderr
+
+    def test_deletion_stats(self, runner):
+        """--deletion-stats prints the amount of deleted fragments to
+        stderr.
+        """
+        Path("changelog.d/foo.md").write_text("Foo")
+        Path("changelog.d/feature/bar.md").write_text("Bar")
+        args = [
+            "compile",
+            "--changelog",
+            "CHANGELOG.md",
+            "--directory",
+            "changelog.d",
+        ]
+        result = runner.invoke(main, args + ["--deletion-stats"])
+        assert result.exit_code == 0
+        assert "Deleted 2 fragments in 2 directories in" in result.stderr
+        assert "0 fragments no longer existed" in result.stderr
+        assert "Deleted" not in result.stdout
+
+    def test_no_deletion_stats(self, runner):
+        """Without --deletion-stats, nothing is printed to stderr."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        result = runner.invoke(
+            main,
+            [
+                "compile",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+            ],
+        )
+        assert result.exit_code == 0
+        assert not result.stderr
+
+    def test_transactional(self, runner):
+        """--transactional gives the same result, and leaves no journal."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        args = [
+            "compile",
+            "--changelog",
+            "CHANGELOG.md",
+            "--directory",
+            "changelog.d",
+        ]
+        expected = runner.invoke(main, args + ["--dry-run"]).stdout
+        result = runner.invoke(main, args + ["--transactional"])
+        assert result.exit_code == 0
+        assert Path("CHANGELOG.md").read_text() == expected
+        assert not Path("changelog.d/foo.md").exists()
+        assert not Path(journal_path("CHANGELOG.md")).exists()
+
+    def test_crlf(self, runner):
+        """A change log with CRLF line endings keeps them."""
+        Path("changelog.d/foo.md").write_text("Foo\nBar")
+        Path("CHANGELOG.md").write_bytes(
+            Path("CHANGELOG.md").read_bytes().replace(b"\n", b"\r\n")
+        )
+        result = runner.invoke(
+            main,
+            [
+                "compile",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+            ],
+        )
+        assert result.exit_code == 0
+        contents = Path("CHANGELOG.md").read_bytes()
+        assert b"Foo\r\nBar\r\n" in contents
+        assert contents.count(b"\n") == contents.count(b"\r\n")
+
+    def test_archive(self, runner):
+        """--archive moves the fragments instead of deleting them."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        result = runner.invoke(
+            main,
+            [
+                "compile",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+                "--format",
+                "version",
+                "1.0.0",
+                "--archive",
+                "archive",
+            ],
+        )
+        assert result.exit_code == 0
+        assert "Foo" in Path("CHANGELOG.md").read_text()
+        assert not Path("changelog.d/foo.md").exists()
+        assert Path("archive/1.0.0/foo.md").read_text() == "Foo"
+        assert Path("archive/1.0.0/index.json").exists()
+
+    def test_archive_different_file_system(self, runner, monkeypatch):
+        """If the archive is on a different file system than the change log
+        directory, nothing is changed.
+        """
+        Path("changelog.d/foo.md").write_text("Foo")
+        contents = Path("CHANGELOG.md").read_text()
+        monkeypatch.setattr(
+            archive, "_device", lambda path: hash(Path(path).name)
+        )
+        result = runner.invoke(
+            main,
+            [
+                "compile",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+                "--archive",
+                "archive",
+            ],
+        )
+        assert result.exit_code == 2
+        assert "same file system" in result.output
+        assert Path("CHANGELOG.md").read_text() == contents
+        assert Path("changelog.d/foo.md").exists()
+
+    def test_archive_transactional(self, runner):
+        """--archive cannot be combined with --transactional."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        result = runner.invoke(
+            main,
+            [
+                "compile",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+                "--archive",
+                "archive",
+                "--transactional",
+            ],
+        )
+        assert result.exit_code != 0
+        assert Path("changelog.d/foo.md").exists()
+
+    def test_recover(self, runner):
+        """An interrupted run is rolled back before compiling."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        Journal(
+            changelog=str(Path("CHANGELOG.md").absolute()),
+            temporary=temporary_path("CHANGELOG.md"),
+        ).write(journal_path("CHANGELOG.md"))
+        Path(temporary_path("CHANGELOG.md")).write_text("Partial")
+        result = runner.invoke(
+            main,
+            [
+                "compile",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+            ],
+        )
+        assert result.exit_code == 0
+        assert "Rolled back the interrupted compilation" in result.stderr
+        assert "Foo" in Path("CHANGELOG.md").read_text()
+        assert not Path(temporary_path("CHANGELOG.md")).exists()
+
 
 class TestInit:
     """Collect all tests for init."""
@@ -656,10 +1083,254 @@ class TestInit:
         """Handle OSErrors"""
         empty_runner.invoke(main, ["init"])
         monkeypatch.setattr(
-            cli,
+            initialise,
             "create_keep_a_changelog",
             raise_permission("changelog.d"),
         )
         result = empty_runner.invoke(main, ["init"])
         assert result.exit_code != 0
         assert "Permission denied" in result.output
+
+
+class TestRender:
+    """Collect all tests for render."""
+
+    @freeze_time("2023-11-08")
+    def test_simple(self, runner):
+        """The section is rendered to several files and STDOUT, each with the
+        fragments in its markup language, and nothing is deleted.
+        """
+        Path("changelog.d/foo.md").write_text("Foo")
+        Path("changelog.d/bar.rst").write_text("Bar")
+        result = runner.invoke(
+            main,
+            [
+                "render",
+                "--directory",
+                "changelog.d",
+                "--output",
+                "markdown",
+                "out.md",
+                "--output",
+                "restructuredtext",
+                "out.rst",
+                "--output",
+                "restructuredtext",
+                "-",
+            ],
+        )
+        assert result.exit_code == 0
+        assert Path("out.md").read_text() == cleandoc_nl(
+            """
+            ## ${version} - 2023-11-08
+
+            Foo
+            """
+        )
+        assert Path("out.rst").read_text() == result.stdout
+        assert result.stdout == cleandoc_nl(
+            """
+            ${version} - 2023-11-08
+            -----------------------
+
+            Bar
+            """
+        )
+        assert Path("changelog.d/foo.md").exists()
+        assert Path("changelog.d/bar.rst").exists()
+
+    def test_identical_to_compile(self, runner):
+        """Every output in a markup language is the section that compile
+        inserts with the same markup language, regardless of --markup.
+        """
+        Path("changelog.d/foo.md").write_text("Foo")
+        Path("changelog.d/feature/bar.rst").write_text("Bar")
+        Path("changelog.d/feature/baz.markdown").write_text("Baz")
+        result = runner.invoke(
+            main,
+            [
+                "render",
+                "--directory",
+                "changelog.d",
+                "--markup",
+                "markdown",
+                "--output",
+                "markdown",
+                "out.md",
+                "--output",
+                "restructuredtext",
+                "out.rst",
+            ],
+        )
+        assert result.exit_code == 0
+        for markup, path in [
+            ("markdown", "out.md"),
+            ("restructuredtext", "out.rst"),
+        ]:
+            compiled = runner.invoke(
+                main,
+                [
+                    "compile",
+                    "--dry-run",
+                    "--changelog",
+                    "CHANGELOG.md",
+                    "--directory",
+                    "changelog.d",
+                    "--markup",
+                    markup,
+                ],
+            )
+            assert compiled.exit_code == 0
+            assert Path(path).read_text() in compiled.stdout
+        assert "Bar" not in Path("out.md").read_text()
+        assert "Baz" not in Path("out.rst").read_text()
+
+    def test_nothing_to_render(self, runner):
+        """If there are no fragments, nothing is written."""
+        result = runner.invoke(
+            main, ["render", "-d", "changelog.d", "-o", "markdown", "out.md"]
+        )
+        assert result.exit_code == 0
+        assert "There are no change log fragments" in result.stdout
+        assert not Path("out.md").exists()
+
+    def test_heading_format_error(self, runner):
+        """A heading that cannot be formatted is a usage error."""
+        Path("changelog.d/feature/.protokolo.toml").write_text(
+            cleandoc_nl(
+                """
+                [protokolo.section]
+                title = "Features"
+                level = 6
+                """
+            )
+        )
+        Path("changelog.d/feature/foo.md").write_text("Foo")
+        Path("changelog.d/feature/foo.rst").write_text("Foo")
+        result = runner.invoke(
+            main,
+            [
+                "render",
+                "--directory",
+                "changelog.d",
+                "--output",
+                "markdown",
+                "out.md",
+                "--output",
+                "restructuredtext",
+                "out.rst",
+            ],
+        )
+        assert result.exit_code == 2
+        assert "too deep" in result.output
+        assert not Path("out.md").exists()
+
+
+class TestWatch:
+    """Collect all tests for watch."""
+
+    @freeze_time("2023-11-08")
+    def test_preview_equals_dry_run(self, runner, monkeypatch):
+        """The preview is identical to the output of compile --dry-run."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        monkeypatch.setattr(
+            watch,
+            "watch",
+            lambda live, watcher, render, on_error, debounce: render(
+                live.section
+            ),
+        )
+        args = ["--changelog", "CHANGELOG.md", "--directory", "changelog.d"]
+        preview = runner.invoke(main, ["watch"] + args)
+        dry_run = runner.invoke(main, ["compile", "--dry-run"] + args)
+        assert preview.exit_code == 0
+        assert preview.stdout == dry_run.stdout
+        assert Path("changelog.d/foo.md").exists()
+
+    def test_output(self, runner, monkeypatch):
+        """The preview can be written to a file."""
+        monkeypatch.setattr(
+            watch,
+            "watch",
+            lambda live, watcher, render, on_error, debounce: render(
+                live.section
+            ),
+        )
+        result = runner.invoke(
+            main,
+            [
+                "watch",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+                "--output",
+                "preview.md",
+            ],
+        )
+        assert result.exit_code == 0
+        assert (
+            Path("preview.md").read_text() == Path("CHANGELOG.md").read_text()
+        )
+
+    def test_load_error(self, runner):
+        """An initial load error is a usage error."""
+        Path("changelog.d/.protokolo.toml").write_text("{'invalid")
+        result = runner.invoke(
+            main,
+            [
+                "watch",
+                "--changelog",
+                "CHANGELOG.md",
+                "--directory",
+                "changelog.d",
+            ],
+        )
+        assert result.exit_code != 0
+        assert "Invalid TOML" in result.output
+
+
+class TestBatch:
+    """Collect all tests for batch."""
+
+    def test_discover(self, runner):
+        """Discovered packages are compiled and summarised."""
+        package = Path("packages/foo")
+        package.mkdir(parents=True)
+        Path("changelog.d").rename(package / "changelog.d")
+        Path("CHANGELOG.md").rename(package / "CHANGELOG.md")
+        (package / ".protokolo.toml").write_text(
+            '[protokolo]\nchangelog = "CHANGELOG.md"\n'
+            'directory = "changelog.d"\n'
+        )
+        (package / "changelog.d/foo.md").write_text("- Foo")
+
+        result = runner.invoke(main, ["batch", "--jobs", "1"])
+        assert result.exit_code == 0
+        assert "compiled" in result.stdout
+        assert "1 compiled, 0 empty, 0 failed" in result.stdout
+        assert "- Foo" in (package / "CHANGELOG.md").read_text()
+
+    def test_manifest_failure(self, runner):
+        """A failing package is reported, and the exit code is 1."""
+        Path("changelog.d/foo.md").write_text("- Foo")
+        Path("manifest.toml").write_text(
+            "[[package]]\n"
+            'changelog = "CHANGELOG.md"\n'
+            'directory = "changelog.d"\n'
+            "[[package]]\n"
+            'changelog = "CHANGELOG.md"\n'
+            'directory = "missing"\n'
+        )
+        result = runner.invoke(
+            main, ["batch", "--manifest", "manifest.toml", "--dry-run"]
+        )
+        assert result.exit_code == 1
+        assert "1 compiled, 0 empty, 1 failed" in result.stdout
+        assert Path("changelog.d/foo.md").exists()
+
+    def test_manifest_invalid(self, runner):
+        """An invalid manifest is a usage error."""
+        Path("manifest.toml").write_text("[[package]]\n")
+        result = runner.invoke(main, ["batch", "--manifest", "manifest.toml"])
+        assert result.exit_code == 2
@@ -4,22 +4,43 @@
 
 """Test the compilation of change log sections and fragments."""
 
+import asyncio
+import os
 import random
+import shutil
+import time
 import tomllib
+import tracemalloc
+from io import StringIO
+from pathlib import PurePath
 
 import pytest
+from freezegun import freeze_time
 
+from protokolo import _walk
 from protokolo._util import cleandoc_nl
-from protokolo.compile import Fragment, Section
+from protokolo._walk import SyscallCounter
+from protokolo.cache import LoadCache
+from protokolo.compile import (
+    Fragment,
+    Section,
+    _SubsectionSet,
+    delete_fragments,
+)
 from protokolo.config import SectionAttributes
 from protokolo.exceptions import (
     AttributeNotPositiveError,
     DictTypeError,
+    HeadingFormatError,
     ProtokoloTOMLIsADirectoryError,
     ProtokoloTOMLNotFoundError,
 )
 
-# pylint: disable=too-many-public-methods
+# pylint: disable=too-many-public-methods,too-many-lines
+
+#: The amount of bytes that a lazy fragment in a section may take up, including
+#: its share of the containers of the section.
+FRAGMENT_BYTE_BUDGET = 300
 
 
 class TestSection:
@@ -50,6 +71,31 @@ class TestSection:
         )
         assert section.compile() == expected
 
+    @freeze_time("2023-11-08", auto_tick_seconds=24 * 60 * 60)
+    def test_compile_date_once(self):
+        """All headings of a compilation agree on $date, even if the day
+        changes halfway.
+        """
+        subsection = Section(
+            attrs=SectionAttributes(title="Subsection $date", level=2)
+        )
+        subsection.fragments.add(Fragment("- world"))
+        section = Section(
+            attrs=SectionAttributes(title="Section $date", level=1)
+        )
+        section.subsections.add(subsection)
+
+        expected = cleandoc_nl(
+            """
+            # Section 2023-11-08
+
+            ## Subsection 2023-11-08
+
+            - world
+            """
+        )
+        assert section.compile() == expected
+
     def test_compile_multiple_fragments(self):
         """Test the compilation of a single section with multiple fragments.
 
@@ -321,6 +367,54 @@ class TestSection:
         )
         assert section.compile() == expected
 
+    def test_iter_compile(self):
+        """iter_compile yields the headings and fragments separately, and they
+        join up to the result of compile.
+        """
+        subsection = Section(
+            attrs=SectionAttributes(title="Subsection", level=2)
+        )
+        subsection.fragments.add(Fragment("- world"))
+        section = Section(attrs=SectionAttributes(title="Section", level=1))
+        section.fragments.add(Fragment("- hello"))
+        section.subsections.add(subsection)
+
+        assert list(section.iter_compile()) == [
+            "# Section",
+            "\n",
+            "\n",
+            "- hello\n",
+            "\n",
+            "## Subsection",
+            "\n",
+            "\n",
+            "- world\n",
+        ]
+        assert "".join(section.iter_compile()) == section.compile()
+
+    def test_iter_compile_empty(self):
+        """An empty section yields nothing."""
+        assert not list(Section().iter_compile())
+
+    def test_iter_compile_heading_format_error(self):
+        """Heading errors are raised before anything is yielded."""
+        subsection = Section(attrs=SectionAttributes(title="", level=2))
+        subsection.fragments.add(Fragment("- world"))
+        section = Section(attrs=SectionAttributes(title="Section", level=1))
+        section.fragments.add(Fragment("- hello"))
+        section.subsections.add(subsection)
+        with pytest.raises(HeadingFormatError):
+            section.iter_compile()
+
+    def test_write_to_buffer(self):
+        """write_to_buffer writes the compiled section to a buffer."""
+        section = Section(attrs=SectionAttributes(title="Section", level=1))
+        section.fragments.add(Fragment("- hello"))
+        buffer = StringIO()
+        buffer.write("Foo\n")
+        assert section.write_to_buffer(buffer) is buffer
+        assert buffer.getvalue() == "Foo\n" + section.compile()
+
     def test_is_empty_simple(self):
         """A section with neither fragments nor subsections is empty."""
         section = Section()
@@ -349,6 +443,284 @@ class TestSection:
         assert not subsection.is_empty()
         assert not section.is_empty()
 
+    def test_counts(self):
+        """Fragment and byte counts include all descendants, and are updated
+        when fragments and subsections are added and removed.
+        """
+        section = Section()
+        subsection = Section()
+        subsubsection = Section()
+        subsection.subsections.add(subsubsection)
+        section.subsections.add(subsection)
+        assert section.nonempty_descendant_count() == 0
+
+        fragment = Fragment("Fóó")
+        subsubsection.fragments.add(fragment)
+        assert section.fragment_count() == 1
+        assert section.byte_count() == 5
+        assert section.nonempty_descendant_count() == 2
+        assert not section.is_empty()
+
+        section.fragments.add(Fragment("Bar"))
+        assert section.fragment_count() == 2
+        assert section.byte_count() == 8
+        assert subsection.fragment_count() == 1
+
+        subsubsection.fragments.discard(fragment)
+        assert section.fragment_count() == 1
+        assert section.nonempty_descendant_count() == 0
+        assert subsection.is_empty()
+
+        subsubsection.fragments.add(fragment)
+        section.subsections.discard(subsection)
+        assert section.fragment_count() == 1
+        assert section.nonempty_descendant_count() == 0
+        assert subsection.fragment_count() == 1
+
+    def test_counts_duplicate_fragment(self):
+        """Adding an equal fragment twice counts once."""
+        section = Section()
+        section.fragments.add(Fragment("Foo", source="foo.md"))
+        section.fragments.add(Fragment("Foo", source="foo.md"))
+        assert section.fragment_count() == 1
+
+    def test_counts_assignment(self):
+        """Assigning to fragments or subsections replaces their contents."""
+        section = Section()
+        subsection = Section()
+        subsection.fragments = {Fragment("Foo"), Fragment("Bar")}
+        section.subsections = [subsection]
+        assert section.fragment_count() == 2
+        subsection.fragments = set()
+        assert section.is_empty()
+
+    def test_subsection_of_two_sections(self):
+        """A subsection cannot be added to a second section, unless it is
+        removed from the first section before.
+        """
+        section_1 = Section()
+        section_2 = Section()
+        subsection = Section()
+        subsection.fragments.add(Fragment("Foo"))
+        section_1.subsections.add(subsection)
+        with pytest.raises(ValueError):
+            section_2.subsections.add(subsection)
+        with pytest.raises(ValueError):
+            section_2.subsections.update([Section(), Section(), subsection])
+        with pytest.raises(ValueError):
+            section_2.subsections = [subsection]
+        assert section_1.fragment_count() == 1
+        assert not section_2.subsections
+        section_1.subsections.discard(subsection)
+        section_2.subsections.add(subsection)
+        assert section_1.is_empty()
+        assert section_2.fragment_count() == 1
+
+    def test_byte_count_lazy(self, empty_dir):
+        """The sizes of fragments are only determined when the byte count is
+        requested.
+        """
+        section = Section()
+        subsection = Section()
+        section.subsections.add(subsection)
+        subsection.fragments.add(Fragment(source="missing.md"))
+        assert section.fragment_count() == 1
+        with pytest.raises(OSError):
+            section.byte_count()
+        (empty_dir / "missing.md").write_text("Foo")
+        assert section.byte_count() == 3
+        subsection.fragments.add(Fragment("Bar"))
+        assert section.byte_count() == 6
+        assert subsection.byte_count() == 6
+
+    def test_is_empty_deep(self):
+        """Emptiness of a deep tree is updated without recursion."""
+        root = Section()
+        section = root
+        for _ in range(5000):
+            subsection = Section()
+            section.subsections.add(subsection)
+            section = subsection
+        fragment = Fragment("Foo")
+        section.fragments.add(fragment)
+        assert not root.is_empty()
+        assert root.nonempty_descendant_count() == 5000
+        section.fragments.discard(fragment)
+        assert root.is_empty()
+
+    def test_fragments_kept_sorted(self):
+        """Fragments are iterated in sorted order, regardless of the order in
+        which they were added.
+        """
+        section = Section()
+        texts = [str(number) for number in range(100)]
+        random.shuffle(texts)
+        for text in texts:
+            section.fragments.add(Fragment(text, source=f"{text}.md"))
+        section.fragments.update([Fragment("No source"), Fragment("A")])
+        assert [fragment.text for fragment in section.fragments] == sorted(
+            texts
+        ) + ["A", "No source"]
+        assert list(section.sorted_fragments()) == list(section.fragments)
+
+    def test_fragments_update_deduplicates(self):
+        """Bulk updates skip fragments that are already present."""
+        section = Section()
+        section.fragments.add(Fragment("Foo", source="foo.md"))
+        section.fragments.update(
+            [
+                Fragment("Foo", source="foo.md"),
+                Fragment("Bar", source="bar.md"),
+                Fragment("Bar", source="bar.md"),
+            ]
+        )
+        assert len(section.fragments) == 2
+        assert section.fragment_count() == 2
+
+    def test_fragments_discard(self):
+        """Fragments can be discarded by an equal fragment, including ones
+        that share a sort key with others.
+        """
+        section = Section()
+        section.fragments.update(
+            [
+                Fragment("Foo", source="a/foo.md"),
+                Fragment("Foo", source="b/foo.md"),
+            ]
+        )
+        section.fragments.discard(Fragment("Foo", source="b/foo.md"))
+        assert [str(fragment.source) for fragment in section.fragments] == [
+            "a/foo.md"
+        ]
+        assert Fragment("Foo", source="a/foo.md") in section.fragments
+        assert Fragment("Foo", source="b/foo.md") not in section.fragments
+
+    def test_contains_other_type(self):
+        """Objects that are not children of the right type are not in the
+        sets.
+        """
+        section = Section()
+        section.fragments.add(Fragment("Foo"))
+        section.subsections.add(Section())
+        assert "Foo" not in section.fragments
+        assert None not in section.fragments
+        assert Section() not in section.fragments
+        assert None not in section.subsections
+        assert Fragment("Foo") not in section.subsections
+
+    def test_discard_other_type(self):
+        """Discarding objects that are not children of the right type does
+        nothing.
+        """
+        section = Section()
+        section.fragments.add(Fragment("Foo"))
+        section.subsections.add(Section())
+        section.fragments.discard("Foo")  # type: ignore
+        section.subsections.discard(None)  # type: ignore
+        assert len(section.fragments) == 1
+        assert len(section.subsections) == 1
+        assert section.fragment_count() == 1
+
+    def test_subsections_discard_changed_title(self):
+        """A subsection whose title changed after it was added can still be
+        discarded.
+        """
+        section = Section()
+        subsection = Section(attrs=SectionAttributes(title="Foo"))
+        section.subsections.add(subsection)
+        subsection.attrs.title = "Bar"
+        assert subsection in section.subsections
+        section.subsections.discard(subsection)
+        assert not section.subsections
+
+    def test_subsections_resorted_after_change(self):
+        """Subsections are sorted again if their order or title changed after
+        they were added.
+        """
+        section = Section()
+        first = Section(attrs=SectionAttributes(title="Foo"))
+        second = Section(attrs=SectionAttributes(title="Bar"))
+        section.subsections.update([first, second])
+        assert list(section.sorted_subsections()) == [second, first]
+        first.attrs.order = 1
+        assert list(section.sorted_subsections()) == [first, second]
+        first.attrs.order = None
+        first.attrs.title = "Baz"
+        assert list(section.sorted_subsections()) == [second, first]
+
+    def test_subsections_resorted_after_attrs_replaced(self):
+        """Subsections are sorted again if their attributes are replaced."""
+        section = Section()
+        first = Section(attrs=SectionAttributes(title="Foo"))
+        second = Section(attrs=SectionAttributes(title="Bar"))
+        section.subsections.update([first, second])
+        assert list(section.sorted_subsections()) == [second, first]
+        first.attrs = SectionAttributes(title="Baz", order=1)
+        assert list(section.sorted_subsections()) == [first, second]
+        second.attrs["order"] = 1
+        second.attrs["level"] = 2
+        assert list(section.sorted_subsections()) == [second, first]
+
+    def test_subsections_not_resorted_on_access(self, monkeypatch):
+        """The sort keys of subsections are not computed again on access if no
+        title or order changed.
+        """
+        # pylint: disable=protected-access
+        section = Section()
+        section.subsections.update(
+            Section(attrs=SectionAttributes(title=title)) for title in "cab"
+        )
+        list(section.subsections)
+        calls = []
+        sort_key = _SubsectionSet._sort_key
+
+        def counting_sort_key(value):
+            calls.append(value)
+            return sort_key(value)
+
+        monkeypatch.setattr(
+            _SubsectionSet, "_sort_key", staticmethod(counting_sort_key)
+        )
+        list(section.subsections)
+        list(section.sorted_subsections())
+        assert not calls
+        next(iter(section.subsections)).attrs.level = 2
+        list(section.subsections)
+        assert not calls
+        next(iter(section.subsections)).attrs.title = "d"
+        assert [
+            subsection.attrs.title for subsection in section.subsections
+        ] == ["b", "c", "d"]
+        assert len(calls) == 3
+
+    def test_subsections_add_after_change(self):
+        """Adding a subsection again after its title changed does not add it
+        twice.
+        """
+        section = Section(attrs=SectionAttributes(title="Z"))
+        first = Section(attrs=SectionAttributes(title="x", level=2))
+        second = Section(attrs=SectionAttributes(title="y", level=2))
+        first.fragments.add(Fragment("Foo"))
+        second.fragments.add(Fragment("Bar"))
+        section.subsections.update([first, second])
+        second.attrs.title = "a"
+        section.subsections.add(second)
+        assert len(section.subsections) == 2
+        assert section.fragment_count() == 2
+        assert section.compile() == cleandoc_nl(
+            """
+            # Z
+
+            ## a
+
+            Bar
+
+            ## x
+
+            Foo
+            """
+        )
+
     def test_from_directory(self, project_dir):
         """A very simple case of generating a Section from a directory."""
         (project_dir / "changelog.d/announcement.md").write_text(
@@ -454,6 +826,13 @@ class TestSection:
             project_dir / "changelog.d/.protokolo.toml"
         )
 
+    def test_from_directory_directory_not_found_error(self, project_dir):
+        """If the directory does not exist, raise a
+        ProtokoloTOMLNotFoundError.
+        """
+        with pytest.raises(ProtokoloTOMLNotFoundError):
+            Section.from_directory(project_dir / "missing")
+
     def test_from_directory_no_protokolo_toml_in_subdir(self, project_dir):
         """If there is no .protokolo.toml in the subdirectory, don't count it as
         a section.
@@ -475,6 +854,216 @@ class TestSection:
             project_dir / "changelog.d/.protokolo.toml"
         )
 
+    def test_from_directory_counter(self, project_dir):
+        """Count the directory scans and the opened files."""
+        for i in range(10):
+            (project_dir / f"changelog.d/feature/{i}.md").write_text(str(i))
+        counter = SyscallCounter()
+        Section.from_directory(project_dir / "changelog.d", counter=counter)
+        assert counter.scandir == 2
+        assert counter.stat == 0
+        # Two .protokolo.toml files and ten fragments.
+        assert counter.open == 12
+
+    def test_from_directory_max_workers(self, project_dir):
+        """Reading the files in a thread pool creates an identical Section."""
+        for i in range(20):
+            (project_dir / f"changelog.d/{i}.md").write_text(f"- {i}")
+            (project_dir / f"changelog.d/feature/{i}.md").write_text(f"- {i}")
+        serial = Section.from_directory(project_dir / "changelog.d")
+        parallel = Section.from_directory(
+            project_dir / "changelog.d", max_workers=4
+        )
+        assert parallel.compile() == serial.compile()
+        assert parallel.fragments == serial.fragments
+
+    def test_from_directory_max_workers_decode_error(self, project_dir):
+        """Errors are raised identically when reading in a thread pool."""
+        (project_dir / "changelog.d/feature/.protokolo.toml").write_text(
+            "{'hello': 'world'}"
+        )
+        with pytest.raises(tomllib.TOMLDecodeError) as exc_info:
+            Section.from_directory(project_dir / "changelog.d", max_workers=4)
+        assert (
+            "Invalid TOML in"
+            f" '{project_dir / 'changelog.d/feature/.protokolo.toml'}'"
+            in str(exc_info.value)
+        )
+
+    def test_from_directory_max_workers_counter(self, project_dir):
+        """Files read in the thread pool are counted."""
+        for i in range(10):
+            (project_dir / f"changelog.d/feature/{i}.md").write_text(str(i))
+        counter = SyscallCounter()
+        Section.from_directory(
+            project_dir / "changelog.d", counter=counter, max_workers=4
+        )
+        assert counter.open == 12
+
+    def test_afrom_directory(self, project_dir):
+        """Loading a directory asynchronously creates an identical Section."""
+        for i in range(20):
+            (project_dir / f"changelog.d/{i}.md").write_text(f"- {i}")
+            (project_dir / f"changelog.d/feature/{i}.md").write_text(f"- {i}")
+        section = Section.from_directory(
+            project_dir / "changelog.d",
+            section_format_pairs={"version": "0.2.0"},
+        )
+        asection = asyncio.run(
+            Section.afrom_directory(
+                project_dir / "changelog.d",
+                section_format_pairs={"version": "0.2.0"},
+                max_concurrency=4,
+            )
+        )
+        assert asection.compile() == section.compile()
+        assert asection.attrs == section.attrs
+        assert asection.fragments == section.fragments
+
+    def test_afrom_directory_does_not_block(self, project_dir, monkeypatch):
+        """The event loop keeps running other coroutines while the files are
+        read.
+        """
+        # pylint: disable=protected-access
+        for i in range(8):
+            (project_dir / f"changelog.d/{i}.md").write_text(f"- {i}")
+        reading = 0
+        read = _walk._read
+
+        def slow_read(path, binary):
+            nonlocal reading
+            reading += 1
+            try:
+                time.sleep(0.01)
+                return read(path, binary)
+            finally:
+                reading -= 1
+
+        monkeypatch.setattr(_walk, "_read", slow_read)
+        ticks_while_reading = 0
+
+        async def ticker(done):
+            nonlocal ticks_while_reading
+            while not done.is_set():
+                if reading:
+                    ticks_while_reading += 1
+                await asyncio.sleep(0)
+
+        async def load():
+            done = asyncio.Event()
+            ticking = asyncio.create_task(ticker(done))
+            try:
+                return await Section.afrom_directory(
+                    project_dir / "changelog.d", max_concurrency=2
+                )
+            finally:
+                done.set()
+                await ticking
+
+        section = asyncio.run(load())
+        assert section.fragment_count() == 8
+        assert ticks_while_reading > 0
+
+    def test_afrom_directory_not_found_error(self, project_dir):
+        """Errors are raised from the coroutine."""
+        (project_dir / "changelog.d/.protokolo.toml").unlink()
+        with pytest.raises(ProtokoloTOMLNotFoundError):
+            asyncio.run(Section.afrom_directory(project_dir / "changelog.d"))
+
+    def test_from_directory_lazy(self, project_dir):
+        """Lazy fragments are not read until the section is compiled."""
+        for i in range(10):
+            (project_dir / f"changelog.d/feature/{i}.md").write_text(f"- {i}")
+        eager = Section.from_directory(project_dir / "changelog.d")
+        counter = SyscallCounter()
+        lazy = Section.from_directory(
+            project_dir / "changelog.d", counter=counter, lazy=True
+        )
+        # Only the .protokolo.toml files are opened.
+        assert counter.open == 2
+        assert counter.stat == 10
+        subsection = next(iter(lazy.subsections))
+        assert all(fragment.is_lazy for fragment in subsection.fragments)
+        # The sizes were taken from the stat calls above.
+        assert all(fragment.size == 3 for fragment in subsection.fragments)
+        assert counter.stat == 10
+        assert lazy.compile() == eager.compile()
+
+    def test_from_directory_counts(self, project_dir):
+        """Loading from a directory computes the counts, which are the same
+        for lazy and eager fragments.
+        """
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        (project_dir / "changelog.d/feature/bar.md").write_text("Barbaz")
+        for lazy in [False, True]:
+            section = Section.from_directory(
+                project_dir / "changelog.d", lazy=lazy
+            )
+            assert section.fragment_count() == 2
+            assert section.byte_count() == 9
+            assert section.nonempty_descendant_count() == 1
+
+    def test_from_directory_lazy_max_workers(self, project_dir):
+        """Lazy loading and a thread pool can be combined."""
+        for i in range(10):
+            (project_dir / f"changelog.d/feature/{i}.md").write_text(f"- {i}")
+        eager = Section.from_directory(project_dir / "changelog.d")
+        counter = SyscallCounter()
+        lazy = Section.from_directory(
+            project_dir / "changelog.d",
+            counter=counter,
+            max_workers=4,
+            lazy=True,
+        )
+        assert counter.open == 2
+        assert lazy.compile() == eager.compile()
+
+    def test_compile_releases_lazy_fragments(self, project_dir):
+        """After compilation, the text of lazy fragments is released, and read
+        again on the next compilation.
+        """
+        path = project_dir / "changelog.d/foo.md"
+        path.write_text("Foo")
+        section = Section.from_directory(project_dir / "changelog.d", lazy=True)
+        assert "Foo" in section.compile()
+        path.write_text("Bar")
+        assert "Bar" in section.compile()
+
+    def test_from_directory_cache(self, project_dir):
+        """Unchanged files are loaded from the cache."""
+        changelog_d = project_dir / "changelog.d"
+        for i in range(10):
+            (changelog_d / f"feature/{i}.md").write_text(f"- {i}")
+        for path in changelog_d.glob("**/*"):
+            os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        cache = LoadCache()
+        first = Section.from_directory(changelog_d, cache=cache)
+        assert cache.stats.hit_rate == 0
+
+        counter = SyscallCounter()
+        second = Section.from_directory(
+            changelog_d, cache=cache, counter=counter
+        )
+        assert cache.stats.hits == 12
+        assert counter.open == 0
+        assert second.compile() == first.compile()
+        assert second.attrs == first.attrs
+
+    def test_from_directory_cache_changed(self, project_dir):
+        """Changed files are loaded again."""
+        changelog_d = project_dir / "changelog.d"
+        (changelog_d / "foo.md").write_text("Foo")
+        for path in changelog_d.glob("**/*"):
+            os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        cache = LoadCache()
+        Section.from_directory(changelog_d, cache=cache, max_workers=4)
+
+        (changelog_d / "foo.md").write_text("Bar")
+        section = Section.from_directory(
+            changelog_d, cache=cache, max_workers=4
+        )
+        assert "Bar" in section.compile()
+
 
 class TestFragment:
     """Collect all tests for Fragment."""
@@ -488,3 +1077,140 @@ class TestFragment:
         """Add missing newline to fragment."""
         fragment = Fragment("Foo")
         assert fragment.compile() == "Foo\n"
+
+    def test_lazy(self, empty_dir):
+        """A fragment without text is read from its source on first access."""
+        (empty_dir / "foo.md").write_text("Foo")
+        fragment = Fragment(source=empty_dir / "foo.md")
+        assert fragment.is_lazy
+        (empty_dir / "foo.md").write_text("Bar")
+        assert fragment.text == "Bar"
+        assert fragment.compile() == "Bar\n"
+
+    def test_lazy_release(self, empty_dir):
+        """A released lazy fragment is read again."""
+        (empty_dir / "foo.md").write_text("Foo")
+        fragment = Fragment(source=empty_dir / "foo.md")
+        assert fragment.text == "Foo"
+        (empty_dir / "foo.md").write_text("Bar")
+        assert fragment.text == "Foo"
+        fragment.release()
+        assert fragment.text == "Bar"
+
+    def test_release_not_lazy(self):
+        """Releasing a fragment that is not lazy does nothing."""
+        fragment = Fragment("Foo", source="foo.md")
+        assert not fragment.is_lazy
+        fragment.release()
+        assert fragment.text == "Foo"
+
+    def test_lazy_equality(self, empty_dir):
+        """Lazy fragments are equal if their sources are equal."""
+        (empty_dir / "foo.md").write_text("Foo")
+        fragment_1 = Fragment(source=empty_dir / "foo.md")
+        fragment_2 = Fragment(source=empty_dir / "foo.md")
+        assert fragment_1 == fragment_2
+        assert fragment_1.text
+        assert fragment_1 == fragment_2
+        assert hash(fragment_1) == hash(fragment_2)
+
+    def test_size(self):
+        """The size is the length of the UTF-8 encoded text."""
+        assert Fragment("Fóó").size == 5
+
+    def test_size_lazy(self, empty_dir):
+        """The size of a lazy fragment is the size of its source, and does not
+        require reading it.
+        """
+        (empty_dir / "foo.md").write_text("Foo")
+        fragment = Fragment(source=empty_dir / "foo.md")
+        assert fragment.size == 3
+        (empty_dir / "foo.md").unlink()
+        assert fragment.size == 3
+
+    def test_source_is_path(self):
+        """The source is stored as a string, but returned as a path."""
+        fragment = Fragment("Foo", source="feature/foo.md")
+        assert fragment.source == PurePath("feature/foo.md")
+        assert Fragment("Foo").source is None
+
+    def test_memory_budget(self):
+        """A lazy fragment in a section takes up little memory."""
+        paths = [f"changelog.d/feature/{i}.md" for i in range(10_000)]
+        section = Section()
+        tracemalloc.start()
+        try:
+            section.fragments.update(
+                Fragment(source=path, size=3) for path in paths
+            )
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert len(section.fragments) == len(paths)
+        assert size / len(paths) < FRAGMENT_BYTE_BUDGET
+
+    def test_hash_large_text(self):
+        """Fragments with a large text are hashed without hashing all of the
+        text, and remain equal only if their texts are equal.
+        """
+        text = "Foo" * 100_000
+        fragment_1 = Fragment(text)
+        fragment_2 = Fragment(text[:-1] + "x")
+        assert hash(fragment_1) == hash(fragment_2)
+        assert fragment_1 != fragment_2
+        assert hash(fragment_1) == hash(Fragment(text))
+
+    def test_no_text_no_source(self):
+        """A fragment needs either text or a source."""
+        with pytest.raises(ValueError):
+            Fragment()
+
+
+class TestDeleteFragments:
+    """Collect all tests for delete_fragments."""
+
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_simple(self, project_dir, max_workers):
+        """All fragments are deleted, grouped by directory."""
+        for i in range(5):
+            (project_dir / f"changelog.d/{i}.md").write_text("Foo")
+            (project_dir / f"changelog.d/feature/{i}.md").write_text("Foo")
+        section = Section.from_directory(project_dir / "changelog.d")
+        stats = delete_fragments(section, max_workers=max_workers)
+        assert stats.deleted == 10
+        assert stats.missing == 0
+        assert stats.directories == 2
+        assert stats.seconds >= 0
+        assert not list((project_dir / "changelog.d").glob("**/*.md"))
+        assert (project_dir / "changelog.d/.protokolo.toml").exists()
+
+    def test_missing(self, project_dir):
+        """Files and directories that no longer exist are skipped."""
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        (project_dir / "changelog.d/bar.md").write_text("Bar")
+        (project_dir / "changelog.d/feature/baz.md").write_text("Baz")
+        section = Section.from_directory(project_dir / "changelog.d")
+        (project_dir / "changelog.d/foo.md").unlink()
+        shutil.rmtree(project_dir / "changelog.d/feature")
+        stats = delete_fragments(section)
+        assert (stats.deleted, stats.missing) == (1, 2)
+        assert not (project_dir / "changelog.d/bar.md").exists()
+
+    def test_relative(self, project_dir):
+        """Fragments with relative sources are deleted relative to the
+        working directory.
+        """
+        section = Section()
+        section.fragments.add(Fragment("Foo", source="foo.md"))
+        (project_dir / "foo.md").write_text("Foo")
+        assert delete_fragments(section).deleted == 1
+        assert not (project_dir / "foo.md").exists()
+
+    def test_without_dir_fd(self, project_dir, monkeypatch):
+        """Platforms without dir_fd support are handled."""
+        monkeypatch.setattr(os, "supports_dir_fd", set())
+        (project_dir / "changelog.d/foo.md").write_text("Foo")
+        section = Section.from_directory(project_dir / "changelog.d")
+        section.fragments.add(Fragment("Bar", source="missing/bar.md"))
+        stats = delete_fragments(section)
+        assert (stats.deleted, stats.missing) == (1, 1)
@@ -151,6 +151,38 @@ class TestTOMLConfig:
         assert config[("foo", "bar")] == "baz"
         assert config["foo"] == {"bar": "baz"}
 
+    def test_values_not_shared(self):
+        """Changing the TOMLConfig object does not change the dictionary from
+        which it was created, and vice versa.
+        """
+        values = {"foo": {"bar": "baz"}, "qux": 1}
+        config = TOMLConfig.from_dict(values)
+        values["qux"] = 2
+        config[("foo", "bar")] = "quux"
+        assert values == {"foo": {"bar": "baz"}, "qux": 2}
+        assert config["qux"] == 1
+
+        config = TOMLConfig.from_dict(values)
+        nested = config["foo"]
+        assert isinstance(nested, dict)
+        nested["bar"] = "quux"
+        assert values["foo"] == {"bar": "baz"}
+
+    def test_no_copy_without_nested_values(self, monkeypatch):
+        """Values are not copied if there are no nested values."""
+        deepcopy = MagicMock()
+        monkeypatch.setattr("protokolo.config.deepcopy", deepcopy)
+        config = SectionAttributes.from_dict({"title": "Foo", "bar": "baz"})
+        config.title = "Bar"
+        assert config.as_dict()["title"] == "Bar"
+        assert not deepcopy.called
+
+    def test_as_dict_read_only(self):
+        """The mapping returned by as_dict cannot be changed."""
+        config = TOMLConfig.from_dict({"foo": "bar"})
+        with pytest.raises(TypeError):
+            config.as_dict()["foo"] = "baz"  # type: ignore
+
     def test_validate_simple(self):
         """Validate correctly identifies wrong types."""
         config = TOMLConfig()
@@ -262,6 +294,42 @@ class TestSectionAttributes:
             assert error.expected_type == str
             assert error.got == value
 
+    def test_from_dict_bool_level(self):
+        """A bool is not accepted as an int."""
+        with pytest.raises(DictTypeError) as exc_info:
+            SectionAttributes.from_dict({"level": True})
+        assert exc_info.value.key == "level"
+        assert exc_info.value.expected_type == int
+
+    def test_from_dict_datetime_as_date(self):
+        """Subclasses of an expected type are accepted."""
+        now = datetime.now()
+        attrs = SectionAttributes.from_dict({"date": now, "dates": [now]})
+        assert attrs["date"] == now
+
+    def test_validate_after_change(self):
+        """Validation uses the annotations of the class after values are
+        changed.
+        """
+        attrs = SectionAttributes.from_dict({"title": "Foo"})
+        attrs["title"] = 1
+        with pytest.raises(DictTypeError) as exc_info:
+            attrs.validate()
+        assert exc_info.value.expected_type == str
+
+    def test_properties_in_sync(self):
+        """The properties reflect changes made through item assignment, and
+        vice versa.
+        """
+        attrs = SectionAttributes.from_dict({"title": "Foo", "order": 2})
+        assert (attrs.title, attrs.level, attrs.order) == ("Foo", 1, 2)
+        attrs["title"] = "Bar"
+        attrs[["level"]] = 3
+        assert (attrs.title, attrs.level) == ("Bar", 3)
+        attrs.order = None
+        assert attrs["order"] is None
+        assert attrs.as_dict()["order"] is None
+
     def test_from_dict_subdict(self):
         """Don't raise an error if there is a subdict."""
         attrs = SectionAttributes.from_dict({"foo": {"bar": "quz"}})
@@ -0,0 +1,210 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the daemon and its client."""
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+from freezegun import freeze_time
+
+from protokolo import __version__, client
+from protokolo._protocol import (
+    PROTOCOL_VERSION,
+    SOCKET_ENV_VAR,
+    is_private_directory,
+    significant_env,
+)
+from protokolo.cache import LoadCache
+from protokolo.cli import main
+from protokolo.client import forward
+from protokolo.daemon import DaemonServer, run_request
+
+# pylint: disable=unused-argument,unspecified-encoding
+
+ARGS = [
+    "compile",
+    "--changelog",
+    "CHANGELOG.md",
+    "--directory",
+    "changelog.d",
+    "--dry-run",
+]
+
+
+def _request(args: list[str]) -> dict:
+    return {
+        "version": PROTOCOL_VERSION,
+        "protokolo_version": __version__,
+        "args": args,
+        "prog_name": "protokolo",
+        "cwd": os.getcwd(),
+        "env": significant_env(),
+    }
+
+
+@pytest.fixture()
+def socket_path(project_dir):
+    """Run a daemon in a thread, and return the path to its socket."""
+    path = str(project_dir / "run/daemon.sock")
+    server = DaemonServer(path, main)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class TestRunRequest:
+    """Collect all tests for run_request."""
+
+    @freeze_time("2023-11-08")
+    def test_identical(self, runner):
+        """The result is identical to running in-process."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        Path("changelog.d/feature/bar.md").write_text("Bar")
+        expected = runner.invoke(main, ARGS)
+        response = run_request(_request(ARGS), main, {})
+        assert response["status"] == "ok"
+        assert response["exit_code"] == expected.exit_code == 0
+        assert response["stdout"] == expected.stdout
+        assert Path("changelog.d/foo.md").exists()
+
+    def test_error_identical(self, runner):
+        """Errors are identical to running in-process."""
+        Path("changelog.d/.protokolo.toml").write_text("{'invalid")
+        expected = runner.invoke(main, ARGS)
+        response = run_request(_request(ARGS), main, {})
+        assert response["exit_code"] == expected.exit_code == 2
+        assert response["stderr"] == expected.stderr
+
+    def test_warm_cache(self, runner):
+        """The second request is served from the in-memory cache."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        cache = LoadCache(racy_window_ns=0)
+        caches = {os.path.realpath(os.getcwd()): cache}
+        first = run_request(_request(ARGS), main, caches)
+        second = run_request(_request(ARGS), main, caches)
+        assert second["stdout"] == first["stdout"]
+        assert cache.stats.hits == 3
+
+    def test_not_dry_run(self, runner):
+        """Requests that would write to the file system are declined."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        args = [arg for arg in ARGS if arg != "--dry-run"]
+        assert run_request(_request(args), main, {}) == {
+            "status": "unsupported"
+        }
+        assert run_request(_request(["init"]), main, {}) == {
+            "status": "unsupported"
+        }
+        assert Path("changelog.d/foo.md").exists()
+
+    def test_env_mismatch(self, runner, monkeypatch):
+        """Requests from a different environment are declined."""
+        request = _request(ARGS)
+        monkeypatch.setenv("TZ", "Europe/Amsterdam")
+        assert run_request(request, main, {}) == {"status": "unsupported"}
+
+    def test_version_mismatch(self, runner):
+        """Requests from a client with a different version of protokolo are
+        declined.
+        """
+        Path("changelog.d/foo.md").write_text("Foo")
+        request = _request(ARGS)
+        request["protokolo_version"] = "0.0.0"
+        assert run_request(request, main, {}) == {"status": "unsupported"}
+        del request["protokolo_version"]
+        assert run_request(request, main, {}) == {"status": "unsupported"}
+
+
+class TestDaemonServer:
+    """Collect all tests for DaemonServer."""
+
+    def test_creates_private_directory(self, project_dir):
+        """The directory of the socket is created private."""
+        server = DaemonServer(str(project_dir / "run/daemon.sock"), main)
+        server.server_close()
+        assert is_private_directory(str(project_dir / "run"))
+
+    def test_shared_directory(self, project_dir):
+        """The daemon refuses to start in a directory that other users can
+        access.
+        """
+        (project_dir / "run").mkdir(mode=0o755)
+        (project_dir / "run").chmod(0o755)
+        with pytest.raises(OSError):
+            DaemonServer(str(project_dir / "run/daemon.sock"), main)
+        assert not (project_dir / "run/daemon.sock").exists()
+
+    def test_symlink_directory(self, project_dir):
+        """The daemon refuses to start in a symbolic link to a directory."""
+        (project_dir / "private").mkdir(mode=0o700)
+        (project_dir / "run").symlink_to(project_dir / "private")
+        with pytest.raises(OSError):
+            DaemonServer(str(project_dir / "run/daemon.sock"), main)
+
+
+class TestClient:
+    """Collect all tests for the client."""
+
+    @freeze_time("2023-11-08")
+    def test_forward(self, runner, socket_path):
+        """Requests are forwarded over the socket."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        expected = runner.invoke(main, ARGS)
+        response = forward(ARGS, socket_path)
+        assert response is not None
+        assert response["stdout"] == expected.stdout
+
+    def test_forward_shared_directory(self, socket_path):
+        """If other users can access the directory of the socket, the request
+        is not sent.
+        """
+        os.chmod(os.path.dirname(socket_path), 0o755)
+        assert forward(ARGS, socket_path) is None
+
+    def test_forward_no_daemon(self, project_dir):
+        """Without a daemon, forward returns None."""
+        assert forward(ARGS, str(project_dir / "missing.sock")) is None
+
+    @freeze_time("2023-11-08")
+    def test_main_fallback(self, runner, capsys, monkeypatch):
+        """If the daemon cannot be reached, the command runs in-process."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        expected = runner.invoke(main, ARGS)
+        monkeypatch.setenv(SOCKET_ENV_VAR, "missing.sock")
+        with pytest.raises(SystemExit) as exc_info:
+            client.main(ARGS)
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == expected.stdout
+
+    @freeze_time("2023-11-08")
+    def test_main_forward(self, runner, socket_path, capsys, monkeypatch):
+        """If the daemon can be reached, its result is printed."""
+        Path("changelog.d/foo.md").write_text("Foo")
+        expected = runner.invoke(main, ARGS)
+        monkeypatch.setenv(SOCKET_ENV_VAR, socket_path)
+        with pytest.raises(SystemExit) as exc_info:
+            client.main(ARGS)
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == expected.stdout
+
+    @pytest.mark.parametrize(
+        "args, expected",
+        [
+            (ARGS, True),
+            (["compile", "-n"], True),
+            (["compile"], False),
+            (["compile", "--dry-run", "--help"], False),
+            (["init", "--dry-run"], False),
+            ([], False),
+        ],
+    )
+    def test_is_forwardable(self, args, expected):
+        """Only compile --dry-run is forwarded."""
+        assert client.is_forwardable(args) == expected
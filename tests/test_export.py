@@ -0,0 +1,162 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the JSON and NDJSON export of sections."""
+
+import json
+from datetime import date
+
+import pytest
+
+from protokolo.compile import Fragment, Section
+from protokolo.config import SectionAttributes
+from protokolo.exceptions import HeadingFormatError
+from protokolo.export import iter_json, iter_ndjson
+
+
+def _section() -> Section:
+    feature = Section(
+        attrs=SectionAttributes(title="Features", level=2, order=1),
+        source="changelog.d/feature",
+    )
+    feature.fragments.add(
+        Fragment("- Bar", source="changelog.d/feature/bar.md")
+    )
+    empty = Section(attrs=SectionAttributes(title="Empty", level=2))
+    fix = Section(attrs=SectionAttributes(title="Fixes", level=2, order=2))
+    fix.fragments.add(Fragment("- Baz\n"))
+    section = Section(
+        attrs=SectionAttributes(title="Release $date", level=1),
+        source="changelog.d",
+    )
+    section.fragments.add(Fragment("- Foo", source="changelog.d/foo.md"))
+    section.subsections = [fix, empty, feature]
+    return section
+
+
+class TestIterJson:
+    """Collect all tests for iter_json."""
+
+    def test_simple(self):
+        """The section is exported as a tree in order, without empty
+        subsections.
+        """
+        text = "".join(iter_json(_section(), date(2023, 11, 8)))
+        assert text.endswith("}\n")
+        assert json.loads(text) == {
+            "title": "Release 2023-11-08",
+            "level": 1,
+            "order": None,
+            "source": "changelog.d",
+            "fragments": [{"source": "changelog.d/foo.md", "text": "- Foo"}],
+            "subsections": [
+                {
+                    "title": "Features",
+                    "level": 2,
+                    "order": 1,
+                    "source": "changelog.d/feature",
+                    "fragments": [
+                        {
+                            "source": "changelog.d/feature/bar.md",
+                            "text": "- Bar",
+                        }
+                    ],
+                    "subsections": [],
+                },
+                {
+                    "title": "Fixes",
+                    "level": 2,
+                    "order": 2,
+                    "source": None,
+                    "fragments": [{"source": None, "text": "- Baz\n"}],
+                    "subsections": [],
+                },
+            ],
+        }
+
+    def test_empty(self):
+        """An empty section is still exported."""
+        section = Section(attrs=SectionAttributes(title="Foo", level=1))
+        assert json.loads("".join(iter_json(section)))["fragments"] == []
+
+    def test_heading_error(self):
+        """Titles are formatted before anything is yielded."""
+        section = _section()
+        section.attrs.title = ""
+        with pytest.raises(HeadingFormatError):
+            iter_json(section)
+
+
+class TestIterNdjson:
+    """Collect all tests for iter_ndjson."""
+
+    def test_simple(self):
+        """Every section and fragment is a record on its own line."""
+        lines = list(iter_ndjson(_section(), date(2023, 11, 8)))
+        assert all(line.endswith("\n") for line in lines)
+        assert [json.loads(line) for line in lines] == [
+            {
+                "type": "section",
+                "id": 0,
+                "parent": None,
+                "title": "Release 2023-11-08",
+                "level": 1,
+                "order": None,
+                "source": "changelog.d",
+            },
+            {
+                "type": "fragment",
+                "section": 0,
+                "source": "changelog.d/foo.md",
+                "text": "- Foo",
+            },
+            {
+                "type": "section",
+                "id": 1,
+                "parent": 0,
+                "title": "Features",
+                "level": 2,
+                "order": 1,
+                "source": "changelog.d/feature",
+            },
+            {
+                "type": "fragment",
+                "section": 1,
+                "source": "changelog.d/feature/bar.md",
+                "text": "- Bar",
+            },
+            {
+                "type": "section",
+                "id": 2,
+                "parent": 0,
+                "title": "Fixes",
+                "level": 2,
+                "order": 2,
+                "source": None,
+            },
+            {
+                "type": "fragment",
+                "section": 2,
+                "source": None,
+                "text": "- Baz\n",
+            },
+        ]
+
+    def test_deep(self):
+        """Deep trees are exported without recursion."""
+        section = Section(attrs=SectionAttributes(title="Root", level=1))
+        current = section
+        for level in range(2, 2002):
+            subsection = Section(
+                attrs=SectionAttributes(title="Sub", level=level)
+            )
+            current.subsections.add(subsection)
+            current = subsection
+        current.fragments.add(Fragment("Foo"))
+        lines = list(iter_ndjson(section))
+        assert len(lines) == 2002
+        assert json.loads(lines[-1])["section"] == 2000
+        text = "".join(iter_json(section))
+        assert text.count('"title":"Sub"') == 2000
+        assert text.endswith("]}" * 2001 + "\n")
@@ -4,15 +4,61 @@
 
 """Test the formatting code."""
 
+import importlib.metadata
 from datetime import date
+from importlib.metadata import EntryPoint
 from inspect import cleandoc
 
 import pytest
 from freezegun import freeze_time
 
-from protokolo._formatter import MarkdownFormatter, ReStructuredTextFormatter
+from protokolo._formatter import (
+    ENTRY_POINT_GROUP,
+    MARKUP_EXTENSION_MAPPING,
+    FormatterRegistry,
+    MarkdownFormatter,
+    MarkupFormatter,
+    ReStructuredTextFormatter,
+)
 from protokolo.config import SectionAttributes
-from protokolo.exceptions import HeadingFormatError
+from protokolo.exceptions import FormatterError, HeadingFormatError
+
+# pylint: disable=redefined-outer-name,unused-argument
+
+
+class HTMLFormatter(MarkupFormatter):
+    """A formatter that is registered as a plugin in the tests."""
+
+    extensions = frozenset({".html"})
+
+    @classmethod
+    def _format_section(cls, title: str, level: int) -> str:
+        return f"<h{level}>{title}</h{level}>"
+
+
+@pytest.fixture()
+def entry_points(monkeypatch):
+    """Register plugins as entry points, and return the group names that were
+    requested from the metadata.
+    """
+    requested = []
+    plugins = [
+        EntryPoint("html", f"{__name__}:HTMLFormatter", ENTRY_POINT_GROUP),
+        EntryPoint("markdown", f"{__name__}:HTMLFormatter", ENTRY_POINT_GROUP),
+        EntryPoint("broken", "protokolo_nonexistent:Foo", ENTRY_POINT_GROUP),
+        EntryPoint("wrong", "datetime:date", ENTRY_POINT_GROUP),
+    ]
+
+    def fake_entry_points(group):
+        requested.append(group)
+        return [plugin for plugin in plugins if plugin.group == group]
+
+    monkeypatch.setattr(importlib.metadata, "entry_points", fake_entry_points)
+    return requested
+
+
+def _registry() -> FormatterRegistry:
+    return FormatterRegistry({"markdown": MarkdownFormatter})
 
 
 class TestMarkdownFormatter:
@@ -139,6 +185,48 @@ class TestMarkdownFormatter:
             == "# Foo $title"
         )
 
+    @freeze_time("2023-11-08")
+    def test_format_section_format_today(self):
+        """If today is given, $date is replaced with it instead."""
+        assert (
+            MarkdownFormatter.format_section(
+                SectionAttributes(title="Foo $date", level=1),
+                today=date(2023, 10, 25),
+            )
+            == "# Foo 2023-10-25"
+        )
+
+    def test_format_title(self):
+        """format_title replaces placeholders without adding markup."""
+        assert (
+            MarkdownFormatter.format_title(
+                SectionAttributes(title="Foo $bar", level=2, values={"bar": 1})
+            )
+            == "Foo 1"
+        )
+
+    def test_format_section_cached_values(self):
+        """Cached headings are distinguished by the rendered values, even if
+        the values compare equal.
+        """
+        results = [
+            MarkdownFormatter.format_section(
+                SectionAttributes(
+                    title="Foo $bar", level=1, values={"bar": value}
+                )
+            )
+            for value in (1, 1.0, True)
+        ]
+        assert results == ["# Foo 1", "# Foo 1.0", "# Foo True"]
+
+    def test_format_section_cached_level(self):
+        """Cached headings are distinguished by their level and markup."""
+        attrs = SectionAttributes(title="Foo", level=1)
+        assert MarkdownFormatter.format_section(attrs) == "# Foo"
+        attrs.level = 2
+        assert MarkdownFormatter.format_section(attrs) == "## Foo"
+        assert ReStructuredTextFormatter.format_section(attrs) == "Foo\n---"
+
 
 class TestReStructuredTextFormatter:
     """Collect all tests for ReStructuredTextFormatter."""
@@ -193,3 +281,67 @@ class TestReStructuredTextFormatter:
             =======
             """
         )
+
+
+class TestFormatterRegistry:
+    """Collect all tests for FormatterRegistry."""
+
+    def test_builtin_is_lazy(self, entry_points):
+        """Built-in formatters are found without discovering plugins."""
+        registry = _registry()
+        assert registry["markdown"] is MarkdownFormatter
+        assert "markdown" in registry
+        assert not entry_points
+
+    def test_plugin(self, entry_points):
+        """Plugins are discovered once, and loaded when they are looked up."""
+        registry = _registry()
+        assert "html" in registry
+        assert registry["html"] is HTMLFormatter
+        assert registry["html"] is HTMLFormatter
+        assert entry_points == [ENTRY_POINT_GROUP]
+        assert (
+            registry["html"].format_section(
+                SectionAttributes(title="Foo", level=2)
+            )
+            == "<h2>Foo</h2>"
+        )
+
+    def test_builtin_not_replaced(self, entry_points):
+        """Plugins cannot replace built-in formatters."""
+        registry = _registry()
+        assert list(registry) == ["markdown", "html", "broken", "wrong"]
+        assert len(registry) == 4
+        assert registry["markdown"] is MarkdownFormatter
+
+    def test_missing(self, entry_points):
+        """Unknown markup languages raise KeyError."""
+        registry = _registry()
+        assert "asciidoc" not in registry
+        with pytest.raises(KeyError):
+            registry["asciidoc"]  # pylint: disable=pointless-statement
+
+    def test_broken(self, entry_points):
+        """A plugin that cannot be imported is an error, but only once it is
+        looked up.
+        """
+        registry = _registry()
+        assert "broken" in registry
+        with pytest.raises(FormatterError):
+            registry["broken"]  # pylint: disable=pointless-statement
+
+    def test_not_a_formatter(self, entry_points):
+        """A plugin must be a subclass of MarkupFormatter."""
+        with pytest.raises(FormatterError):
+            _registry()["wrong"]  # pylint: disable=expression-not-assigned
+
+    def test_register(self):
+        """Formatters can be registered without entry points."""
+        registry = _registry()
+        registry.register("html", HTMLFormatter)
+        assert registry["html"] is HTMLFormatter
+
+    def test_extensions(self):
+        """The extension mapping follows the registry."""
+        assert MARKUP_EXTENSION_MAPPING["markdown"] == {".md", ".markdown"}
+        assert MARKUP_EXTENSION_MAPPING["restructuredtext"] == {".rst"}
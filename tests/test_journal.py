@@ -0,0 +1,192 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the transactional compilation code."""
+
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from protokolo.compile import Section
+from protokolo.exceptions import JournalError
+from protokolo.journal import (
+    Journal,
+    Recovery,
+    compile_transactionally,
+    journal_path,
+    recover,
+    temporary_path,
+)
+
+# pylint: disable=redefined-outer-name,unused-argument,unspecified-encoding
+
+
+@pytest.fixture()
+def section(project_dir):
+    """Return the section of the project directory with two fragments."""
+    Path("changelog.d/foo.md").write_text("Foo")
+    Path("changelog.d/feature/bar.md").write_text("Bar")
+    return Section.from_directory("changelog.d")
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _journal(changelog_hash: str | None = None) -> Journal:
+    return Journal(
+        changelog=str(Path("CHANGELOG.md").absolute()),
+        temporary=temporary_path("CHANGELOG.md"),
+        fragments={
+            str(Path("changelog.d/foo.md").absolute()): _hash("Foo"),
+            str(Path("changelog.d/feature/bar.md").absolute()): _hash("Bar"),
+        },
+        changelog_hash=changelog_hash,
+    )
+
+
+def _leftovers() -> list[str]:
+    return [path.name for path in Path().iterdir() if "protokolo-" in path.name]
+
+
+class TestCompileTransactionally:
+    """Collect all tests for compile_transactionally."""
+
+    def test_simple(self, section):
+        """The change log is replaced, the fragments are deleted, and nothing
+        is left behind.
+        """
+        compile_transactionally(section, "CHANGELOG.md", [b"Foo\n", b"Bar\n"])
+        assert Path("CHANGELOG.md").read_text() == "Foo\nBar\n"
+        assert not Path("changelog.d/foo.md").exists()
+        assert not Path("changelog.d/feature/bar.md").exists()
+        assert not _leftovers()
+
+    def test_error(self, section):
+        """If the contents cannot be produced, nothing is changed."""
+        contents = Path("CHANGELOG.md").read_text()
+
+        def chunks():
+            yield b"Foo\n"
+            raise KeyboardInterrupt()
+
+        with pytest.raises(KeyboardInterrupt):
+            compile_transactionally(section, "CHANGELOG.md", chunks())
+        assert Path("CHANGELOG.md").read_text() == contents
+        assert Path("changelog.d/foo.md").exists()
+        assert not _leftovers()
+
+    def test_symlink(self, section):
+        """If the change log is a symbolic link, the file that it points to is
+        replaced, and the link is kept.
+        """
+        Path("CHANGELOG.md").rename("real.md")
+        Path("CHANGELOG.md").symlink_to("real.md")
+        compile_transactionally(section, "CHANGELOG.md", [b"Foo\n"])
+        assert Path("CHANGELOG.md").is_symlink()
+        assert Path("real.md").read_text() == "Foo\n"
+        assert not _leftovers()
+
+    def test_journal_exists(self, section):
+        """If there is already a journal, nothing is done."""
+        _journal().write(journal_path("CHANGELOG.md"))
+        with pytest.raises(JournalError):
+            compile_transactionally(section, "CHANGELOG.md", [b"Foo\n"])
+        assert Path("changelog.d/foo.md").exists()
+
+    def test_fragment_changed_after_load(self, section):
+        """A fragment that is changed after it was loaded is not deleted,
+        because its new text was not compiled.
+        """
+        Path("changelog.d/foo.md").write_text("Changed")
+        compile_transactionally(section, "CHANGELOG.md", [b"Foo\n"])
+        assert Path("changelog.d/foo.md").read_text() == "Changed"
+        assert not Path("changelog.d/feature/bar.md").exists()
+
+    def test_fragment_crlf(self, project_dir):
+        """A fragment with CRLF line endings is deleted, although its loaded
+        text differs from its bytes.
+        """
+        Path("changelog.d/foo.md").write_bytes(b"Foo\r\nBar\r\n")
+        section = Section.from_directory("changelog.d")
+        compile_transactionally(section, "CHANGELOG.md", [b"Foo\n"])
+        assert not Path("changelog.d/foo.md").exists()
+
+
+class TestJournal:
+    """Collect all tests for Journal."""
+
+    def test_create(self, project_dir):
+        """A journal that is created can be read back."""
+        journal = _journal()
+        journal.create(journal_path("CHANGELOG.md"))
+        assert Journal.read(journal_path("CHANGELOG.md")) == journal
+
+    def test_create_exists(self, project_dir):
+        """A journal is not created if the file already exists."""
+        Path(journal_path("CHANGELOG.md")).write_text("Other")
+        with pytest.raises(FileExistsError):
+            _journal().create(journal_path("CHANGELOG.md"))
+        assert Path(journal_path("CHANGELOG.md")).read_text() == "Other"
+
+
+class TestRecover:
+    """Collect all tests for recover."""
+
+    def test_nothing(self, section):
+        """Without a journal, there is nothing to recover."""
+        assert recover("CHANGELOG.md") is None
+
+    def test_prepared(self, section):
+        """A prepared journal is rolled back."""
+        contents = Path("CHANGELOG.md").read_text()
+        _journal().write(journal_path("CHANGELOG.md"))
+        Path(temporary_path("CHANGELOG.md")).write_text("Partial")
+        assert recover("CHANGELOG.md") == Recovery.ROLLED_BACK
+        assert Path("CHANGELOG.md").read_text() == contents
+        assert Path("changelog.d/foo.md").exists()
+        assert not _leftovers()
+
+    def test_committed(self, section):
+        """A committed journal is completed, but changed fragments are not
+        deleted.
+        """
+        _journal(_hash("New\n")).write(journal_path("CHANGELOG.md"))
+        Path(temporary_path("CHANGELOG.md")).write_text("New\n")
+        Path("changelog.d/feature/bar.md").write_text("Changed")
+        assert recover("CHANGELOG.md") == Recovery.COMMITTED
+        assert Path("CHANGELOG.md").read_text() == "New\n"
+        assert not Path("changelog.d/foo.md").exists()
+        assert Path("changelog.d/feature/bar.md").exists()
+        assert not _leftovers()
+
+    def test_committed_already_replaced(self, section):
+        """If the change log was already replaced, the fragments are still
+        deleted.
+        """
+        _journal(_hash("New\n")).write(journal_path("CHANGELOG.md"))
+        Path("CHANGELOG.md").write_text("New\n")
+        Path("changelog.d/foo.md").unlink()
+        assert recover("CHANGELOG.md") == Recovery.COMMITTED
+        assert not Path("changelog.d/feature/bar.md").exists()
+        assert not _leftovers()
+
+    def test_committed_corrupt(self, section):
+        """A committed journal whose temporary file does not match is rolled
+        back.
+        """
+        contents = Path("CHANGELOG.md").read_text()
+        _journal(_hash("New\n")).write(journal_path("CHANGELOG.md"))
+        Path(temporary_path("CHANGELOG.md")).write_text("Ne")
+        assert recover("CHANGELOG.md") == Recovery.ROLLED_BACK
+        assert Path("CHANGELOG.md").read_text() == contents
+        assert Path("changelog.d/foo.md").exists()
+        assert not _leftovers()
+
+    def test_invalid(self, section):
+        """An invalid journal is an error."""
+        Path(journal_path("CHANGELOG.md")).write_text("{'invalid")
+        with pytest.raises(JournalError):
+            recover("CHANGELOG.md")
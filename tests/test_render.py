@@ -0,0 +1,183 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the rendering of a section into several markup languages."""
+
+import json
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from protokolo._util import cleandoc_nl
+from protokolo.compile import Fragment, Section
+from protokolo.config import SectionAttributes
+from protokolo.exceptions import HeadingFormatError
+from protokolo.render import render_extensions, render_section
+
+# pylint: disable=unspecified-encoding,unused-argument
+
+
+def _section(level: int = 1) -> Section:
+    subsection = Section(
+        attrs=SectionAttributes(title="Features", level=level + 1)
+    )
+    subsection.fragments.add(Fragment("- Bar"))
+    section = Section(
+        attrs=SectionAttributes(title="Release $date", level=level)
+    )
+    section.fragments.add(Fragment("- Foo"))
+    section.subsections.add(subsection)
+    return section
+
+
+class TestRenderSection:
+    """Collect all tests for render_section."""
+
+    def test_simple(self, empty_dir):
+        """Every output is written in its own markup language, with the same
+        fragments.
+        """
+        render_section(
+            _section(),
+            [
+                ("markdown", "out.md"),
+                ("restructuredtext", "out.rst"),
+                ("markdown", Path("again.md")),
+            ],
+            today=date(2023, 11, 8),
+        )
+        expected_md = cleandoc_nl(
+            """
+            # Release 2023-11-08
+
+            - Foo
+
+            ## Features
+
+            - Bar
+            """
+        )
+        assert Path("out.md").read_text() == expected_md
+        assert Path("again.md").read_text() == expected_md
+        assert Path("out.rst").read_text() == cleandoc_nl(
+            """
+            Release 2023-11-08
+            ==================
+
+            - Foo
+
+            Features
+            --------
+
+            - Bar
+            """
+        )
+
+    def test_export(self, empty_dir):
+        """Outputs can also be in an export format."""
+        render_section(
+            _section(),
+            [("markdown", "out.md"), ("ndjson", "out.ndjson")],
+            today=date(2023, 11, 8),
+        )
+        records = [
+            json.loads(line)
+            for line in Path("out.ndjson").read_text().splitlines()
+        ]
+        assert [record["type"] for record in records] == [
+            "section",
+            "fragment",
+            "section",
+            "fragment",
+        ]
+        assert records[0]["title"] == "Release 2023-11-08"
+
+    def test_fragments_by_markup(self, empty_dir):
+        """Every output in a markup language contains only the fragments in
+        that markup language. Exports contain the fragments in the markup
+        language of the section.
+        """
+        section = Section(
+            attrs=SectionAttributes(title="Release"), markup="markdown"
+        )
+        section.fragments.update(
+            [
+                Fragment("- Foo", source="foo.md"),
+                Fragment("- Bar", source="bar.rst"),
+                Fragment("- Baz"),
+            ]
+        )
+        render_section(
+            section,
+            [
+                ("markdown", "out.md"),
+                ("restructuredtext", "out.rst"),
+                ("json", "out.json"),
+            ],
+        )
+        assert Path("out.md").read_text() == cleandoc_nl(
+            """
+            # Release
+
+            - Foo
+            - Baz
+            """
+        )
+        assert Path("out.rst").read_text() == cleandoc_nl(
+            """
+            Release
+            =======
+
+            - Bar
+            - Baz
+            """
+        )
+        assert [
+            fragment["text"]
+            for fragment in json.loads(Path("out.json").read_text())[
+                "fragments"
+            ]
+        ] == ["- Foo", "- Baz"]
+        assert len(section.fragments) == 3
+
+    def test_heading_error(self, empty_dir):
+        """If a heading cannot be formatted in one markup language, nothing is
+        written.
+        """
+        with pytest.raises(HeadingFormatError):
+            render_section(
+                _section(level=5),
+                [("markdown", "out.md"), ("restructuredtext", "out.rst")],
+            )
+        assert not list(Path().iterdir())
+
+    def test_oserror(self, empty_dir):
+        """If an output cannot be written, the others are still written."""
+        with pytest.raises(OSError):
+            render_section(
+                _section(),
+                [("markdown", "missing/out.md"), ("markdown", "out.md")],
+            )
+        assert Path("out.md").exists()
+
+
+class TestRenderExtensions:
+    """Collect all tests for render_extensions."""
+
+    def test_simple(self):
+        """The suffixes of the markup language of the section and of all
+        outputs in a markup language are included.
+        """
+        assert render_extensions("markdown", ["restructuredtext", "json"]) == {
+            ".md",
+            ".markdown",
+            ".rst",
+        }
+
+    def test_export_only(self):
+        """If all outputs are in an export format, only the suffixes of the
+        markup language of the section are included.
+        """
+        assert render_extensions("restructuredtext", ["ndjson"]) == {".rst"}
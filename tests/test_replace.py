@@ -4,8 +4,21 @@
 
 """Test the find-and-insert code."""
 
+import os
+
+import pytest
+
 from protokolo._util import cleandoc_nl
-from protokolo.replace import find_first_occurrence, insert_into_str
+from protokolo.exceptions import SectionTagNotFoundError
+from protokolo.replace import (
+    atomic_write,
+    find_first_occurrence,
+    find_occurrence_offset,
+    find_section_tag,
+    insert_into_str,
+    iter_insert_at_offset,
+    write_atomically,
+)
 
 
 class TestInsertIntoStr:
@@ -156,3 +169,171 @@ class TestFindFirstOccurrence:
             """
         )
         assert find_first_occurrence("hello world", source) is None
+
+
+def _binary_file(directory, contents: str):
+    path = directory / "CHANGELOG.md"
+    path.write_bytes(contents.encode("utf-8"))
+    return path.open("rb")
+
+
+class TestFindOccurrenceOffset:
+    """Collect all tests for find_occurrence_offset."""
+
+    def test_simple(self, empty_dir):
+        """The offset is the end of the line that contains the text, in
+        bytes.
+        """
+        with _binary_file(
+            empty_dir, "Lïne 1\nLine 2 hello world\nLine 3\n"
+        ) as fp:
+            assert find_occurrence_offset("hello world", fp) == 27
+
+    def test_last_line(self, empty_dir):
+        """If the last line contains the text but no newline, the offset is
+        the end of the file.
+        """
+        with _binary_file(empty_dir, "Line 1\nhello world") as fp:
+            assert find_occurrence_offset("hello world", fp) == 18
+
+    def test_none(self, empty_dir):
+        """There is no occurrence of the text."""
+        with _binary_file(empty_dir, "Line 1\nLine 2\n") as fp:
+            assert find_occurrence_offset("hello world", fp) is None
+
+    def test_empty(self, empty_dir):
+        """An empty file contains no occurrence."""
+        with _binary_file(empty_dir, "") as fp:
+            assert find_occurrence_offset("hello world", fp) is None
+
+
+class TestFindSectionTag:
+    """Collect all tests for find_section_tag."""
+
+    def test_simple(self, empty_dir):
+        """The offset is the end of the line that contains the section tag."""
+        with _binary_file(
+            empty_dir, "# Change log\n<!-- protokolo-section-tag -->\n"
+        ) as fp:
+            assert find_section_tag(fp, "CHANGELOG.md") == 44
+
+    def test_missing(self, empty_dir):
+        """If there is no section tag, raise an error that names the file."""
+        with _binary_file(empty_dir, "# Change log\n") as fp:
+            with pytest.raises(SectionTagNotFoundError) as exc_info:
+                find_section_tag(fp, "CHANGELOG.md")
+        assert "'CHANGELOG.md'" in str(exc_info.value)
+
+
+class TestIterInsertAtOffset:
+    """Collect all tests for iter_insert_at_offset."""
+
+    @pytest.mark.parametrize(
+        "chunks,target",
+        [
+            (["Foo"], "Line 1\nTag\nLine 3\n"),
+            (["Foo\n", "Bar"], "Tag\nLine 2\n"),
+            (["Fóó", "", "Bar\n"], "Tág\nLine 2\n"),
+            (["Foo"], "Line 1\nTag\n"),
+            (["Foo"], "Line 1\nTag"),
+        ],
+    )
+    def test_identical_to_insert_into_str(self, empty_dir, chunks, target):
+        """The joined result is identical to that of insert_into_str."""
+        with _binary_file(empty_dir, target) as fp:
+            offset = find_occurrence_offset("T", fp)
+            assert offset is not None
+            result = b"".join(iter_insert_at_offset(chunks, fp, offset))
+        assert result.decode("utf-8") == insert_into_str(
+            "".join(chunks), target, find_first_occurrence("T", target) or 0
+        )
+
+    def test_no_chunks(self, empty_dir):
+        """Without chunks, the result is identical to the source."""
+        for target in ["Line 1\nTag\nLine 3\n", "Line 1\nTag"]:
+            with _binary_file(empty_dir, target) as fp:
+                offset = find_occurrence_offset("Tag", fp)
+                assert offset is not None
+                result = b"".join(iter_insert_at_offset([], fp, offset))
+            assert result.decode("utf-8") == target
+
+    def test_crlf(self, empty_dir, monkeypatch):
+        """If the line of the tag ends with CRLF, so do the inserted lines,
+        also if the CRLF is split between two blocks.
+        """
+        monkeypatch.setattr("protokolo.replace.BLOCK_SIZE", 4)
+        with _binary_file(empty_dir, "Line 1\r\nTag\r\nLine 3\r\n") as fp:
+            offset = find_occurrence_offset("Tag", fp)
+            assert offset is not None
+            result = b"".join(
+                iter_insert_at_offset(["Foo\n", "\n", "Bar"], fp, offset)
+            )
+        assert result == b"Line 1\r\nTag\r\nFoo\r\n\r\nBar\r\nLine 3\r\n"
+
+    def test_lf_in_crlf_file(self, empty_dir):
+        """The line ending of the line of the tag is used."""
+        with _binary_file(empty_dir, "Line 1\r\nTag\nLine 3\r\n") as fp:
+            offset = find_occurrence_offset("Tag", fp)
+            assert offset is not None
+            result = b"".join(iter_insert_at_offset(["Foo"], fp, offset))
+        assert result == b"Line 1\r\nTag\nFoo\nLine 3\r\n"
+
+    def test_copies_in_blocks(self, empty_dir, monkeypatch):
+        """The source is copied in blocks."""
+        monkeypatch.setattr("protokolo.replace.BLOCK_SIZE", 4)
+        with _binary_file(empty_dir, "12345Tag\n1234567890") as fp:
+            offset = find_occurrence_offset("Tag", fp)
+            assert offset is not None
+            assert list(iter_insert_at_offset(["Foo\n"], fp, offset)) == [
+                b"1234",
+                b"5Tag",
+                b"\n",
+                b"Foo\n",
+                b"1234",
+                b"5678",
+                b"90",
+            ]
+
+
+class TestAtomicWrite:
+    """Collect all tests for atomic_write and write_atomically."""
+
+    def test_simple(self, empty_dir):
+        """The file is replaced, and its permissions are kept."""
+        path = empty_dir / "foo.md"
+        path.write_text("Foo")
+        path.chmod(0o640)
+        write_atomically(str(path), ["Bar\n", "Baz\n"])
+        assert path.read_text() == "Bar\nBaz\n"
+        assert path.stat().st_mode & 0o777 == 0o640
+        assert os.listdir(empty_dir) == ["foo.md"]
+
+    def test_symlink(self, empty_dir):
+        """The target of a symbolic link is replaced, and the link is kept."""
+        target = empty_dir / "real.md"
+        target.write_text("Foo")
+        path = empty_dir / "foo.md"
+        path.symlink_to("real.md")
+        write_atomically(str(path), ["Bar\n"])
+        assert path.is_symlink()
+        assert target.read_text() == "Bar\n"
+        assert sorted(os.listdir(empty_dir)) == ["foo.md", "real.md"]
+
+    def test_new_file(self, empty_dir):
+        """A file that does not exist yet is created."""
+        path = empty_dir / "foo.md"
+        write_atomically(str(path), ["Foo\n"])
+        assert path.read_text() == "Foo\n"
+
+    def test_error(self, empty_dir):
+        """On error, the file is unchanged, and the temporary file is
+        removed.
+        """
+        path = empty_dir / "foo.md"
+        path.write_text("Foo")
+        with pytest.raises(ValueError):
+            with atomic_write(str(path)) as fp:
+                fp.write(b"Bar")
+                raise ValueError()
+        assert path.read_text() == "Foo"
+        assert os.listdir(empty_dir) == ["foo.md"]
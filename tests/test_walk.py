@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the directory walking code."""
+
+import os
+from collections import Counter
+
+import pytest
+
+from protokolo._walk import SyscallCounter, scan_directory
+from protokolo.exceptions import (
+    ProtokoloTOMLIsADirectoryError,
+    ProtokoloTOMLNotFoundError,
+)
+
+
+@pytest.fixture()
+def real_calls(monkeypatch):
+    """Count the calls to :func:`os.scandir`, and to :func:`os.stat` and
+    :func:`os.lstat` together as ``stat``.
+    """
+    calls: Counter[str] = Counter()
+
+    def counting(name, function):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return function(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(os, "scandir", counting("scandir", os.scandir))
+    monkeypatch.setattr(os, "stat", counting("stat", os.stat))
+    monkeypatch.setattr(os, "lstat", counting("stat", os.lstat))
+    return calls
+
+
+class TestScanDirectory:
+    """Collect all tests for scan_directory."""
+
+    def test_simple(self, project_dir):
+        """Find fragments and subsections."""
+        changelog_d = project_dir / "changelog.d"
+        (changelog_d / "foo.md").write_text("Foo")
+        (changelog_d / "foo.rst").write_text("Foo")
+        (changelog_d / "feature/bar.md").write_text("Bar")
+        (changelog_d / "not_a_section").mkdir()
+        (changelog_d / "not_a_section/baz.md").write_text("Baz")
+
+        listing = scan_directory(changelog_d, {".md"})
+        assert listing.path == str(changelog_d)
+        assert listing.protokolo_toml == str(changelog_d / ".protokolo.toml")
+        assert listing.fragments == [str(changelog_d / "foo.md")]
+        assert len(listing.subdirectories) == 1
+        sublisting = listing.subdirectories[0]
+        assert sublisting.path == str(changelog_d / "feature")
+        assert sublisting.fragments == [str(changelog_d / "feature/bar.md")]
+
+    def test_subdirectory_toml_is_directory(self, project_dir):
+        """A subdirectory whose .protokolo.toml is a directory is not a
+        section.
+        """
+        changelog_d = project_dir / "changelog.d"
+        (changelog_d / "feature/.protokolo.toml").unlink()
+        (changelog_d / "feature/.protokolo.toml").mkdir()
+        listing = scan_directory(changelog_d, {".md"})
+        assert not listing.subdirectories
+
+    def test_not_found_error(self, project_dir):
+        """Raise ProtokoloTOMLNotFoundError if the top directory has no
+        .protokolo.toml.
+        """
+        (project_dir / "changelog.d/.protokolo.toml").unlink()
+        with pytest.raises(ProtokoloTOMLNotFoundError):
+            scan_directory(project_dir / "changelog.d", {".md"})
+
+    def test_directory_not_found_error(self, project_dir):
+        """Raise ProtokoloTOMLNotFoundError if the top directory does not
+        exist.
+        """
+        with pytest.raises(ProtokoloTOMLNotFoundError) as exc_info:
+            scan_directory(project_dir / "missing", {".md"})
+        assert exc_info.value.filename == str(
+            project_dir / "missing/.protokolo.toml"
+        )
+
+    def test_not_a_directory_error(self, project_dir):
+        """Raise ProtokoloTOMLNotFoundError if the top directory is a file."""
+        with pytest.raises(ProtokoloTOMLNotFoundError):
+            scan_directory(project_dir / "CHANGELOG.md", {".md"})
+
+    def test_is_a_directory_error(self, project_dir):
+        """Raise ProtokoloTOMLIsADirectoryError if .protokolo.toml in the top
+        directory is a directory.
+        """
+        (project_dir / "changelog.d/.protokolo.toml").unlink()
+        (project_dir / "changelog.d/.protokolo.toml").mkdir()
+        with pytest.raises(ProtokoloTOMLIsADirectoryError):
+            scan_directory(project_dir / "changelog.d", {".md"})
+
+    def test_syscall_budget(self, project_dir, real_calls):
+        """Every directory is scanned once, and no entry needs a separate stat
+        call.
+        """
+        changelog_d = project_dir / "changelog.d"
+        for i in range(100):
+            (changelog_d / f"{i}.md").write_text(str(i))
+            (changelog_d / f"feature/{i}.md").write_text(str(i))
+        entries = len(os.listdir(changelog_d))
+        real_calls.clear()
+
+        counter = SyscallCounter()
+        scan_directory(changelog_d, {".md"}, counter=counter)
+        assert real_calls["scandir"] == counter.scandir == 2
+        assert real_calls["stat"] == counter.stat == 0
+        assert counter.metadata <= entries
+
+    def test_syscall_budget_symlink(self, project_dir):
+        """Symbolic links cost one stat call each."""
+        changelog_d = project_dir / "changelog.d"
+        (project_dir / "foo.md").write_text("Foo")
+        (changelog_d / "foo.md").symlink_to(project_dir / "foo.md")
+
+        counter = SyscallCounter()
+        listing = scan_directory(changelog_d, {".md"}, counter=counter)
+        assert listing.fragments == [str(changelog_d / "foo.md")]
+        assert counter.stat == 1
@@ -0,0 +1,260 @@
+# SPDX-FileCopyrightText: 2026 Carmen Bianca BAKKER <carmen@carmenbianca.eu>
+#
+# SPDX-License-Identifier: EUPL-1.2+
+
+"""Test the watching code."""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from protokolo.compile import Section
+from protokolo.watch import (
+    InotifyWatcher,
+    LiveSection,
+    PollingWatcher,
+    create_watcher,
+    watch,
+)
+
+
+def _compile_fresh(directory: Path) -> str:
+    return Section.from_directory(directory).compile()
+
+
+class TestLiveSection:
+    """Collect all tests for LiveSection."""
+
+    def test_initial(self, project_dir):
+        """The initial tree is identical to a freshly loaded one."""
+        changelog_d = project_dir / "changelog.d"
+        (changelog_d / "feature/foo.md").write_text("- Foo")
+        live = LiveSection(changelog_d)
+        assert live.section.compile() == _compile_fresh(changelog_d)
+
+    def test_fragment_added_changed_removed(self, project_dir):
+        """Fragments are added, changed, and removed in place."""
+        changelog_d = project_dir / "changelog.d"
+        live = LiveSection(changelog_d)
+        feature = next(live.section.sorted_subsections())
+
+        (changelog_d / "feature/foo.md").write_text("- Foo")
+        live.apply([str(changelog_d / "feature/foo.md")])
+        assert live.section.compile() == _compile_fresh(changelog_d)
+
+        (changelog_d / "feature/foo.md").write_text("- Foo again")
+        live.apply([str(changelog_d / "feature/foo.md")])
+        assert live.section.compile() == _compile_fresh(changelog_d)
+        assert len(feature.fragments) == 1
+
+        (changelog_d / "feature/foo.md").unlink()
+        live.apply([str(changelog_d / "feature/foo.md")])
+        assert live.section.compile() == _compile_fresh(changelog_d)
+        assert not feature.fragments
+        # The subsection object was patched, not replaced.
+        assert next(live.section.sorted_subsections()) is feature
+
+    def test_fragment_other_extension_ignored(self, project_dir):
+        """Files that are not fragments are ignored."""
+        changelog_d = project_dir / "changelog.d"
+        live = LiveSection(changelog_d)
+        (changelog_d / "foo.rst").write_text("Foo")
+        live.apply([str(changelog_d / "foo.rst")])
+        assert not live.section.fragments
+
+    def test_subsection_toml_changed(self, project_dir):
+        """A changed .protokolo.toml reloads only its subsection."""
+        changelog_d = project_dir / "changelog.d"
+        (changelog_d / "foo.md").write_text("- Foo")
+        (changelog_d / "feature/bar.md").write_text("- Bar")
+        live = LiveSection(changelog_d)
+        fragments = live.section.fragments
+
+        (changelog_d / "feature/.protokolo.toml").write_text(
+            '[protokolo.section]\ntitle = "New features"\n'
+        )
+        live.apply([str(changelog_d / "feature/.protokolo.toml")])
+        assert live.section.compile() == _compile_fresh(changelog_d)
+        assert "New features" in live.section.compile()
+        assert live.section.fragments is fragments
+
+    def test_subsection_created_and_removed(self, project_dir):
+        """New subsection directories are loaded, and removed ones are
+        dropped.
+        """
+        changelog_d = project_dir / "changelog.d"
+        fixed = changelog_d / "fixed"
+        fixed.mkdir()
+        (fixed / ".protokolo.toml").write_text(
+            '[protokolo.section]\ntitle = "Fixed"\n'
+        )
+        (fixed / "baz.md").write_text("- Baz")
+        live = LiveSection(changelog_d)
+
+        nested = fixed / "nested"
+        nested.mkdir()
+        (nested / ".protokolo.toml").write_text(
+            '[protokolo.section]\ntitle = "Nested"\n'
+        )
+        (nested / "qux.md").write_text("- Qux")
+        live.apply(
+            [
+                str(nested),
+                str(nested / ".protokolo.toml"),
+                str(nested / "qux.md"),
+            ]
+        )
+        assert live.section.compile() == _compile_fresh(changelog_d)
+        assert "### Nested" in live.section.compile()
+
+        shutil.rmtree(fixed)
+        live.apply([str(fixed), str(nested)])
+        assert live.section.compile() == _compile_fresh(changelog_d)
+        assert len(live.section.subsections) == 1
+
+    def test_root_toml_changed(self, project_dir):
+        """A changed root .protokolo.toml reloads everything."""
+        changelog_d = project_dir / "changelog.d"
+        live = LiveSection(changelog_d)
+        (changelog_d / ".protokolo.toml").write_text(
+            '[protokolo.section]\ntitle = "Release"\nlevel = 3\n'
+        )
+        live.apply([str(changelog_d / ".protokolo.toml")])
+        assert live.section.attrs.title == "Release"
+        assert live.section.compile() == _compile_fresh(changelog_d)
+
+
+class TestWatchers:
+    """Collect all tests for the watchers."""
+
+    @pytest.mark.parametrize(
+        "watcher_class",
+        [
+            PollingWatcher,
+            pytest.param(
+                InotifyWatcher,
+                marks=pytest.mark.skipif(
+                    not sys.platform.startswith("linux"),
+                    reason="inotify is Linux only",
+                ),
+            ),
+        ],
+    )
+    def test_detects_changes(self, project_dir, watcher_class):
+        """Created files, also in new subdirectories, are reported."""
+        changelog_d = project_dir / "changelog.d"
+        kwargs = {"interval": 0.01} if watcher_class is PollingWatcher else {}
+        with watcher_class(changelog_d, **kwargs) as watcher:
+            assert watcher.wait(timeout=0.05) == set()
+
+            (changelog_d / "foo.md").write_text("Foo")
+            assert str(changelog_d / "foo.md") in watcher.wait(timeout=5)
+
+            (changelog_d / "new").mkdir()
+            assert str(changelog_d / "new") in watcher.wait(timeout=5)
+            (changelog_d / "new/bar.md").write_text("Bar")
+            assert str(changelog_d / "new/bar.md") in watcher.wait(timeout=5)
+
+    def test_create_watcher(self, project_dir):
+        """create_watcher always returns a working watcher."""
+        with create_watcher(project_dir / "changelog.d") as watcher:
+            assert watcher.wait(timeout=0) == set()
+
+
+class TestWatch:
+    """Collect all tests for watch."""
+
+    def test_render_after_change(self, project_dir):
+        """The tree is rendered initially and after every batch of changes."""
+        changelog_d = project_dir / "changelog.d"
+        live = LiveSection(changelog_d)
+        rendered: list[str] = []
+        errors: list[Exception] = []
+        with PollingWatcher(changelog_d, interval=0.01) as watcher:
+            (changelog_d / "foo.md").write_text("- Foo")
+            watch(
+                live,
+                watcher,
+                lambda section: rendered.append(section.compile()),
+                errors.append,
+                debounce=0.05,
+                stop=lambda: len(rendered) >= 2,
+            )
+        assert not errors
+        assert "Foo" not in rendered[0]
+        assert "- Foo" in rendered[1]
+
+    def test_error_then_recover(self, project_dir):
+        """Errors are reported, and the tree is reloaded after the next
+        change.
+        """
+        changelog_d = project_dir / "changelog.d"
+        live = LiveSection(changelog_d)
+        rendered: list[Section] = []
+        errors: list[Exception] = []
+
+        class FakeWatcher(PollingWatcher):
+            """Return prepared batches of changes."""
+
+            batches = [
+                lambda: (changelog_d / "feature/.protokolo.toml").write_text(
+                    "{'invalid"
+                ),
+                lambda: (changelog_d / "feature/.protokolo.toml").write_text(
+                    '[protokolo.section]\ntitle = "Fixed"\n'
+                ),
+            ]
+
+            def wait(self, timeout=None):
+                if timeout is not None:
+                    return set()
+                self.batches.pop(0)()
+                return {str(changelog_d / "feature/.protokolo.toml")}
+
+        watch(
+            live,
+            FakeWatcher(changelog_d),
+            rendered.append,
+            errors.append,
+            stop=lambda: len(rendered) >= 2,
+        )
+        assert len(errors) == 1
+        assert next(rendered[1].sorted_subsections()).attrs.title == "Fixed"
+
+    def test_decode_error_then_recover(self, project_dir):
+        """A fragment that is read while a multibyte character is only partly
+        written is reported, and read again after the next change.
+        """
+        changelog_d = project_dir / "changelog.d"
+        live = LiveSection(changelog_d)
+        rendered: list[str] = []
+        errors: list[Exception] = []
+
+        class FakeWatcher(PollingWatcher):
+            """Return prepared batches of changes."""
+
+            batches = [
+                lambda: (changelog_d / "foo.md").write_bytes(b"- Caf\xc3"),
+                lambda: (changelog_d / "foo.md").write_bytes(
+                    "- Café".encode("utf-8")
+                ),
+            ]
+
+            def wait(self, timeout=None):
+                if timeout is not None:
+                    return set()
+                self.batches.pop(0)()
+                return {str(changelog_d / "foo.md")}
+
+        watch(
+            live,
+            FakeWatcher(changelog_d),
+            lambda section: rendered.append(section.compile()),
+            errors.append,
+            stop=lambda: len(rendered) >= 2,
+        )
+        assert len(errors) == 1
+        assert isinstance(errors[0], UnicodeDecodeError)
+        assert "- Café" in rendered[1]